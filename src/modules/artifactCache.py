@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+artifact_cache
+
+Short description:
+This module stores the per-file results of the stages under a hash
+of everything they depend on: the bytes of the input files, further
+values like the cue lexicon, and the source code of the stage and the
+shared modules. Unchanged files are served from the cache instead of
+being computed again. The least recently used results are removed
+once the cache grows beyond ARTIFACT_LIMIT bytes. The size of the cache
+is counted up by each process, so the cache directory is only scanned
+on the first store and when entries have to be removed.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import hashlib
+import os
+import pickle
+import shutil
+import sys
+
+from corpusCache import hash_file
+from corpusIO import atomic_write
+from processPool import run_captured
+
+# Cached results are kept apart from the corpus files, next to the corpus caches
+ARTIFACT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'res', 'cache', 'artifacts')
+
+# Size of the cache in bytes, least recently used results are removed beyond it
+ARTIFACT_LIMIT = 1 << 30
+
+# Share of ARTIFACT_LIMIT the cache is shrunk to, so the next stores do not remove entries again
+EVICTION_SHARE = 0.9
+
+# Bytes in the cache as seen by this process, scanned on the first store and counted up after it
+CACHE_SIZE = [None]
+
+# Set to False to compute every result again
+ENABLED = True
+
+# Modules every stage builds on, a change in one of them changes all keys
+SHARED_MODULES = ['streamCorpus', 'corpusIO', 'corpusModel', 'corpusCache', 'sentenceIndex', 'posTags', 'cueMatcher']
+
+RESULT_FILE = 'result.pickle'
+
+
+def source_digest(module_name):
+    """ Returns the sha1 digest of the source file of a module, loaded or from this directory """
+    module = sys.modules.get(module_name)
+    if module is not None and getattr(module, '__file__', None):
+        return hash_file(module.__file__)
+    return hash_file(os.path.join(os.path.dirname(os.path.abspath(__file__)), module_name + '.py'))
+
+
+def artifact_key(stage, function, inputs=(), values=(), modules=()):
+    """ This function computes the cache key of a stage run.
+
+        Args:
+            stage (str): Name of the stage, for example 'conll'
+            function (function): Function that computes the result, its module is part of the key
+            inputs (list): Paths to the files the function reads
+            values (list): Further values the result depends on, their repr() is part of the key
+            modules (list): Names of further project modules the function builds on
+
+        Returns:
+            Hex digest
+
+        Example:
+            >>> artifact_key('conll', convert_file, ['../../res/xml/train/baskerville_ch4.jr.xml'],
+            ['../../res/conll/'])
+    """
+
+    digest = hashlib.sha1()
+    digest.update(stage.encode('utf-8') + b'\0')
+
+    # Code version
+    for module_name in [function.__module__] + list(modules) + SHARED_MODULES:
+        digest.update(source_digest(module_name))
+
+    # Input files by content, not by name or modification time
+    for path in inputs:
+        digest.update(hash_file(path))
+
+    for value in values:
+        digest.update(repr(value).encode('utf-8') + b'\0')
+
+    return digest.hexdigest()
+
+
+def cached_call(stage, function, args, inputs=(), outputs=(), values=(), modules=()):
+    """ This function calls function(*args) or serves its result from the cache.
+        The return value, the console output and the written output files are cached,
+        a cache hit prints the same console output and writes the same files.
+
+        Args:
+            stage (str): Name of the stage, for example 'conll'
+            function (function): Module level function that computes the result
+            args (tuple): Arguments for function
+            inputs (list): Paths to the files the function reads
+            outputs (list): Paths to the files the function writes
+            values (list): Further values the result depends on, for example the cue lexicon
+            modules (list): Names of further project modules the function builds on
+
+        Returns:
+            Return value of function
+
+        Example:
+            >>> cached_call('conll', convert_file, (file, '../../res/conll/'), inputs=[file],
+            ...             outputs=['../../res/conll/baskerville_ch4.jr.xml.conll'], values=['../../res/conll/'])
+    """
+
+    if not ENABLED:
+        return function(*args)
+
+    # Output paths are part of the key, they appear in the console output
+    key = artifact_key(stage, function, inputs, list(values) + list(outputs), modules)
+    entry = os.path.join(ARTIFACT_PATH, key)
+
+    loaded = load_artifact(entry, outputs)
+    if loaded is not None:
+        output, result = loaded
+        print(output, end='')
+        return result
+
+    output, result = run_captured(function, args)
+    print(output, end='')
+
+    store_artifact(entry, outputs, output, result)
+
+    return result
+
+
+def load_artifact(entry, outputs):
+    """ This function copies cached output files to their paths and marks the entry as recently used.
+
+        Args:
+            entry (str): Directory of a cache entry
+            outputs (list): Paths for the output files
+
+        Returns:
+            Tuple of (console output, return value), or None if the entry is missing
+    """
+
+    result_file = os.path.join(entry, RESULT_FILE)
+
+    try:
+        with open(result_file, 'rb') as result_input:
+            output, result = pickle.load(result_input)
+        for number, path in enumerate(outputs):
+            shutil.copyfile(os.path.join(entry, str(number)), path)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+    # The modification time of the result file is the time of last use
+    try:
+        os.utime(result_file)
+    except OSError:
+        pass
+
+    return output, result
+
+
+def store_artifact(entry, outputs, output, result):
+    """ This function stores output files, console output and return value of a stage run,
+        and removes the least recently used entries if the cache has grown beyond ARTIFACT_LIMIT.
+
+        Args:
+            entry (str): Directory of the cache entry
+            outputs (list): Paths to the written output files
+            output (str): Console output
+            result: Return value, it must be picklable
+    """
+
+    try:
+        with atomic_write(entry) as temporary_entry:
+            os.makedirs(temporary_entry, exist_ok=True)
+            for number, path in enumerate(outputs):
+                shutil.copyfile(path, os.path.join(temporary_entry, str(number)))
+            with open(os.path.join(temporary_entry, RESULT_FILE), 'wb') as result_output:
+                pickle.dump((output, result), result_output)
+            size = entry_size(temporary_entry)
+
+    # Another process stored the same entry first, or the cache can not be written
+    except (OSError, pickle.PicklingError):
+        return
+
+    # The cache directory is only scanned again once it has grown beyond the limit
+    if CACHE_SIZE[0] is None:
+        CACHE_SIZE[0] = scan_artifacts()[1]
+    else:
+        CACHE_SIZE[0] += size
+
+    if CACHE_SIZE[0] > ARTIFACT_LIMIT:
+        evict_artifacts(int(ARTIFACT_LIMIT * EVICTION_SHARE))
+
+
+def entry_size(entry):
+    """ Returns the size in bytes of the files of a cache entry """
+    return sum(os.path.getsize(os.path.join(entry, file)) for file in os.listdir(entry))
+
+
+def scan_artifacts():
+    """ This function lists the entries of the cache.
+
+        Returns:
+            Tuple of (list of (time of last use, size, entry directory), total size in bytes)
+    """
+
+    entries = []
+    total = 0
+
+    for name in os.listdir(ARTIFACT_PATH):
+        # Temporary entries of running processes
+        if name.endswith('.tmp'):
+            continue
+        entry = os.path.join(ARTIFACT_PATH, name)
+        try:
+            used = os.stat(os.path.join(entry, RESULT_FILE)).st_mtime_ns
+            size = entry_size(entry)
+        except OSError:
+            continue
+        entries.append((used, size, entry))
+        total += size
+
+    return entries, total
+
+
+def evict_artifacts(limit=None):
+    """ This function removes the least recently used cache entries until the cache fits into limit.
+
+        Args:
+            limit (int): Size in bytes, defaults to ARTIFACT_LIMIT
+
+        Returns:
+            Number of removed entries
+
+        Example:
+            >>> evict_artifacts(0)
+    """
+
+    if limit is None:
+        limit = ARTIFACT_LIMIT
+
+    entries, total = scan_artifacts()
+
+    removed = 0
+    for used, size, entry in sorted(entries):
+        if total <= limit:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        removed += 1
+
+    CACHE_SIZE[0] = total
+
+    return removed
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+corpus_cache
+
+Short description:
+This module compiles corpus files in TIGER-XML format into a compact
+binary cache in res/cache/. The cache holds token columns,
+interned strings for ids, words, lemmas and POS tags, nonterminal edges
+and existing frames. It is memory-mapped on load, so reading a cached
+chapter takes milliseconds instead of parsing the xml again.
+A cache is rebuilt when the xml file changes, checked by size and
+modification time first and by content hash second.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from corpusIO import atomic_write, is_xml_file
+from corpusModel import (Frame, FrameElement, NonTerminal, Part, Sentence,
+                         Splitword, Terminal, read_sentence)
+from streamCorpus import iter_sentences
+
+XML_TRAIN_FILES_PATH = '../../res/xml/train/'
+
+# Cache files are kept apart from the corpus files, so input directories stay unchanged
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'res', 'cache')
+CACHE_EXTENSION = '.cache'
+
+CACHE_MAGIC = b'TGRC'
+CACHE_VERSION = 1
+
+# magic, version, byte order, source size, source mtime, source sha1
+CACHE_HEADER = struct.Struct('<4sIcxxxQQ20s')
+
+# Columns of the cache, in file order, each one an array of unsigned 32 bit integers
+CACHE_COLUMNS = [
+    # Sentences: id, first terminal, first nonterminal, first splitword, first frame
+    's_id', 's_t', 's_nt', 's_sw', 's_fr',
+    # Terminals
+    't_id', 't_word', 't_lemma', 't_pos',
+    # Nonterminals and their edges
+    'nt_id', 'nt_cat', 'nt_edge', 'edge_idref',
+    # Splitwords and their parts
+    'sw_idref', 'sw_part', 'part_id', 'part_word',
+    # Frames, their targets and frame elements, and fenodes
+    'fr_id', 'fr_name', 'fr_target', 'fr_fe', 'fr_fes', 'fe_id', 'fe_name', 'fe_node', 'fenode_idref',
+]
+
+# String code for missing attributes
+NONE_CODE = 0
+
+# Target code for frames without a target
+NO_TARGET = 0xFFFFFFFF
+
+# Bytes read at once when hashing xml files
+HASH_READ_SIZE = 1 << 20
+
+
+class CorpusCache:
+    """ A memory-mapped corpus cache. Sentences are built on demand.
+
+        Example:
+            >>> corpus = load_corpus('../../res/xml/train/baskerville_ch4.jr.xml')
+            >>> len(corpus)
+            >>> corpus[0].get('s1_3').word
+            'Kapitel'
+    """
+
+    __slots__ = ('strings', 'columns', 'buffer', 'cache_file')
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+
+        with open(cache_file, 'rb') as cache_input:
+            self.buffer = mmap.mmap(cache_input.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(self.buffer)
+        position = CACHE_HEADER.size
+
+        # Column lengths, then the columns
+        lengths = view[position:position + 4 * (len(CACHE_COLUMNS) + 1)].cast('I')
+        position += 4 * (len(CACHE_COLUMNS) + 1)
+
+        self.columns = {}
+        for name, length in zip(CACHE_COLUMNS, lengths):
+            self.columns[name] = view[position:position + 4 * length].cast('I')
+            position += 4 * length
+
+        # Interned strings, separated by NUL which xml does not allow in text
+        strings = bytes(view[position:position + lengths[-1]]).decode('utf-8').split('\0')
+        self.strings = [None] + strings
+
+    def __len__(self):
+        return len(self.columns['s_id'])
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def __getitem__(self, position):
+        """ Builds the sentence at the given position """
+
+        strings = self.strings
+        columns = self.columns
+
+        if position < 0:
+            position += len(self)
+
+        sentence = Sentence(strings[columns['s_id'][position]])
+
+        # Terminals
+        t_start, t_end = self.bounds('s_t', 't_id', position)
+        t_ids = columns['t_id']
+        t_words = columns['t_word']
+        t_lemmas = columns['t_lemma']
+        t_pos = columns['t_pos']
+        for row in range(t_start, t_end):
+            t_id = strings[t_ids[row]]
+            terminal = Terminal(t_id, strings[t_words[row]], strings[t_lemmas[row]], strings[t_pos[row]],
+                                row - t_start)
+            sentence.terminals.append(terminal)
+            if t_id not in sentence.index:
+                sentence.index[t_id] = terminal.position
+            sentence.add_node(terminal)
+
+        # Nonterminals
+        edge_idrefs = columns['edge_idref']
+        for row in range(*self.bounds('s_nt', 'nt_id', position)):
+            e_start, e_end = self.bounds('nt_edge', 'edge_idref', row)
+            edges = tuple(strings[edge_idrefs[edge]] for edge in range(e_start, e_end))
+            nonterminal = NonTerminal(strings[columns['nt_id'][row]], strings[columns['nt_cat'][row]], edges)
+            sentence.nonterminals.append(nonterminal)
+            sentence.add_node(nonterminal)
+
+        # Splitwords and their parts
+        for row in range(*self.bounds('s_sw', 'sw_idref', position)):
+            parts = [Part(strings[columns['part_id'][part]], strings[columns['part_word'][part]])
+                     for part in range(*self.bounds('sw_part', 'part_id', row))]
+            sentence.splitwords.append(Splitword(strings[columns['sw_idref'][row]], parts))
+            for part in parts:
+                sentence.add_node(part)
+
+        # Frames with targets and frame elements
+        for row in range(*self.bounds('s_fr', 'fr_id', position)):
+            fe_start = columns['fr_fe'][row]
+            fes = [self.frame_element(fe) for fe in range(fe_start, fe_start + columns['fr_fes'][row])]
+            target = columns['fr_target'][row]
+            target = self.frame_element(target) if target != NO_TARGET else None
+            sentence.frames.append(Frame(strings[columns['fr_id'][row]], strings[columns['fr_name'][row]],
+                                         target, fes))
+
+        return sentence
+
+    def bounds(self, start_column, row_column, row):
+        """ Returns the rows of row_column that belong to a row, from the start offsets in start_column """
+        starts = self.columns[start_column]
+        end = starts[row + 1] if row + 1 < len(starts) else len(self.columns[row_column])
+        return starts[row], end
+
+    def frame_element(self, row):
+        """ Builds the target or frame element in the given row """
+        strings = self.strings
+        fenode_idrefs = self.columns['fenode_idref']
+        fenodes = [strings[fenode_idrefs[fenode]] for fenode in range(*self.bounds('fe_node', 'fenode_idref', row))]
+        return FrameElement(strings[self.columns['fe_id'][row]], strings[self.columns['fe_name'][row]], fenodes)
+
+    def close(self):
+        """ Releases the memory map """
+        for name in self.columns:
+            self.columns[name].release()
+        self.columns = {}
+        self.buffer.close()
+
+
+def cache_path(xml_file):
+    """ Returns the path of the cache file for an xml file,
+        files with the same name in different directories get different caches
+    """
+    directory = hashlib.sha1(os.path.dirname(os.path.abspath(xml_file)).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(CACHE_PATH, os.path.basename(xml_file) + '.' + directory + CACHE_EXTENSION)
+
+
+def hash_file(path):
+    """ Returns the sha1 digest of a file """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file_input:
+        for chunk in iter(lambda: file_input.read(HASH_READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def compile_corpus(xml_file, cache_file=None):
+    """ This function compiles a corpus file in TIGER-XML format into a binary cache.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            cache_file (str): Path for the cache, defaults to cache_path()
+
+        Returns:
+            Path to the written cache file
+
+        Example:
+            >>> compile_corpus('../../res/xml/train/baskerville_ch4.jr.xml')
+    """
+
+    if cache_file is None:
+        cache_file = cache_path(xml_file)
+
+    if not os.path.exists(os.path.dirname(cache_file)):
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+
+    stat = os.stat(xml_file)
+    digest = hash_file(xml_file)
+
+    columns = {name: array('I') for name in CACHE_COLUMNS}
+    codes = {None: NONE_CODE}
+    strings = []
+
+    def intern(value):
+        """ Returns the code of a string, adding new strings to the table """
+        code = codes.get(value)
+        if code is None:
+            strings.append(value)
+            code = codes[value] = len(strings)
+        return code
+
+    def add_frame_element(frame_element):
+        """ Adds a target or frame element and its fenodes, returns its row """
+        columns['fe_node'].append(len(columns['fenode_idref']))
+        columns['fe_id'].append(intern(frame_element.id))
+        columns['fe_name'].append(intern(frame_element.name))
+        columns['fenode_idref'].extend(intern(idref) for idref in frame_element.fenodes)
+        return len(columns['fe_id']) - 1
+
+    for element in iter_sentences(xml_file):
+        sentence = read_sentence(element)
+
+        columns['s_id'].append(intern(sentence.id))
+        columns['s_t'].append(len(columns['t_id']))
+        columns['s_nt'].append(len(columns['nt_id']))
+        columns['s_sw'].append(len(columns['sw_idref']))
+        columns['s_fr'].append(len(columns['fr_id']))
+
+        for terminal in sentence.terminals:
+            columns['t_id'].append(intern(terminal.id))
+            columns['t_word'].append(intern(terminal.word))
+            columns['t_lemma'].append(intern(terminal.lemma))
+            columns['t_pos'].append(intern(terminal.pos))
+
+        for nonterminal in sentence.nonterminals:
+            columns['nt_id'].append(intern(nonterminal.id))
+            columns['nt_cat'].append(intern(nonterminal.cat))
+            columns['nt_edge'].append(len(columns['edge_idref']))
+            columns['edge_idref'].extend(intern(idref) for idref in nonterminal.edges)
+
+        for splitword in sentence.splitwords:
+            columns['sw_idref'].append(intern(splitword.idref))
+            columns['sw_part'].append(len(columns['part_id']))
+            for part in splitword.parts:
+                columns['part_id'].append(intern(part.id))
+                columns['part_word'].append(intern(part.word))
+
+        for frame in sentence.frames:
+            columns['fr_id'].append(intern(frame.id))
+            columns['fr_name'].append(intern(frame.name))
+            columns['fr_target'].append(add_frame_element(frame.target) if frame.target is not None else NO_TARGET)
+            columns['fr_fe'].append(len(columns['fe_id']))
+            columns['fr_fes'].append(len(frame.fes))
+            for frame_element in frame.fes:
+                add_frame_element(frame_element)
+
+    blob = '\0'.join(strings).encode('utf-8')
+
+    with atomic_write(cache_file) as temporary_file:
+        with open(temporary_file, 'wb') as cache_output:
+            cache_output.write(CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, sys.byteorder[0].encode('ascii'),
+                                                 stat.st_size, stat.st_mtime_ns, digest))
+            array('I', [len(columns[name]) for name in CACHE_COLUMNS] + [len(blob)]).tofile(cache_output)
+            for name in CACHE_COLUMNS:
+                columns[name].tofile(cache_output)
+            cache_output.write(blob)
+
+    return cache_file
+
+
+def is_fresh(xml_file, cache_file):
+    """ This function checks if a cache file belongs to the current xml file.
+        Size and modification time are compared first, the content hash only if they differ.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            cache_file (str): Path to its cache file
+
+        Returns:
+            True if the cache can be used
+
+        Example:
+            >>> is_fresh('../../res/xml/train/baskerville_ch4.jr.xml',
+            cache_path('../../res/xml/train/baskerville_ch4.jr.xml'))
+    """
+
+    try:
+        with open(cache_file, 'rb') as cache_input:
+            header = cache_input.read(CACHE_HEADER.size)
+        magic, version, byteorder, size, mtime, digest = CACHE_HEADER.unpack(header)
+    except (OSError, struct.error):
+        return False
+
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or byteorder != sys.byteorder[0].encode('ascii'):
+        return False
+
+    stat = os.stat(xml_file)
+    if stat.st_size == size and stat.st_mtime_ns == mtime:
+        return True
+
+    # Same content with a new modification time, for example after a checkout
+    if stat.st_size == size and hash_file(xml_file) == digest:
+        with open(cache_file, 'r+b') as cache_output:
+            cache_output.write(CACHE_HEADER.pack(magic, version, byteorder, size, stat.st_mtime_ns, digest))
+        return True
+
+    return False
+
+
+def load_corpus(xml_file):
+    """ This function opens the cache of a corpus file in TIGER-XML format
+        and compiles it first if it is missing or out of date.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+
+        Returns:
+            CorpusCache
+
+        Example:
+            >>> corpus = load_corpus('../../res/xml/train/baskerville_ch4.jr.xml')
+            >>> for sentence in corpus:
+            ...     print(sentence.id, len(sentence.terminals))
+    """
+
+    cache_file = cache_path(xml_file)
+
+    if not is_fresh(xml_file, cache_file):
+        compile_corpus(xml_file, cache_file)
+
+    return CorpusCache(cache_file)
+
+
+if __name__ == "__main__":
+
+    # Compile all training files
+    for file in os.listdir(XML_TRAIN_FILES_PATH):
+        file = XML_TRAIN_FILES_PATH+file
+        if os.path.isfile(file) and is_xml_file(file):
+            print('Compiled', compile_corpus(file))
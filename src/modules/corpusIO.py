@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+corpus_io
+
+Short description:
+This module opens corpus files that are plain or compressed with
+gzip, bz2 or xz, the codec is chosen by the file extension.
+Compressed output is written on a background thread, so compressing
+overlaps with the work of the stage that writes the file. Reading ahead
+and writing behind on threads with bounded queues lets reading, detection
+and writing of a file run at the same time.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import bz2
+import gzip
+import lzma
+import os
+import queue
+import shutil
+import threading
+from contextlib import contextmanager
+
+# Compression extensions and the modules that open them
+COMPRESSED_EXTENSIONS = {'.gz': gzip, '.bz2': bz2, '.xz': lzma}
+
+# Extensions of corpus files in TIGER-XML format
+XML_EXTENSIONS = ('.xml',) + tuple('.xml' + extension for extension in COMPRESSED_EXTENSIONS)
+
+# Extensions of corpus files in CoNLL-2009 format, see xmlToConll.py
+CONLL_EXTENSIONS = ('.conll',) + tuple('.conll' + extension for extension in COMPRESSED_EXTENSIONS)
+
+# Bytes read at once from corpus files
+READ_SIZE = 1 << 20
+
+# Bytes collected before they are handed to the background writer
+WRITE_SIZE = 1 << 20
+
+# Chunks waiting for the background writer, more chunks use more memory
+WRITE_QUEUE_SIZE = 4
+
+# Items read ahead of the consumer, more items use more memory
+READ_QUEUE_SIZE = 4
+
+# Seconds between checks whether the consumer of read_ahead() is gone
+QUEUE_TIMEOUT = 0.1
+
+
+def compression(path):
+    """ Returns the module that opens a compressed file, or None for plain files """
+    for extension, module in COMPRESSED_EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return module
+    return None
+
+
+def is_xml_file(path):
+    """ Returns True for corpus files in xml format, plain or compressed """
+    return path.lower().endswith(XML_EXTENSIONS)
+
+
+def is_conll_file(path):
+    """ Returns True for corpus files in CoNLL-2009 format, plain or compressed """
+    return path.lower().endswith(CONLL_EXTENSIONS)
+
+
+def is_compressed(path):
+    """ Returns True for files compressed with gzip, bz2 or xz """
+    return compression(path) is not None
+
+
+def read_chunks(path, size=READ_SIZE):
+    """ This function reads a plain or compressed corpus file in chunks of size bytes.
+
+        Args:
+            path (str): Path to a file
+            size (int): Bytes per chunk, defaults to READ_SIZE
+
+        Returns:
+            Generator of byte strings
+    """
+
+    with open_corpus(path, 'rb') as file_input:
+        for chunk in iter(lambda: file_input.read(size), b''):
+            yield chunk
+
+
+def read_ahead(items, size=READ_QUEUE_SIZE):
+    """ This function runs a generator on a background thread and hands its items
+        through a bounded queue, so the next items are read while the current one is used.
+        The thread waits while the queue is full, so at most size items are held in memory.
+        Exceptions of the generator are raised in the caller.
+
+        Args:
+            items (iterable): Items to read ahead, for example read_chunks(xml_file)
+            size (int): Number of items read ahead, defaults to READ_QUEUE_SIZE
+
+        Returns:
+            Generator of the same items, in the same order
+
+        Example:
+            >>> for chunk in read_ahead(read_chunks('../../res/xml/train/baskerville_ch4.jr.xml')):
+            ...     print(len(chunk))
+    """
+
+    pending = queue.Queue(size)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item):
+        """ Waits for room in the queue, returns False once the caller is gone """
+        while not stopped.is_set():
+            try:
+                pending.put(item, timeout=QUEUE_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    break
+            else:
+                put((done, None))
+        except BaseException as error:
+            put((done, error))
+        finally:
+            # Closes the files of a generator the caller stopped early
+            if hasattr(items, 'close'):
+                items.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = pending.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Releases the thread if the caller stops early
+        stopped.set()
+        thread.join()
+
+
+@contextmanager
+def atomic_write(path):
+    """ This function writes a file or directory under a temporary name and moves it to path when done.
+        Readers never see half a file, and the temporary name is one per process,
+        so parallel stages never write to the same file.
+
+        Args:
+            path (str): Path of the finished file or directory
+
+        Returns:
+            Context manager that yields the temporary path, the caller creates the file or directory there,
+            it is removed again if writing or moving it fails
+
+        Example:
+            >>> with atomic_write('../../res/xml/train/baskerville_ch4.jr.xml.idx') as temporary_file:
+            ...     with open(temporary_file, 'wb') as index_output:
+            ...         index_output.write(data)
+    """
+
+    temporary_path = path + '.' + str(os.getpid()) + '.tmp'
+
+    try:
+        yield temporary_path
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.isdir(temporary_path):
+            shutil.rmtree(temporary_path, ignore_errors=True)
+        elif os.path.lexists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+def open_corpus(path, mode='rb', background=False):
+    """ This function opens a plain or compressed corpus file in binary mode.
+        Compressed files are always written on a background thread.
+
+        Args:
+            path (str): Path to a file, for example baskerville_ch4.jr.xml.gz
+            mode (str): 'rb' or 'wb'
+            background (bool): Write plain files on a background thread as well
+
+        Returns:
+            File object
+
+        Example:
+            >>> with open_corpus('../../res/xml/train/baskerville_ch4.jr.xml.gz') as xml_input:
+            ...     data = xml_input.read()
+    """
+
+    module = compression(path)
+
+    if module is None:
+        if background and 'w' in mode:
+            return BackgroundWriter(open(path, mode))
+        return open(path, mode)
+
+    if 'w' in mode:
+        return BackgroundWriter(module.open(path, mode))
+
+    return module.open(path, mode)
+
+
+class BackgroundWriter:
+    """ Writes to a file object on a background thread.
+        Writes are collected into chunks of WRITE_SIZE bytes and return at once,
+        unless WRITE_QUEUE_SIZE chunks are waiting. close() waits until everything is written.
+
+        Example:
+            >>> with BackgroundWriter(gzip.open('out.xml.gz', 'wb')) as xml_output:
+            ...     xml_output.write(b'<corpus/>')
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.chunks = queue.Queue(WRITE_QUEUE_SIZE)
+        self.buffer = bytearray()
+        self.error = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """ Writes chunks until close() sends None """
+        while True:
+            chunk = self.chunks.get()
+            if chunk is None:
+                break
+            if self.error is None:
+                try:
+                    self.file.write(chunk)
+                except Exception as error:
+                    self.error = error
+
+    def write(self, data):
+        if self.error is not None:
+            raise self.error
+        self.buffer += data
+        if len(self.buffer) >= WRITE_SIZE:
+            self.chunks.put(bytes(self.buffer))
+            self.buffer.clear()
+        return len(data)
+
+    def close(self):
+        if self.thread.is_alive():
+            if self.buffer:
+                self.chunks.put(bytes(self.buffer))
+                self.buffer.clear()
+            self.chunks.put(None)
+            self.thread.join()
+            self.file.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
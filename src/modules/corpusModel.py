@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+corpus_model
+
+Short description:
+This module holds a compact in-memory model of corpus sentences
+in TIGER-XML format. Terminals, nonterminals, splitword parts and
+frames are read once per sentence, and every id can be looked up
+in constant time.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import io
+
+from corpusIO import open_corpus
+from posTags import pos_bit
+from streamCorpus import iter_sentences
+
+# Columns of CoNLL-2009 files, see xmlToConll.py
+CONLL_ID = 0
+CONLL_FORM = 1
+CONLL_LEMMA = 2
+CONLL_PLEMMA = 3
+CONLL_POS = 4
+CONLL_PPOS = 5
+
+# Empty CoNLL-2009 column
+CONLL_EMPTY = '_'
+
+
+class Terminal:
+    """ A terminal <t id="s1_3" pos="NN" lemma="Kapitel" word="Kapitel"/>
+        and its position within the sentence.
+        pos_bit is the interned POS tag for testing against rule masks, see posTags.py.
+    """
+
+    __slots__ = ('id', 'word', 'lower', 'lemma', 'pos', 'pos_bit', 'position')
+
+    # Terminals have no edges
+    edges = ()
+
+    def __init__(self, t_id, word, lemma, pos, position):
+        self.id = t_id
+        self.word = word
+        self.lower = word.lower() if word is not None else None
+        self.lemma = lemma
+        self.pos = pos
+        self.pos_bit = pos_bit(pos)
+        self.position = position
+
+
+class NonTerminal:
+    """ A nonterminal <nt id="s1_502" cat="NP"> and the idrefs of its edges. """
+
+    __slots__ = ('id', 'cat', 'edges')
+
+    # Nonterminals have no word, lemma or pos
+    word = None
+    lemma = None
+    pos = None
+
+    def __init__(self, nt_id, cat, edges):
+        self.id = nt_id
+        self.cat = cat
+        self.edges = edges
+
+
+class Part:
+    """ A splitword part <part id="s7_46_s0" word="un"/> """
+
+    __slots__ = ('id', 'word')
+
+    # Parts have no lemma, pos or edges
+    lemma = None
+    pos = None
+    edges = ()
+
+    def __init__(self, p_id, word):
+        self.id = p_id
+        self.word = word
+
+
+class Splitword:
+    """ A <splitword idref="s7_46"> and its parts. """
+
+    __slots__ = ('idref', 'parts')
+
+    def __init__(self, idref, parts):
+        self.idref = idref
+        self.parts = parts
+
+
+class FrameElement:
+    """ A <target> or <fe> of a frame and the idrefs of its fenodes. """
+
+    __slots__ = ('id', 'name', 'fenodes')
+
+    def __init__(self, fe_id, name, fenodes):
+        self.id = fe_id
+        self.name = name
+        self.fenodes = fenodes
+
+
+class Frame:
+    """ A <frame id="s7_f1" name="Negation"> with its target and frame elements. """
+
+    __slots__ = ('id', 'name', 'target', 'fes')
+
+    def __init__(self, f_id, name, target, fes):
+        self.id = f_id
+        self.name = name
+        self.target = target
+        self.fes = fes
+
+    def fe(self, name):
+        """ Returns the first frame element with the given name, or None """
+        for frame_element in self.fes:
+            if frame_element.name == name:
+                return frame_element
+        return None
+
+
+class Sentence:
+    """ A sentence <s id="s1"> with its terminals, nonterminals, splitwords and frames.
+
+        Example:
+            >>> sentence = read_sentence(element)
+            >>> sentence.get('s1_3').word
+            'Kapitel'
+    """
+
+    __slots__ = ('id', 'terminals', 'nonterminals', 'splitwords', 'frames', 'index', 'nodes', 'yields')
+
+    def __init__(self, s_id):
+        self.id = s_id
+        self.terminals = []
+        self.nonterminals = []
+        self.splitwords = []
+        self.frames = []
+
+        # Terminal id -> position in self.terminals
+        self.index = {}
+
+        # Terminal, nonterminal and part id -> node
+        self.nodes = {}
+
+        # Nonterminal id -> bitset of the positions of its terminals, filled on first use
+        self.yields = None
+
+    def get(self, node_id):
+        """ Returns the terminal, nonterminal or splitword part with the given id, or None """
+        return self.nodes.get(node_id)
+
+    def add_node(self, node):
+        """ Registers a node for id lookup, the first node with an id wins """
+        if node.id not in self.nodes:
+            self.nodes[node.id] = node
+
+    def yield_of(self, node_id):
+        """ This function returns the terminals a node spans in the syntax graph.
+            The yields of all nonterminals are resolved once per sentence, bottom-up
+            from the <nonterminals> graph, so each further lookup is a dict access.
+
+            Args:
+                node_id (str): Id of a terminal or nonterminal
+
+            Returns:
+                Bitset of terminal positions, bit n is set for self.terminals[n],
+                0 for splitword parts and unknown ids
+
+            Example:
+                >>> bin(sentence.yield_of('s1_502'))
+                '0b111'
+        """
+
+        if self.yields is None:
+            self.yields = resolve_yields(self)
+
+        node = self.nodes.get(node_id)
+        if isinstance(node, Terminal):
+            return 1 << node.position
+        return self.yields.get(node_id, 0)
+
+    def yield_words(self, node_id):
+        """ Returns the words of the terminals a node spans, in sentence order, see yield_of() """
+        words = []
+        bits = self.yield_of(node_id)
+        while bits:
+            low = bits & -bits
+            words.append(self.terminals[low.bit_length() - 1].word)
+            bits ^= low
+        return words
+
+
+def resolve_yields(sentence):
+    """ This function resolves the terminal yields of all nonterminals of a sentence, children first.
+
+        Args:
+            sentence (Sentence): The sentence
+
+        Returns:
+            Dict of nonterminal id -> bitset of terminal positions, edges to unknown ids are left out
+    """
+
+    yields = {}
+
+    for root in sentence.nonterminals:
+        if root.id in yields:
+            continue
+
+        # Depth first without recursion, a nonterminal is resolved after all its children,
+        # yields of nonterminals on a cycle stay empty instead of looping
+        yields[root.id] = 0
+        stack = [(root, False)]
+        while stack:
+            nonterminal, done = stack.pop()
+
+            if done:
+                bits = 0
+                for idref in nonterminal.edges:
+                    child = sentence.nodes.get(idref)
+                    if isinstance(child, Terminal):
+                        bits |= 1 << child.position
+                    elif isinstance(child, NonTerminal):
+                        bits |= yields[idref]
+                yields[nonterminal.id] = bits
+                continue
+
+            stack.append((nonterminal, True))
+            for idref in nonterminal.edges:
+                child = sentence.nodes.get(idref)
+                if isinstance(child, NonTerminal) and idref not in yields:
+                    yields[idref] = 0
+                    stack.append((child, False))
+
+    return yields
+
+
+def read_sentence(element):
+    """ This function reads an lxml <s> element into a Sentence.
+
+        Args:
+            element (lxml.etree._Element): <s> element, for example from iter_sentences()
+
+        Returns:
+            Sentence
+
+        Example:
+            >>> read_sentence(element)
+    """
+
+    sentence = Sentence(element.get('id'))
+
+    # Terminals
+    for terminal in element.iter('t'):
+        t_id = terminal.get('id')
+        terminal = Terminal(t_id, terminal.get('word'), terminal.get('lemma'), terminal.get('pos'),
+                            len(sentence.terminals))
+        sentence.terminals.append(terminal)
+        if t_id not in sentence.index:
+            sentence.index[t_id] = terminal.position
+        sentence.add_node(terminal)
+
+    # Nonterminals
+    for nonterminal in element.iter('nt'):
+        edges = tuple(edge.get('idref') for edge in nonterminal.iter('edge'))
+        nonterminal = NonTerminal(nonterminal.get('id'), nonterminal.get('cat'), edges)
+        sentence.nonterminals.append(nonterminal)
+        sentence.add_node(nonterminal)
+
+    # Splitwords and their parts
+    for splitword in element.iter('splitword'):
+        parts = [Part(part.get('id'), part.get('word')) for part in splitword.iter('part')]
+        sentence.splitwords.append(Splitword(splitword.get('idref'), parts))
+        for part in parts:
+            sentence.add_node(part)
+
+    # Frames with targets and frame elements
+    for frame in element.iter('frame'):
+        target = frame.find('target')
+        if target is not None:
+            target = FrameElement(None, 'target', [fenode.get('idref') for fenode in target.iter('fenode')])
+        fes = [FrameElement(fe.get('id'), fe.get('name'), [fenode.get('idref') for fenode in fe.iter('fenode')])
+               for fe in frame.iter('fe')]
+        sentence.frames.append(Frame(frame.get('id'), frame.get('name'), target, fes))
+
+    return sentence
+
+
+def check_token(token):
+    """ This function checks a token of sentence_from_tokens() that comes from outside of the program.
+
+        Args:
+            token: Token to check, a list or tuple of (id, word, lemma, pos)
+
+        Returns:
+            The token as a tuple, id and word are strings, lemma and pos strings or None
+
+        Example:
+            >>> check_token(['s1_1', 'nicht', 'nicht', 'PTKNEG'])
+            ('s1_1', 'nicht', 'nicht', 'PTKNEG')
+    """
+
+    if not isinstance(token, (list, tuple)) or len(token) != 4:
+        raise ValueError('Tokens must be [id, word, lemma, pos], got: ' + repr(token))
+
+    t_id, word, lemma, pos = token
+    if not isinstance(t_id, str) or not isinstance(word, str):
+        raise ValueError('Token id and word must be strings, got: ' + repr(token))
+    if not isinstance(lemma, (str, type(None))) or not isinstance(pos, (str, type(None))):
+        raise ValueError('Token lemma and pos must be strings or null, got: ' + repr(token))
+
+    return tuple(token)
+
+
+def sentence_from_tokens(tokens, s_id=None):
+    """ This function builds a Sentence from tokens held in memory.
+
+        Args:
+            tokens (iterable): (id, word, lemma, pos) tuples, in sentence order
+            s_id (str): Sentence id, by default the terminal ids without their
+                        last _NUMBER part, s1 for s1_3, or None if they have none
+
+        Returns:
+            Sentence
+
+        Example:
+            >>> sentence_from_tokens([('s1_1', 'Er', 'er', 'PPER'), ('s1_2', 'kam', 'kommen', 'VVFIN')]).id
+            's1'
+    """
+
+    sentence = Sentence(s_id)
+
+    for t_id, word, lemma, pos in tokens:
+        terminal = Terminal(t_id, word, lemma, pos, len(sentence.terminals))
+        sentence.terminals.append(terminal)
+        if t_id not in sentence.index:
+            sentence.index[t_id] = terminal.position
+        sentence.add_node(terminal)
+
+    if s_id is None and sentence.terminals and '_' in (sentence.terminals[0].id or ''):
+        sentence.id = sentence.terminals[0].id.rsplit('_', 1)[0]
+
+    return sentence
+
+
+def iter_corpus(xml_file, cache=True):
+    """ This function streams the sentences of a corpus file in TIGER-XML format.
+        By default the sentences are read from the binary cache of the file,
+        which is compiled on first use, see corpusCache.py.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            cache (bool): Read from the binary cache instead of the xml file
+
+        Returns:
+            Generator of Sentence objects, in document order
+
+        Example:
+            >>> for sentence in iter_corpus('../../res/xml/train/baskerville_ch4.jr.xml'):
+            ...     print(sentence.id, len(sentence.terminals))
+    """
+
+    if cache:
+        # Imported here because the cache module builds on this one
+        from corpusCache import load_corpus
+
+        # Read only directories fall back to the xml file
+        try:
+            corpus = load_corpus(xml_file)
+        except OSError:
+            corpus = None
+
+        if corpus is not None:
+            try:
+                for sentence in corpus:
+                    yield sentence
+            finally:
+                corpus.close()
+            return
+
+    for element in iter_sentences(xml_file):
+        yield read_sentence(element)
+
+
+def conll_terminal_id(column):
+    """ Returns the terminal id of a CoNLL-2009 ID column written by xmlToConll.py, s1_3 for 1-s1_3 """
+    number, separator, t_id = column.partition('-')
+    if separator and number.isdigit():
+        return t_id
+    return column
+
+
+def read_conll(lines, name='<conll>'):
+    """ This function reads sentences in CoNLL-2009 format, one token per line
+        and sentences separated by blank lines. The ID column holds the line number
+        and the terminal id, as written by xmlToConll.py, so the terminals keep
+        the ids of the corpus file in TIGER-XML format.
+
+        Args:
+            lines (iterable): Lines of text, for example an open .conll or .dep.conll file
+            name (str): Name of the input in error messages, for example the path of the file
+
+        Returns:
+            Generator of Sentence objects, without nonterminals, splitwords or frames,
+            a ValueError is raised for lines with too few columns
+
+        Example:
+            >>> with open('../../res/conll/baskerville_ch4.jr.dep.conll', encoding='utf8') as conll:
+            ...     print(next(read_conll(conll)).terminals[0].id)
+            s1_3
+    """
+
+    tokens = []
+
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+
+        if not line.strip():
+            if tokens:
+                yield sentence_from_tokens(tokens)
+                tokens = []
+            continue
+
+        if line.startswith('#'):
+            continue
+
+        columns = line.split('\t')
+        if len(columns) <= CONLL_PPOS:
+            raise ValueError(name + ', line ' + str(number) + ': expected at least ' + str(CONLL_PPOS + 1)
+                             + ' tab separated columns, got ' + str(len(columns)))
+        lemma = columns[CONLL_LEMMA] if columns[CONLL_LEMMA] != CONLL_EMPTY else columns[CONLL_PLEMMA]
+        pos = columns[CONLL_POS] if columns[CONLL_POS] != CONLL_EMPTY else columns[CONLL_PPOS]
+        tokens.append((conll_terminal_id(columns[CONLL_ID]), columns[CONLL_FORM], lemma, pos))
+
+    if tokens:
+        yield sentence_from_tokens(tokens)
+
+
+def iter_conll(conll_file):
+    """ This function streams the sentences of a plain or compressed corpus file in CoNLL-2009 format.
+
+        Args:
+            conll_file (str): Path to a .conll file, see read_conll()
+
+        Returns:
+            Generator of Sentence objects, in document order
+
+        Example:
+            >>> for sentence in iter_conll('../../res/conll/baskerville_ch4.jr.dep.conll'):
+            ...     print(sentence.id, len(sentence.terminals))
+    """
+
+    with io.TextIOWrapper(open_corpus(conll_file, 'rb'), encoding='utf-8') as conll_input:
+        for sentence in read_conll(conll_input, conll_file):
+            yield sentence
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+cue_matcher
+
+Short description:
+This module compiles a cueword lexicon and the splitword and cueword
+affix rules into one matcher. Lexicon lookup is hashed and affixes are
+found with a prefix and a suffix trie, so matching a token costs the same
+for a lexicon of ten words or a hundred thousand.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+
+class AffixRule:
+    """ A rule that fires for words with a given prefix or suffix.
+
+        Args:
+            name (str): Name of the rule, for console logs
+            lexicon (bool): True for words from the cueword lexicon, False for guessed words
+            prefix (str): Prefix the word starts with, or None
+            suffix (str): Suffix the word ends with, or None
+            skip (int): Number of characters after the suffix, 'lose' with skip 1 matches 'loser'
+            split (int): Where to split the word into splitword parts, None for cuewords
+            pos_mask (int): POS bitmask the token must match, None for any POS tag
+
+        Example:
+            >>> AffixRule('los', True, suffix='los', split=-3)
+    """
+
+    __slots__ = ('name', 'lexicon', 'prefix', 'suffix', 'skip', 'split', 'pos_mask')
+
+    def __init__(self, name, lexicon, prefix=None, suffix=None, skip=0, split=None, pos_mask=None):
+        self.name = name
+        self.lexicon = lexicon
+        self.prefix = prefix
+        self.suffix = suffix
+        self.skip = skip
+        self.split = split
+        self.pos_mask = pos_mask
+
+    def parts(self, word):
+        """ Returns the splitword parts of a word, the first part is written first """
+        return word[:self.split], word[self.split:]
+
+    def target(self, word):
+        """ Returns the splitword part that holds the affix, it becomes the target """
+        return word[:self.split] if self.split > 0 else word[self.split:]
+
+    def rest(self, word):
+        """ Returns the other splitword part, it becomes focus, negated and scope """
+        return word[self.split:] if self.split > 0 else word[:self.split]
+
+
+class CueMatcher:
+    """ Matches tokens against a cueword lexicon and a list of affix rules.
+
+        Example:
+            >>> matcher = CueMatcher(['nicht', 'kein'], CUE_RULES)
+            >>> lexicon, rules = matcher.match('nicht')
+            >>> lexicon, [rule.name for rule in rules]
+            (True, ['ni'])
+    """
+
+    __slots__ = ('cuewords', 'prefixes', 'suffixes')
+
+    def __init__(self, cuewords, rules):
+        self.cuewords = frozenset(cuewords)
+
+        # Tries of nested dicts, rules are stored under the key None together with their
+        # position in rules, the rules themselves are shared and left untouched
+        self.prefixes = {}
+        self.suffixes = {}
+
+        for order, rule in enumerate(rules):
+            if rule.prefix is not None:
+                self.add(self.prefixes, rule.prefix, order, rule)
+            if rule.suffix is not None:
+                # Suffixes are stored reversed, one trie per number of skipped characters
+                self.add(self.suffixes.setdefault(rule.skip, {}), rule.suffix[::-1], order, rule)
+
+    @staticmethod
+    def add(trie, affix, order, rule):
+        """ Adds a rule and its position in the rules to a trie under the given affix """
+        node = trie
+        for char in affix:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append((order, rule))
+
+    @staticmethod
+    def walk(trie, chars, lexicon, matches):
+        """ Collects the (order, rule) pairs of all affixes of chars along a trie """
+        node = trie
+        for char in chars:
+            node = node.get(char)
+            if node is None:
+                return
+            for order, rule in node.get(None, ()):
+                if rule.lexicon == lexicon:
+                    matches.append((order, rule))
+
+    def match(self, word):
+        """ This function finds every rule that fires for a word, in one pass.
+
+            Args:
+                word (str): Token in lowercase
+
+            Returns:
+                Tuple of (True if the word is in the lexicon, list of matching rules in rule order)
+
+            Example:
+                >>> matcher.match('zweifellos')
+        """
+
+        if word is None:
+            return False, []
+
+        lexicon = word in self.cuewords
+        matches = []
+
+        self.walk(self.prefixes, word, lexicon, matches)
+
+        for skip, trie in self.suffixes.items():
+            if len(word) > skip:
+                self.walk(trie, reversed(word[:len(word) - skip]), lexicon, matches)
+
+        if len(matches) > 1:
+            matches.sort(key=lambda match: match[0])
+
+        return lexicon, [rule for order, rule in matches]
@@ -23,8 +23,10 @@ import codecs
 import os
 import sys
 
-from bs4 import BeautifulSoup
-import lxml
+from artifactCache import cached_call
+from corpusModel import NonTerminal
+from processPool import list_xml_files, map_files
+from sentenceIndex import FRAMES_FLAG, SPLITWORDS_FLAG, load_index
 
 XML_TRAIN_FILES_PATH = '../../res/xml/train/'
 
@@ -43,12 +45,14 @@ NEGATED_TAG_NAME = 'Negated' #CaseSensitive
 FOCUS_TAG_NAME = 'Focus' #CaseSensitive
 SCOPE_TAG_NAME = 'Scope' #CaseSensitive
 
-def cueword_statistics(xml_file_path):
+def cueword_statistics(xml_file_path, stats_path=CUEWORDS_STATS_PATH, workers=1):
     """ This function iterates over xml files and writes various statistics
         about the cuewords, scope, focus and negated targets.
 
         Args:
             xml_file_path (str): Path to input files
+            stats_path (str): Path for output, defaults to CUEWORDS_STATS_PATH
+            workers (int): Number of processes, files are read in parallel if > 1
 
         Returns:
             Written txt file for each file in the input path.
@@ -58,250 +62,272 @@ def cueword_statistics(xml_file_path):
 
     """
 
-    print('Extracting cueword statistics from:', xml_file_path, 'to:', CUEWORDS_STATS_PATH)
+    print('Extracting cueword statistics from:', xml_file_path, 'to:', stats_path)
 
     # Go through all files in xml_file_path directory
-    for file in os.listdir(xml_file_path):
+    jobs = [('statistics', file_statistics, (file, stats_path), [file],
+             [stats_path+os.path.split(file)[-1]+'_stats.txt']) for file in list_xml_files(xml_file_path)]
+    for chapter_output in map_files(cached_call, jobs, workers):
+        print('Cuewords statistics extracted to:', chapter_output)
 
-        # For each file, open, parseXML
-        file = xml_file_path+file
+def file_statistics(file, stats_path=CUEWORDS_STATS_PATH):
+    """ This function writes the cueword statistics of one xml file.
 
-        # Open files only, ignore subdirectories
-        if os.path.isfile(file) and file.lower().endswith('.xml'):
+        Args:
+            file (str): Path to a corpus file in xml format
+            stats_path (str): Path for output, defaults to CUEWORDS_STATS_PATH
+
+        Returns:
+            Path to the written txt file
+
+        Example:
+            >>> file_statistics('../res/xml/train/baskerville_ch4.jr.xml')
+    """
 
-            chapter_input = open(file, 'r', encoding='utf8')
-            chapter_output = open(CUEWORDS_STATS_PATH+os.path.split(file)[-1]+'_stats.txt',
-                                  'w', encoding='utf8')
+    chapter_output = open(stats_path+os.path.split(file)[-1]+'_stats.txt',
+                          'w', encoding='utf8')
 
-            # Try html.parser for ignoring lower and UPPER Tag and attr names
-            chapter_input = BeautifulSoup(chapter_input, 'xml')
+    # Only sentences with splitwords or frames are read, see sentenceIndex.py
+    index = load_index(file)
+    last_focus = [None, None]
+    for position, sentence in index.iter_sentences(index.select(SPLITWORDS_FLAG | FRAMES_FLAG)):
+        write_statistics(sentence, chapter_output, last_focus)
 
-            for sentence in chapter_input.find_all('s'):
-                # Terminals and Semantics
-                #terminals = sentence.find_all('t')
-                semantics = sentence.find('sem')
+    chapter_output.close()
 
-                # If splitwords exist
-                if semantics.find('splitwords'):
-                    splitwords = semantics.find('splitwords')
-                    splitword = splitwords.find_all('splitword')
+    return chapter_output.name
 
-                    # For each splitword
-                    for s_w in splitword:
+def resolve_non_terminals(sentence, idref):
+    """ This function resolves a complex graph to a simple flat list of tokens,
+        from the yields the sentence resolves once for all its nonterminals.
 
-                        # Get reference id
-                        # <splitword idref="x">
-                        splitword_idref = s_w.get('idref')
+        Args:
+            sentence (Sentence): Sentence from corpusModel.py
+            idref (str): Id of a fenode
 
-                        # Get corresponding terminal and its POS tag
-                        # <t id="x" pos="ADJA" word="unerschütterlichen"/>
-                        terminal = sentence.find(id=splitword_idref).get('word')
-                        pos = sentence.find(id=splitword_idref).get('pos')
+        Returns:
+            Words below the nonterminal in sentence order, an empty list for terminals and splitword parts
 
-                        #print(splitword_idref,'\t',terminal,'\t',pos)
-                        chapter_output.write('\n' '=SPLITWORDS=' '\n')
-                        chapter_output.write('%s' '\t' '%s' '\t' '%s' '\n' %
-                                             (splitword_idref, terminal, pos))
+        Example:
+            >>> resolve_non_terminals(sentence, 's9_534')
+            ['mein', 'Freund']
+    """
 
-                        # Find parts of splitword
-                        parts = s_w.find_all('part')
-                        part1 = parts[0].get('id')
-                        part2 = parts[1].get('id')
+    if not isinstance(sentence.get(idref), NonTerminal):
+        return []
+
+    return sentence.yield_words(idref)
+
+def write_statistics(sentence, chapter_output, last_focus):
+    """ This function writes the cueword statistics of one sentence.
+        Sentences without splitwords and frames write nothing.
+
+        Args:
+            sentence (Sentence): Sentence from corpusModel.py
+            chapter_output (file): Open txt file for output
+            last_focus (list): [POS tag, word] of the last focus terminal of the file, updated in place,
+                               a focus on a nonterminal is written with these values
+
+        Returns:
+            Nothing, the statistics are written to chapter_output
+
+        Example:
+            >>> last_focus = [None, None]
+            >>> write_statistics(sentence, chapter_output, last_focus)
+    """
 
-                        for part in parts:
-                            part_word = part.get('word')
-                            part_id = part.get('id')
-                            #print(part_id,'\t',part_word)
+    focus_pos, focus_word = last_focus
+
+    # If splitwords exist
+    if sentence.splitwords:
+        splitword = sentence.splitwords
+
+        # For each splitword
+        for s_w in splitword:
+
+            # Get reference id
+            # <splitword idref="x">
+            splitword_idref = s_w.idref
+
+            # Get corresponding terminal and its POS tag
+            # <t id="x" pos="ADJA" word="unerschütterlichen"/>
+            terminal = sentence.get(splitword_idref).word
+            pos = sentence.get(splitword_idref).pos
+
+            #print(splitword_idref,'\t',terminal,'\t',pos)
+            chapter_output.write('\n' '=SPLITWORDS=' '\n')
+            chapter_output.write('%s' '\t' '%s' '\t' '%s' '\n' %
+                                 (splitword_idref, terminal, pos))
+
+            # Find parts of splitword
+            parts = s_w.parts
+            part1 = parts[0].id
+            part2 = parts[1].id
+
+            for part in parts:
+                part_word = part.word
+                part_id = part.id
+                #print(part_id,'\t',part_word)
+                chapter_output.write('%s' '\t' '%s' '\n'
+                                     % (part_id, part_word))
+
+            # Find corresponding frames
+            frame = sentence.frames
+
+            for frame_tag in frame:
+
+                # skip first letter in case of n|Negation
+                if frame_tag.name == NEGATION_FRAME_NAME:
+
+                    # Find target
+                    target = frame_tag.target
+                    fenode_id = target.fenodes[0]
+
+                    # Check part ID if == target ID
+                    if part1 == fenode_id or part2 == fenode_id or splitword_idref == fenode_id:
+
+                        part_word = sentence.get(fenode_id).word
+                        #print(fenode_id,'\t','target')
+                        chapter_output.write('%s' '\t' '%s' '\n'
+                                             % (fenode_id, 'TARGET'))
+
+
+                        # try and except blocks because of parser lowerUPPER errors
+
+                        #Find Negated
+                        try:
+                            negated = frame_tag.fe(NEGATED_TAG_NAME)
+                            negated_fenode_idref = negated.fenodes[0]
+                        except (AttributeError, IndexError):
+                            negated = ''
+                            negated_fenode_idref = ''
+                        #print(negated_fenode_idref,'\t',negated['name'].lower())
+                        try:
+                            chapter_output.write('%s' '\t' '%s' '\n'
+                                                 % (negated_fenode_idref, negated.name.upper()))
+                        except AttributeError:
+                            chapter_output.write('')
+
+                        #Find Scope
+                        try:
+                            scope = frame_tag.fe(SCOPE_TAG_NAME)
+                            scope_fenode_idref = scope.fenodes[0]
+                        except (AttributeError, IndexError):
+                            scope = ''
+                            scope_fenode_idref = ''
+                        #print(scope_fenode_idref,'\t',scope['name'].lower())
+                        try:
+                            chapter_output.write('%s' '\t' '%s' '\n'
+                                                 % (scope_fenode_idref, scope.name.upper()))
+                        except AttributeError:
+                            chapter_output.write('')
+
+                        #Find Focus
+                        try:
+                            focus = frame_tag.fe(FOCUS_TAG_NAME)
+                            focus_fenode_idref = focus.fenodes[0]
+                        except (AttributeError, IndexError):
+                            focus = ''
+                            focus_fenode_idref = ''
+
+                        #print(focus_fenode_idref,'\t',focus['name'].lower())
+                        try:
                             chapter_output.write('%s' '\t' '%s' '\n'
-                                                 % (part_id, part_word))
-
-                        # Find corresponding frames
-                        frames = semantics.find('frames')
-                        frame = frames.find_all('frame')
-
-                        for frame_tag in frame:
-
-                            # skip first letter in case of n|Negation
-                            if frame_tag['name'] == NEGATION_FRAME_NAME:
-
-                                # Find target
-                                target = frame_tag.find('target')
-                                fenode = target.find('fenode')
-                                fenode_id = fenode.get('idref')
-
-                                # Check part ID if == target ID
-                                if part1 == fenode_id or part2 == fenode_id or splitword_idref == fenode_id:
-
-                                    part_word = sentence.find(id=fenode_id).get('word')
-                                    #print(fenode_id,'\t','target')
-                                    chapter_output.write('%s' '\t' '%s' '\n'
-                                                         % (fenode_id, 'TARGET'))
-
-
-                                    # try and except blocks because of parser lowerUPPER errors
-
-                                    #Find Negated
-                                    try:
-                                        negated = frame_tag.find('fe', {'name' : NEGATED_TAG_NAME})
-                                        negated_fenode_idref = negated.find('fenode').get('idref')
-                                    except AttributeError:
-                                        negated = ''
-                                        negated_fenode_idref = ''
-                                    #print(negated_fenode_idref,'\t',negated['name'].lower())
-                                    try:
-                                        chapter_output.write('%s' '\t' '%s' '\n'
-                                                             % (negated_fenode_idref, negated['name'].upper()))
-                                    except TypeError:
-                                        chapter_output.write('')
-
-                                    #Find Scope
-                                    try:
-                                        scope = frame_tag.find('fe', {'name' : SCOPE_TAG_NAME})
-                                        scope_fenode_idref = scope.find('fenode').get('idref')
-                                    except AttributeError:
-                                        scope = ''
-                                        scope_fenode_idref = ''
-                                    #print(scope_fenode_idref,'\t',scope['name'].lower())
-                                    try:
-                                        chapter_output.write('%s' '\t' '%s' '\n'
-                                                             % (scope_fenode_idref, scope['name'].upper()))
-                                    except TypeError:
-                                        chapter_output.write('')
-
-                                    #Find Focus
-                                    try:
-                                        focus = frame_tag.find('fe', {'name' : FOCUS_TAG_NAME})
-                                        focus_fenode_idref = focus.find('fenode').get('idref')
-                                    except AttributeError:
-                                        focus = ''
-                                        focus_fenode_idref = ''
-
-                                    #print(focus_fenode_idref,'\t',focus['name'].lower())
-                                    try:
-                                        chapter_output.write('%s' '\t' '%s' '\n'
-                                                             % (focus_fenode_idref, focus['name'].upper()))
-                                    except TypeError:
-                                        chapter_output.write('')
-
-                #end if splitwords
-
-                else:
-
-                    # If Frames exist
-                    if semantics.find('frames'):
-
-                        frames = semantics.find('frames')
-                        frame = frames.find_all('frame')
-
-                        chapter_output.write('\n' '=SCOPE/FOCUS=' '\n')
-
-                        for frame_tag in frame:
-
-                            # skip first letter in case of n|Negation
-                            if frame_tag['name'] == NEGATION_FRAME_NAME:
-
-                                #scope_list = []
-
-                                # Find target
-                                target = frame_tag.find('target')
-                                fenode = target.find('fenode')
-                                fenode_id = fenode.get('idref')
-
-                                word = sentence.find(id=fenode_id).get('word')
-                                pos = sentence.find(id=fenode_id).get('pos')
-
-                                chapter_output.write('%s' '\t' '%s' '\t' '%s' '\n' % (fenode_id, word, pos))
-                                chapter_output.write('%s' '\t' '%s' '\n' % (fenode_id, 'TARGET'))
-
-                                #Find Negated
-                                if frame_tag.find('fe', {'name' : NEGATED_TAG_NAME}):
-                                    try:
-                                        negated = frame_tag.find('fe', {'name' : NEGATED_TAG_NAME})
-                                        negated_fenode_idref = negated.find('fenode').get('idref')
-                                        negated_word = sentence.find(id=negated_fenode_idref).get('word')
-                                        negated_pos = sentence.find(id=negated_fenode_idref).get('pos')
-                                    except AttributeError:
-                                        negated = ''
-                                        negated_fenode_idref = ''
-                                        negated_word = ''
-                                        negated_pos = ''
-
-                                    chapter_output.write('%s' '\t' '%s' '\t' '%s' '\t' '%s' '\n'
-                                                         % (negated_fenode_idref, negated['name'].upper(), negated_word, negated_pos))
-
-
-                                # Resolve Terminals if Scope on a complex graph
-                                def resolve_non_terminals(idref):
-                                    """ This function resolves a complex graph to
-                                        a simple flat list of tokens.
-                                    """
-                                    nonterminal = sentence.find(id=idref)
-                                    edges = nonterminal.find_all('edge')
-                                    edge_words = []
-                                    for edge in edges:
-                                        e_id = edge.get('idref')
-                                        if sentence.find(id=e_id).get('word') is not None:
-                                            try:
-                                                edge_word = sentence.find(id=e_id).get('word')
-                                                edge_words.append(edge_word)
-                                            except:
-                                                pass
-                                        if sentence.find(id=e_id).get('word') is None:
-                                            edge_words.append(resolve_non_terminals(e_id))
-
-                                    return edge_words
-
-                                scopelist = []
-
-                                if frame_tag.find('fe', {'name' : SCOPE_TAG_NAME}):
-                                    scope = frame_tag.find('fe', {'name' : SCOPE_TAG_NAME})
-                                    scope_fenode = scope.find_all('fenode')
-                                    for s_f in scope_fenode:
-                                        s_id = s_f.get('idref')
-                                        if sentence.find(id=s_id).get('word') is not None:
-                                            try:
-                                                scope_word = sentence.find(id=s_id).get('word')
-                                                #scope_pos = scope_word.get('pos')
-                                                scopelist.append(scope_word)
-                                            except:
-                                                pass
-                                        if sentence.find(id=s_id).get('word') is None:
-                                            pass
-                                        else:
-                                            pass
-
-                                        chapter_output.write('%s' '\t' '%s' '\t' '%s' '\n'
-                                                             % (s_id, scope['name'].upper(), resolve_non_terminals(s_id)))
-
-                                focuslist = []
-
-
-                                #chapter_output.write(str(scope_list))
-                                #Find Focus
-                                if frame_tag.find('fe', {'name' : FOCUS_TAG_NAME}):
-                                    focus = frame_tag.find('fe', {'name' : FOCUS_TAG_NAME})
-                                    focus_fenode = focus.find_all('fenode')
-                                    for f_f in focus_fenode:
-                                        f_id = f_f.get('idref')
-                                        if sentence.find(id=f_id).get('word') is not None:
-                                            try:
-                                                focus_word = sentence.find(id=f_id).get('word')
-                                                focus_pos = sentence.find(id=f_id).get('pos')
-                                                focuslist.append(focus_word)
-                                            except:
-                                                pass
-                                        if sentence.find(id=f_id).get('word') is None:
-                                            pass
-                                        else:
-                                            pass
-
-                                        chapter_output.write('%s' '\t' '%s' '\t' '%s' '\t' '%s' '\t' '%s' '\n'
-                                                             % (f_id, focus['name'].upper(), focus_pos, focus_word, resolve_non_terminals(f_id)))
-
-
-            chapter_output.close()
-
-        print('Cuewords statistics extracted to:', chapter_output.name)
+                                                 % (focus_fenode_idref, focus.name.upper()))
+                        except AttributeError:
+                            chapter_output.write('')
+
+    #end if splitwords
+
+    else:
+
+        # If Frames exist
+        if sentence.frames:
+
+            frame = sentence.frames
+
+            chapter_output.write('\n' '=SCOPE/FOCUS=' '\n')
+
+            for frame_tag in frame:
+
+                # skip first letter in case of n|Negation
+                if frame_tag.name == NEGATION_FRAME_NAME:
+
+                    #scope_list = []
+
+                    # Find target
+                    target = frame_tag.target
+                    fenode_id = target.fenodes[0]
+
+                    word = sentence.get(fenode_id).word
+                    pos = sentence.get(fenode_id).pos
+
+                    chapter_output.write('%s' '\t' '%s' '\t' '%s' '\n' % (fenode_id, word, pos))
+                    chapter_output.write('%s' '\t' '%s' '\n' % (fenode_id, 'TARGET'))
+
+                    #Find Negated
+                    if frame_tag.fe(NEGATED_TAG_NAME):
+                        try:
+                            negated = frame_tag.fe(NEGATED_TAG_NAME)
+                            negated_fenode_idref = negated.fenodes[0]
+                            negated_word = sentence.get(negated_fenode_idref).word
+                            negated_pos = sentence.get(negated_fenode_idref).pos
+                        except (AttributeError, IndexError):
+                            negated = ''
+                            negated_fenode_idref = ''
+                            negated_word = ''
+                            negated_pos = ''
+
+                        chapter_output.write('%s' '\t' '%s' '\t' '%s' '\t' '%s' '\n'
+                                             % (negated_fenode_idref, negated.name.upper(), negated_word, negated_pos))
+
+
+                    scopelist = []
+
+                    if frame_tag.fe(SCOPE_TAG_NAME):
+                        scope = frame_tag.fe(SCOPE_TAG_NAME)
+                        scope_fenode = scope.fenodes
+                        for s_id in scope_fenode:
+                            if sentence.get(s_id).word is not None:
+                                try:
+                                    scope_word = sentence.get(s_id).word
+                                    #scope_pos = scope_word.get('pos')
+                                    scopelist.append(scope_word)
+                                except:
+                                    pass
+                            if sentence.get(s_id).word is None:
+                                pass
+                            else:
+                                pass
+
+                            chapter_output.write('%s' '\t' '%s' '\t' '%s' '\n'
+                                                 % (s_id, scope.name.upper(), resolve_non_terminals(sentence, s_id)))
+
+                    focuslist = []
+
+
+                    #chapter_output.write(str(scope_list))
+                    #Find Focus
+                    if frame_tag.fe(FOCUS_TAG_NAME):
+                        focus = frame_tag.fe(FOCUS_TAG_NAME)
+                        focus_fenode = focus.fenodes
+                        for f_id in focus_fenode:
+                            if sentence.get(f_id).word is not None:
+                                try:
+                                    focus_word = sentence.get(f_id).word
+                                    focus_pos = sentence.get(f_id).pos
+                                    focuslist.append(focus_word)
+                                except:
+                                    pass
+                            if sentence.get(f_id).word is None:
+                                pass
+                            else:
+                                pass
+
+                            chapter_output.write('%s' '\t' '%s' '\t' '%s' '\t' '%s' '\t' '%s' '\n'
+                                                 % (f_id, focus.name.upper(), focus_pos, focus_word, resolve_non_terminals(sentence, f_id)))
+
+    last_focus[:] = focus_pos, focus_word
 
 if __name__ == "__main__":
     cueword_statistics(XML_TRAIN_FILES_PATH)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+dependency_tree
+
+Short description:
+This module reads the dependency trees of the mate-tools parser from
+.dep.conll files and lays each tree out once per sentence as an Euler tour,
+so every subtree is a slice of one list and a subtree test or span query
+takes constant time.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import io
+import os
+
+from corpusIO import COMPRESSED_EXTENSIONS, open_corpus
+from corpusModel import CONLL_EMPTY, CONLL_ID, conll_terminal_id
+
+# Gold and predicted head and label columns of CoNLL-2009 files, the parser fills the predicted ones
+CONLL_HEAD = 8
+CONLL_PHEAD = 9
+CONLL_DEPREL = 10
+CONLL_PDEPREL = 11
+
+# Dependency files are found next to the other CoNLL-2009 files, as baskerville_ch4.jr.dep.conll
+DEPENDENCY_EXTENSION = '.dep.conll'
+
+
+class DependencyTree:
+    """ The dependency tree of a sentence, with the children of each token
+        and an Euler tour, where the subtree of a token is order[enter[token]:leave[token]].
+
+        Args:
+            heads (list): Position of the head of each token, -1 for the root
+            labels (list): Dependency label of each token
+
+        Example:
+            >>> tree = DependencyTree([1, -1, 1], ['SB', '--', 'NG'])
+            >>> tree.subtree(1), tree.span(1), tree.contains(1, 2)
+            ([1, 0, 2], (0, 2), True)
+    """
+
+    __slots__ = ('heads', 'labels', 'children', 'order', 'enter', 'leave', 'first', 'last')
+
+    def __init__(self, heads, labels):
+        count = len(heads)
+        self.heads = heads
+        self.labels = labels
+
+        # Children in sentence order, heads outside of the sentence count as roots
+        self.children = [[] for position in range(count)]
+        roots = []
+        for position, head in enumerate(heads):
+            if 0 <= head < count and head != position:
+                self.children[head].append(position)
+            else:
+                roots.append(position)
+
+        self.order = []
+        self.enter = [-1] * count
+        self.leave = [-1] * count
+
+        # Leftmost and rightmost position of each subtree
+        self.first = list(range(count))
+        self.last = list(range(count))
+
+        # Tokens on a cycle of a broken parse are not below any root, they start their own tour
+        for root in roots + list(range(count)):
+            if self.enter[root] == -1:
+                self.tour(root)
+
+    def tour(self, root):
+        """ Walks the subtree of root depth first without recursion and records the tour """
+        stack = [(root, False)]
+        while stack:
+            position, done = stack.pop()
+
+            if done:
+                self.leave[position] = len(self.order)
+                head = self.heads[position]
+                if 0 <= head < len(self.heads) and self.enter[head] != -1 and self.leave[head] == -1:
+                    self.first[head] = min(self.first[head], self.first[position])
+                    self.last[head] = max(self.last[head], self.last[position])
+                continue
+
+            self.enter[position] = len(self.order)
+            self.order.append(position)
+            stack.append((position, True))
+            for child in reversed(self.children[position]):
+                if self.enter[child] == -1:
+                    stack.append((child, False))
+
+    def __len__(self):
+        return len(self.heads)
+
+    def head(self, position):
+        """ Returns the position of the head of a token, or -1 for a root """
+        head = self.heads[position]
+        return head if 0 <= head < len(self.heads) and head != position else -1
+
+    def subtree(self, position):
+        """ Returns the positions of the subtree of a token in tour order, the token first """
+        return self.order[self.enter[position]:self.leave[position]]
+
+    def span(self, position):
+        """ Returns the (first, last) positions covered by the subtree of a token """
+        return self.first[position], self.last[position]
+
+    def contains(self, root, position):
+        """ Returns True if position is in the subtree of root """
+        return self.enter[root] <= self.enter[position] < self.leave[root]
+
+
+def dependency_path(file, conll_path):
+    """ Returns the path of the .dep.conll file for a corpus file in xml format """
+    name = os.path.split(file)[-1]
+    for extension in list(COMPRESSED_EXTENSIONS) + ['.xml']:
+        if name.lower().endswith(extension):
+            name = name[:-len(extension)]
+    return os.path.join(conll_path, name + DEPENDENCY_EXTENSION)
+
+
+def read_dependencies(conll_file):
+    """ This function reads the heads and labels of all sentences of a .dep.conll file.
+        Columns of the parser are used where the gold columns are empty.
+
+        Args:
+            conll_file (str): Path to a plain or compressed file in CoNLL-2009 format
+
+        Returns:
+            Dict of sentence id -> (terminal ids, heads, labels), heads are positions
+            within the sentence and -1 for the root, sentence ids as in corpusModel.read_conll()
+
+        Example:
+            >>> dependencies = read_dependencies('../../res/conll/baskerville_ch4.jr.dep.conll')
+            >>> dependencies['s2'][1]
+            (-1, 2, 0)
+    """
+
+    dependencies = {}
+    rows = []
+
+    with io.TextIOWrapper(open_corpus(conll_file, 'rb'), encoding='utf-8') as conll_input:
+        for line in conll_input:
+            line = line.rstrip('\r\n')
+
+            if line.strip() and not line.startswith('#'):
+                rows.append(line.split('\t'))
+                continue
+
+            if rows:
+                add_sentence(dependencies, rows)
+                rows = []
+
+    if rows:
+        add_sentence(dependencies, rows)
+
+    return dependencies
+
+
+def add_sentence(dependencies, rows):
+    """ Adds the heads and labels of the rows of one sentence to dependencies """
+    ids = tuple(conll_terminal_id(row[CONLL_ID]) for row in rows)
+    heads = []
+    labels = []
+    parsed = False
+
+    for row in rows:
+        head = row[CONLL_HEAD] if len(row) > CONLL_HEAD else CONLL_EMPTY
+        if not head.isdigit() and len(row) > CONLL_PHEAD:
+            head = row[CONLL_PHEAD]
+        if head.isdigit():
+            parsed = True
+        heads.append(int(head) - 1 if head.isdigit() else -1)
+
+        label = row[CONLL_DEPREL] if len(row) > CONLL_DEPREL else CONLL_EMPTY
+        if label == CONLL_EMPTY and len(row) > CONLL_PDEPREL:
+            label = row[CONLL_PDEPREL]
+        labels.append(label)
+
+    # Sentences without heads, as written by xmlToConll.py, have no tree
+    if not parsed:
+        return
+
+    # Same sentence id as corpusModel.sentence_from_tokens()
+    s_id = ids[0].rsplit('_', 1)[0] if '_' in ids[0] else None
+    if s_id is not None:
+        dependencies.setdefault(s_id, (ids, tuple(heads), tuple(labels)))
@@ -20,11 +20,24 @@ Version: 1.0
 """
 
 import codecs
+import json
 import os
+import re
 import sys
-
-from bs4 import BeautifulSoup
-import lxml
+from bisect import bisect_left
+from collections import deque
+
+from artifactCache import cached_call
+from corpusIO import is_conll_file
+from corpusModel import iter_conll, read_sentence, sentence_from_tokens
+from cueMatcher import AffixRule, CueMatcher
+from dependencyTree import DependencyTree, dependency_path, read_dependencies
+from negationFrames import SERIALIZERS, SentenceFrames, add_fe, set_target, write_salsa
+from posTags import pos_mask, substring_mask
+from processPool import list_xml_files, map_files
+from removeFrames import remove_file_frames, strip_sentences
+from sentenceIndex import load_index
+from streamCorpus import iter_sentences, rewrite_sentences, rewrite_sentences_sharded
 
 ################
 # PATH SETTINGS
@@ -45,6 +58,9 @@ CUEWORDS_STATS_PATH = '../../res/cuewords/stats/'
 CUEWORDS_FILE = 'baskerville_cuewords.txt'
 CUEWORDS_FILE_POS_TAGGED = 'baskerville_cuewords_postagged.txt'
 
+# Lexicon of detect_tokens() and load_matcher(), found from this file, not from the working directory
+DEFAULT_CUEWORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), CUEWORDS_DATA_PATH, CUEWORDS_FILE)
+
 CONLL_PATH = '../../res/conll/'
 
 TRAIN_RESULTS_FILE = '../../results/results-train.txt'
@@ -92,7 +108,557 @@ NICHTS_FOCUS_RULES = ['NN', 'PIS', 'PPER']
 # Negated ruleset for word 'nicht'
 NICHT_NEGATED_RULES = ['VVPP', 'VVIZU', 'VVFIN', 'VMFIN', 'ART']
 
-def detect_negation(xml_file_path, xml_out, cuewords):
+# Scope resolvers, linear scans from the cueword to clause boundaries,
+# or the subtree of the clause of the cueword in the dependency tree of the parser
+LINEAR_SCOPE = 'linear'
+DEPENDENCY_SCOPE = 'dependency'
+SCOPE_RESOLVERS = [LINEAR_SCOPE, DEPENDENCY_SCOPE]
+
+# Dependency scope: finite verbs and zu-infinitives head their own clause, scope goes up to the first of them
+SCOPE_CLAUSE_HEADS = ['VVFIN', 'VAFIN', 'VMFIN', 'VVIMP', 'VAIMP', 'VVIZU']
+
+# Dependency scope: dependents with these labels start a clause that blocks the scope,
+# conjuncts, coordinations, relative, comparative and parenthetical clauses, repeated elements
+SCOPE_BLOCKING_LABELS = ['CD', 'CJ', 'RC', 'CC', 'PAR', 'RE', 'JU', 'DM']
+
+# Dependency scope: punctuation and the conjunctions that open a clause are never part of the scope
+SCOPE_EXCLUDED = ['$,', '$.', '$(', '$*LRB*', 'KON', 'KOUS']
+
+################
+# COMPILED RULES
+################
+
+# Rulesets above as POS bitmasks, tested with terminal.pos_bit & MASK
+UN_AUS_RULES_POS_MASK = pos_mask(UN_AUS_RULES_POS_TAGS)
+FOCUS_LEMMA_RULES_MASK = pos_mask(FOCUS_LEMMA_RULES)
+SCOPE_START_FENODE_MASK = pos_mask(SCOPE_START_FENODE)
+SCOPE_END_FENODE_MASK = pos_mask(SCOPE_END_FENODE)
+SCOPE_CONTINUE_FENODE_MASK = pos_mask(SCOPE_CONTINUE_FENODE)
+NICHT_RULES_MASK = pos_mask(NICHT_RULES)
+NICHT_PREV_RULES_MASK = pos_mask(NICHT_PREV_RULES)
+NICHTS_RULES_MASK = pos_mask(NICHTS_RULES)
+NICHTS_FOCUS_RULES_MASK = pos_mask(NICHTS_FOCUS_RULES)
+NICHT_NEGATED_RULES_MASK = pos_mask(NICHT_NEGATED_RULES)
+SCOPE_CLAUSE_HEADS_MASK = pos_mask(SCOPE_CLAUSE_HEADS)
+SCOPE_EXCLUDED_MASK = pos_mask(SCOPE_EXCLUDED)
+
+# Scope breaks on every POS tag that is a substring of '$,'
+SCOPE_BREAKING_FENODE_MASK = substring_mask(SCOPE_BREAKING_FENODE[0])
+
+# Single POS tags tested by the rules
+ADJ_MASK = pos_mask(['ADJD', 'ADJA'])
+NN_MASK = pos_mask(['NN'])
+PIAT_MASK = pos_mask(['PIAT'])
+PTKNEG_MASK = pos_mask(['PTKNEG'])
+
+# Sentences annotated together by detect_tokens()
+BATCH_SIZE = 256
+
+# CueMatcher and NegationDetector of the default lexicon, created on first use
+DEFAULT_MATCHER = [None]
+DEFAULT_DETECTOR = [None]
+
+# Word attribute of a terminal, for estimating costs without parsing
+WORD_ATTRIBUTE = re.compile(rb'<t\s[^>]*?\bword="([^"]*)"')
+
+# Splitword and cueword rules for CueMatcher, in the order they are applied.
+# Rules with split create splitwords, the others create a frame for the whole token.
+CUE_RULES = [
+
+    # Cuewords from the lexicon, splitwords first
+
+    # RULE 1: splitwords starting with 'un'
+    # Exceptions 'un' ADJA: unerwarterer, unglücklichen, unerschütterlichen
+    # Exceptions 'un' ADJD: ungewöhnlicher
+    AffixRule('un', True, prefix='un', split=2, pos_mask=UN_AUS_RULES_POS_MASK),
+
+    # RULE 2: splitwords with 'außerordentlich'
+    AffixRule('außerordentlich', True, prefix='außerordentlich', split=5, pos_mask=UN_AUS_RULES_POS_MASK),
+
+    # RULE 3: splitwords ending with 'los'
+    # Exceptions: Some Focus Exceptions: 'zweifellos ADJD', 'ratlos ADJD'
+    AffixRule('los', True, suffix='los', split=-3),
+
+    # RULE 4: splitwords ending with 'lose', or 'frei'
+    AffixRule('lose', True, suffix='lose', split=-4),
+    AffixRule('frei', True, suffix='frei', split=-4),
+
+    # RULE 5: splitwords ending with 'loser|s|n'
+    AffixRule('loser', True, suffix='lose', skip=1, split=-5),
+
+    # Other cuewords, such as: ni-emals, kein-er, kein
+    AffixRule('ni', True, prefix='ni'),
+    AffixRule('kein', True, prefix='kein'),
+    AffixRule('nein', True, prefix='nein'),
+
+    # Guessed cuewords, not in the lexicon
+
+    # Splitwords starting with un- and having ADJD or ADJA pos tags
+    AffixRule('un', False, prefix='un', split=2, pos_mask=ADJ_MASK),
+
+    # Cuewords starting with ni-
+    AffixRule('nie', False, prefix='nie'),
+    AffixRule('nic', False, prefix='nic'),
+]
+
+
+class ClauseIndex:
+    """ Clause boundaries and rule matches of the terminals of a sentence, computed once
+        per sentence and shared by all its cuewords, so finding scope, focus and negated
+        takes constant time per cueword plus the length of the scope.
+
+        Args:
+            terminals (list): Terminals of a sentence, see corpusModel.py
+
+        Example:
+            >>> clauses = ClauseIndex(sentence.terminals)
+            >>> clauses.scope(4)
+            [3, 2, 5, 6]
+    """
+
+    __slots__ = ('terminals', 'scope_starts', 'scope_ends', 'skipped', 'matches')
+
+    def __init__(self, terminals):
+        self.terminals = terminals
+        count = len(terminals)
+
+        # First position of the scope left of each position, after the last SCOPE_START_FENODE
+        self.scope_starts = [0] * count
+        start = 0
+        for position, terminal in enumerate(terminals):
+            self.scope_starts[position] = start
+            if terminal.pos_bit & SCOPE_START_FENODE_MASK:
+                start = position + 1
+
+        # Position that ends the scope right of each position, and breaking tokens
+        # that are left out of the scope because a SCOPE_CONTINUE_FENODE follows them
+        self.scope_ends = [count] * count
+        self.skipped = [False] * count
+        end = count
+        for position in range(count - 1, -1, -1):
+            self.scope_ends[position] = end
+            terminal = terminals[position]
+            if terminal.pos_bit & SCOPE_END_FENODE_MASK or terminal.lemma in SCOPE_END_LEMMA:
+                end = position
+            elif terminal.pos_bit & SCOPE_BREAKING_FENODE_MASK:
+                if position + 1 < count and terminals[position + 1].pos_bit & SCOPE_CONTINUE_FENODE_MASK:
+                    self.skipped[position] = True
+                else:
+                    end = position
+
+        # POS mask -> (next, previous) positions of matching terminals, filled on first use
+        self.matches = {}
+
+    def scope(self, position):
+        """ Returns the scope positions of a cueword, left of it from near to far, then right of it """
+        left = range(position - 1, self.scope_starts[position] - 1, -1)
+        right = [n_s for n_s in range(position + 1, self.scope_ends[position]) if not self.skipped[n_s]]
+        return list(left) + right
+
+    def match_table(self, mask):
+        """ Returns the (next, previous) match arrays for a POS mask, -1 where nothing matches """
+        table = self.matches.get(mask)
+        if table is None:
+            count = len(self.terminals)
+            following = [-1] * count
+            preceding = [-1] * count
+
+            match = -1
+            for position in range(count - 1, -1, -1):
+                following[position] = match
+                if self.terminals[position].pos_bit & mask:
+                    match = position
+
+            match = -1
+            for position in range(count):
+                preceding[position] = match
+                if self.terminals[position].pos_bit & mask:
+                    match = position
+
+            table = self.matches[mask] = (following, preceding)
+        return table
+
+    def next_match(self, position, mask):
+        """ Returns the first position right of position with a POS tag in mask, or -1 """
+        return self.match_table(mask)[0][position]
+
+    def previous_match(self, position, mask):
+        """ Returns the first position left of position with a POS tag in mask, or -1 """
+        return self.match_table(mask)[1][position]
+
+
+class DependencyScope:
+    """ Scope of the cuewords of a sentence in its dependency tree, see dependencyTree.py.
+        The scope of a cueword is the clause it belongs to: the subtree of the first finite verb
+        above it, without clauses below that verb and without SCOPE_EXCLUDED tokens.
+        A cueword that starts a clause itself, such as a discourse marker 'Nein',
+        only scopes over its own dependents. Each token is assigned
+        to its clause once per sentence, so the scope is found from one subtree slice.
+        Focus and negated are looked for within the scope, with the same rules as ClauseIndex.
+
+        Args:
+            terminals (list): Terminals of a sentence, see corpusModel.py
+            tree (DependencyTree): Dependency tree of the terminals
+
+        Example:
+            >>> # Er sagt , dass er nicht kommt .
+            >>> tree = DependencyTree([1, -1, 1, 6, 6, 6, 1, 1], ['SB', '--', 'PUNC', 'CP', 'SB', 'NG', 'OC', 'PUNC'])
+            >>> clauses = DependencyScope(sentence.terminals, tree)
+            >>> clauses.scope(5)
+            [4, 6]
+    """
+
+    __slots__ = ('terminals', 'tree', 'clauses', 'scopes')
+
+    def __init__(self, terminals, tree):
+        self.terminals = terminals
+        self.tree = tree
+
+        # Head of the clause of each token, tokens that start a clause head their own,
+        # heads come before their dependents in the Euler tour
+        self.clauses = list(range(len(terminals)))
+        for position in tree.order:
+            head = tree.head(position)
+            if head != -1 and not self.starts_clause(position):
+                self.clauses[position] = self.clauses[head]
+
+        # Cueword position -> sorted scope positions, filled on first use
+        self.scopes = {}
+
+    def starts_clause(self, position):
+        """ Returns True for finite verbs and for dependents with a SCOPE_BLOCKING_LABELS label """
+        return bool(self.terminals[position].pos_bit & SCOPE_CLAUSE_HEADS_MASK) or \
+            self.tree.labels[position] in SCOPE_BLOCKING_LABELS
+
+    def scope_positions(self, position):
+        """ Returns the scope positions of a cueword in sentence order """
+        positions = self.scopes.get(position)
+        if positions is None:
+            clause = self.clauses[position]
+            positions = sorted(member for member in self.tree.subtree(clause)
+                               if member != position and self.clauses[member] == clause
+                               and not self.terminals[member].pos_bit & SCOPE_EXCLUDED_MASK)
+            self.scopes[position] = positions
+        return positions
+
+    def scope(self, position):
+        """ Returns the scope positions of a cueword, left of it from near to far, then right of it """
+        positions = self.scope_positions(position)
+        split = bisect_left(positions, position)
+        return positions[split - 1::-1] + positions[split:] if split else positions
+
+    def next_match(self, position, mask):
+        """ Returns the first scope position right of position with a POS tag in mask, or -1 """
+        positions = self.scope_positions(position)
+        for member in positions[bisect_left(positions, position):]:
+            if self.terminals[member].pos_bit & mask:
+                return member
+        return -1
+
+    def previous_match(self, position, mask):
+        """ Returns the first scope position left of position with a POS tag in mask, or -1 """
+        positions = self.scope_positions(position)
+        for member in reversed(positions[:bisect_left(positions, position)]):
+            if self.terminals[member].pos_bit & mask:
+                return member
+        return -1
+
+
+def read_cuewords(cuewords_file):
+    """ This function reads a cuewords file, one word per line.
+
+        Args:
+            cuewords_file (str): Path to the cuewords file created with the extract_cuewords.py module
+
+        Returns:
+            Set of cuewords
+
+        Example:
+            >>> read_cuewords('../../res/cuewords/baskerville_cuewords.txt')
+    """
+
+    with open(cuewords_file, 'r', encoding='utf8') as cuewords:
+        return {word.strip() for word in cuewords}
+
+
+class NegationDetector:
+    """ The splitword and cueword rules with a compiled lexicon.
+        The detector is not changed by detection, all state of a call is passed
+        explicitly, so one instance can be shared by many threads at once.
+
+        Args:
+            cuewords: A set of cuewords, the path to a cuewords file or a CueMatcher,
+                      None loads the default lexicon, see load_matcher()
+            rules (list): AffixRule objects, in the order they are applied, defaults to CUE_RULES,
+                          they are ignored if cuewords is a CueMatcher
+            scope (str): Scope resolver from SCOPE_RESOLVERS, LINEAR_SCOPE uses ClauseIndex,
+                         DEPENDENCY_SCOPE uses DependencyScope for sentences with a dependency tree
+            dependencies (dict): Sentence id -> (terminal ids, heads, labels) from read_dependencies(),
+                                 sentences that are missing or have other terminals use ClauseIndex
+
+        Example:
+            >>> detector = NegationDetector()
+            >>> frames = detector.detect(sentence)
+            >>> [frame.id for frame in frames.frames]
+            ['s12_f1']
+    """
+
+    __slots__ = ('matcher', 'scope', 'dependencies')
+
+    def __init__(self, cuewords=None, rules=CUE_RULES, scope=LINEAR_SCOPE, dependencies=None):
+        if scope not in SCOPE_RESOLVERS:
+            raise ValueError('Unknown scope: ' + str(scope) + ', scopes are: ' + ', '.join(SCOPE_RESOLVERS))
+
+        if isinstance(cuewords, CueMatcher) or rules is CUE_RULES:
+            matcher = load_matcher(cuewords)
+        else:
+            if cuewords is None:
+                cuewords = DEFAULT_CUEWORDS_FILE
+            if isinstance(cuewords, str):
+                cuewords = read_cuewords(cuewords)
+            matcher = CueMatcher(cuewords, rules)
+        object.__setattr__(self, 'matcher', matcher)
+        object.__setattr__(self, 'scope', scope)
+        object.__setattr__(self, 'dependencies', dependencies if scope == DEPENDENCY_SCOPE else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('NegationDetector is immutable')
+
+    def __reduce__(self):
+        return NegationDetector, (self.matcher, CUE_RULES, self.scope, self.dependencies)
+
+    def detect_sentences(self, sentences):
+        """ This function runs the rules on a stream of Sentence objects.
+            Cueword lookups are shared by the sentences of one call.
+
+            Args:
+                sentences (iterable): Sentence objects, see corpusModel.py
+
+            Returns:
+                Generator of (Sentence, SentenceFrames) tuples
+        """
+
+        # Word -> matching rules, words repeat a lot within a text
+        word_rules = {}
+
+        for sentence in sentences:
+            yield sentence, self.detect(sentence, word_rules)
+
+    def detect(self, sentence, word_rules=None):
+        """ This function runs the rules on a sentence.
+
+            Args:
+                sentence (Sentence): See corpusModel.py, it is not changed
+                word_rules (dict): Cache of word -> matching rules, owned by the caller
+
+            Returns:
+                SentenceFrames with the new splitwords and frames, see negationFrames.py
+        """
+
+        frames = SentenceFrames(sentence, NEGATION_FRAME_NAME)
+
+        # Clause boundaries are found for the first cueword and shared by the others
+        clauses = None
+
+        for terminal in sentence.terminals:
+
+            # Lexicon lookup and all affix rules in one pass
+            rules = word_rules.get(terminal.lower) if word_rules is not None else None
+            if rules is None:
+                _, rules = self.matcher.match(terminal.lower)
+                if word_rules is not None:
+                    word_rules[terminal.lower] = rules
+
+            for rule in rules:
+                if rule.pos_mask is None or terminal.pos_bit & rule.pos_mask:
+                    if rule.split is None and clauses is None:
+                        clauses = self.clause_index(sentence)
+                    self.apply_rule(rule, sentence, terminal, frames, clauses)
+
+        return frames
+
+    def clause_index(self, sentence):
+        """ Returns the DependencyScope of a sentence if it has a matching dependency tree, else its ClauseIndex """
+        if self.dependencies is not None:
+            dependencies = self.dependencies.get(sentence.id)
+            if dependencies is not None:
+                ids, heads, labels = dependencies
+                if len(ids) == len(sentence.terminals) and \
+                        all(t_id == terminal.id for t_id, terminal in zip(ids, sentence.terminals)):
+                    return DependencyScope(sentence.terminals, DependencyTree(heads, labels))
+        return ClauseIndex(sentence.terminals)
+
+    def apply_rule(self, rule, sentence, terminal, frames, clauses):
+        """ This function annotates a token for a rule from CUE_RULES.
+            Splitword rules split the token into the affix, which becomes the target,
+            and the rest, which becomes focus, negated and scope.
+            Other rules mark the whole token and look for focus and scope around it.
+
+            Args:
+                rule (AffixRule): The rule that fired
+                sentence (Sentence): The sentence of the token
+                terminal (Terminal): The token
+                frames (SentenceFrames): New frames of the sentence
+                clauses (ClauseIndex): Clause boundaries of the sentence, or its DependencyScope,
+                                       None for splitword rules
+        """
+
+        t_word = terminal.lower
+
+        if rule.split is not None:
+            wordpart_1, wordpart_2 = rule.parts(t_word)
+            frames.add_splitword(terminal.id, wordpart_1, wordpart_2)
+            frame = frames.add_frame(NEGATION_FRAME_NAME)
+            self.create_splitword_target(frames, frame, terminal, rule.target(t_word))
+            self.create_splitword_fe(frames, frame, terminal, FOCUS_TAG_NAME, 1, rule.rest(t_word))
+            self.create_splitword_fe(frames, frame, terminal, NEGATED_TAG_NAME, 2, rule.rest(t_word))
+            self.create_splitword_fe(frames, frame, terminal, SCOPE_TAG_NAME, 3, rule.rest(t_word))
+
+        else:
+            self.create_target_focus_scope(sentence, terminal, frames.add_frame(NEGATION_FRAME_NAME), clauses)
+
+    @staticmethod
+    def create_splitword_target(frames, frame, terminal, word_part):
+        """
+        Function for creating a splitword target.
+
+        Args:
+            frames (SentenceFrames): New frames of the sentence, with the splitword
+            frame (Frame): The new Negation frame
+            terminal (Terminal): The negated splitword
+            word_part (str): Target part of the negated splitword
+
+        Returns:
+            Target with one fenode, written as
+            <target>
+                <fenode idref="SPLITWORDPART-ID" is_split="yes"/>
+            </target>
+
+        Example:
+            create_splitword_target(frames, frame, terminal, 'los')
+        """
+
+        return set_target(frame, frames.part_id(terminal.id, word_part))
+
+    @staticmethod
+    def create_splitword_fe(frames, frame, terminal, name, number, word_part):
+        """
+        Function for creating the focus, negated or scope part of a splitword.
+
+        Args:
+            frames (SentenceFrames): New frames of the sentence, with the splitword
+            frame (Frame): The new Negation frame
+            terminal (Terminal): The negated splitword
+            name (str): FOCUS_TAG_NAME, NEGATED_TAG_NAME or SCOPE_TAG_NAME
+            number (int): Number of the frame element, 1 for focus, 2 for negated, 3 for scope
+            word_part (str): The part of the splitword that is not the cueword
+
+        Returns:
+            Frame element with one fenode, written as
+            <fe id="SENTENCE-ID_FE-ID" name="Focus">
+                <fenode idref="SPLITWORDPART-ID" is_split="yes"/>
+            </fe>
+
+        Example:
+            create_splitword_fe(frames, frame, terminal, FOCUS_TAG_NAME, 1, 'zweifel')
+        """
+
+        frame_element = add_fe(frame, name, number)
+        frame_element.fenodes.append(frames.part_id(terminal.id, word_part))
+        return frame_element
+
+    @staticmethod
+    def create_target_focus_scope(sentence, terminal, frame, clauses):
+        """
+        Function for creating target focus and scope, for other cuewords.
+
+        Args:
+            sentence (Sentence): The sentence of the cueword
+            terminal (Terminal): The cueword
+            frame (Frame): The new Negation frame
+            clauses (ClauseIndex): Clause boundaries of the sentence, or its DependencyScope
+
+        Returns:
+            Full frame, written as
+            <frame id="SENTENCE-ID_FRAME-ID" name="Negation">
+              <target>
+                <fenode idref="WORD-ID"/>
+              </target>
+              <fe id="67_f1_e1" name="Focus">
+                <fenode idref="WORD-ID"/>
+              </fe>
+              <fe id="67_f1_e1" name="Negated">
+                <fenode idref="WORD-ID"/>
+              </fe>
+              <fe id="67_f1_e3" name="Scope">
+                <fenode idref="WORD-ID"/>
+              </fe>
+           </frame>
+
+        Example:
+            create_target_focus_scope(sentence, terminal, frame, ClauseIndex(sentence.terminals))
+        """
+
+        t_word = terminal.lower
+        t_pos = terminal.pos_bit
+        position = terminal.position
+        terminals = sentence.terminals
+
+        # Run Target Function and mark cueword
+        set_target(frame, terminal.id)
+
+        focus = add_fe(frame, FOCUS_TAG_NAME, 1)
+        negated = add_fe(frame, NEGATED_TAG_NAME, 2)
+        scope = add_fe(frame, SCOPE_TAG_NAME, 3)
+
+        # Mark scope left of the cueword up to SCOPE_START_FENODE, and right of it
+        # up to SCOPE_END_FENODE, SCOPE_END_LEMMA or a breaking token without a continuation
+        scope.fenodes.extend(terminals[s_p].id for s_p in clauses.scope(position))
+
+        # Find negated for word nicht right of the cueword, else left of it
+        if t_word == 'nicht':
+            n_p = clauses.next_match(position, NICHT_NEGATED_RULES_MASK)
+            if n_p == -1:
+                n_p = clauses.previous_match(position, NICHT_NEGATED_RULES_MASK)
+            if n_p != -1:
+                negated.fenodes.append(terminals[n_p].id)
+
+        # Find focus for terminals right of the cueword
+        # RULE 1: nicht PTKNEG, RULE 2: kein PIAT, others on FOCUS_LEMMA_RULES
+        focus_p = -1
+        if t_word != 'nein':
+            focus_mask = FOCUS_LEMMA_RULES_MASK
+            if (t_word == 'nicht' and t_pos & PTKNEG_MASK) or (t_word[:4] == 'kein' and t_pos & PIAT_MASK):
+                focus_mask |= NICHT_RULES_MASK
+            focus_p = clauses.next_match(position, focus_mask)
+
+        # Find focus for 'nichts' right of the cueword
+        if focus_p == -1 and t_word == 'nichts' and t_pos & NICHTS_RULES_MASK:
+            focus_p = clauses.next_match(position, NICHTS_FOCUS_RULES_MASK)
+
+        # Find focus for terminals left of the cueword
+        if focus_p == -1 and t_word == 'nicht' and position > 0:
+
+            # RULE 1: nicht PTKNEG for previous siblings
+            if t_pos & PTKNEG_MASK:
+                focus_p = clauses.previous_match(position, NICHT_PREV_RULES_MASK)
+
+            # Otherwise nicht is its own focus
+            else:
+                focus_p = position
+
+        if focus_p != -1:
+            focus.fenodes.append(terminals[focus_p].id)
+
+        # The cueword comes first if 'nichts' is a noun
+        if t_word == 'nichts' and t_pos & NN_MASK:
+            focus.fenodes.insert(0, terminal.id)
+
+        return frame
+
+
+def detect_negation(xml_file_path, xml_out, cuewords, cuewords_path=CUEWORDS_DATA_PATH, workers=1, shard=False,
+                    strip=False, stripped_out=None, scope=LINEAR_SCOPE, conll_path=CONLL_PATH):
     """ This function detects negated sentences and split words
         from a token annotated corpus file in xml format
         and annotates them with negation, scope and focus frames.
@@ -101,6 +667,16 @@ def detect_negation(xml_file_path, xml_out, cuewords):
             xml (str): Path to a corpus file in xml format without frame annotations
             xml_out (str):  Path to an empty file with .xml extension
             cuewords (str): Path to the cuewords file created with the extract_cuewords.py module
+            cuewords_path (str): Path to the cuewords file, defaults to CUEWORDS_DATA_PATH
+            workers (int): Number of processes, files are tagged in parallel if > 1
+            shard (bool): Split each file into shards of sentences and tag the shards in parallel,
+                          for inputs where one big file dominates
+            strip (bool): Read gold files and remove their splitwords and Negation frames in memory
+                          before tagging, instead of reading files written by remove_frames()
+            stripped_out (str): Path for the stripped files if strip is set, for debugging, None writes none
+            scope (str): Scope resolver from SCOPE_RESOLVERS, DEPENDENCY_SCOPE reads the dependency trees
+                         of each file from conll_path, files without a .dep.conll file use LINEAR_SCOPE
+            conll_path (str): Path to the .dep.conll files of the dependency parser, defaults to CONLL_PATH
 
         Returns:
             The written file with with frame annotations
@@ -111,580 +687,425 @@ def detect_negation(xml_file_path, xml_out, cuewords):
             '../../res/cuewords/baskerville_cuewords.txt')
     """
 
-    # Open txt file with cuewords
-    cuewords = open(CUEWORDS_DATA_PATH+cuewords, 'r', encoding='utf8')
-
-    # Empty list for collecting
-    cueword_list = []
+    if strip and stripped_out is not None and not os.path.exists(stripped_out):
+        os.makedirs(stripped_out)
 
-    # Read words from file into list
-    for word in cuewords.readlines():
-        word = word.strip()
-        cueword_list.insert(0, word)
+    # Compile the cuewords and rules once for all files
+    matcher = CueMatcher(read_cuewords(cuewords_path+cuewords), CUE_RULES)
 
     # Go through all files in xml_file_path directory
-    for file in os.listdir(xml_file_path):
-
-        # Set path to file
-        file = xml_file_path+file
-
-        # Open files only, ignore subdirectories
-        if os.path.isfile(file) and file.lower().endswith('.xml'):
-
-            # Open Files
-            chapter_input = open(file, 'r', encoding='utf8')
-
-            # Create Same Filename in Tagged Folder
-            chapter_output = open(xml_out+os.path.split(file)[-1], 'w', encoding='utf8')
-
-            # Console log
-            print('Writing Negation frames from: ' + chapter_input.name + ' to output file: ' + chapter_output.name)
-
-            # Process xml input file with BeautifulSoup
-            chapter_input = BeautifulSoup(chapter_input, 'xml')
-
-            def detect_splitwords():
-                """ This function is a collection of functions for detecting splitwords only,
-                    such as: un-erwarterer, außer-ordentlich, zweifel-los etc.
-                    It is called from within the main loop and it consists of 5 basic rules.
-                """
-
-                # SPLITWORD RULES
-
-                # RULE 1: splitwords starting with 'un'
-                # Exceptions 'un' ADJA: unerwarterer, unglücklichen, unerschütterlichen
-                # Exceptions 'un' ADJD: ungewöhnlicher
-                if t_word[:2] == 'un' and (t_pos in UN_AUS_RULES_POS_TAGS):
-                    create_splitword_tags(t_word[:2], t_word[2:])
-                    create_negation_frame()
-                    create_splitword_target(t_word[:2])
-                    create_splitword_focus(t_word[2:])
-                    create_splitword_negated(t_word[2:])
-                    create_splitword_scope(t_word[2:])
-
-                # RULE 2: splitwords with 'außerordentlich'
-                if t_word[:15] == 'außerordentlich' and (t_pos in UN_AUS_RULES_POS_TAGS):
-                    create_splitword_tags(t_word[:5], t_word[5:])
-                    create_negation_frame()
-                    create_splitword_target(t_word[:5])
-                    create_splitword_focus(t_word[5:])
-                    create_splitword_negated(t_word[5:])
-                    create_splitword_scope(t_word[5:])
-
-                # RULE 3: splitwords ending with 'los'
-                # Exceptions: Some Focus Exceptions: 'zweifellos ADJD', 'ratlos ADJD'
-                if t_word[-3:] == 'los':
-                    create_splitword_tags(t_word[:-3], t_word[-3:])
-                    create_negation_frame()
-                    create_splitword_target(t_word[-3:])
-                    create_splitword_focus(t_word[:-3])
-                    create_splitword_negated(t_word[:-3])
-                    create_splitword_scope(t_word[:-3])
-
-                # RULE 4: splitwords ending with 'lose', or 'frei'
-                if t_word[-4:] == 'lose' or t_word[-4:] == 'frei':
-                    create_splitword_tags(t_word[:-4], t_word[-4:])
-                    create_negation_frame()
-                    create_splitword_target(t_word[-4:])
-                    create_splitword_focus(t_word[:-4])
-                    create_splitword_negated(t_word[:-4])
-                    create_splitword_scope(t_word[:-4])
-
-                # RULE 5: splitwords ending with 'loser|s|n'
-                if t_word[-5:-1] == 'lose':
-                    create_splitword_tags(t_word[:-5], t_word[-5:])
-                    create_negation_frame()
-                    create_splitword_target(t_word[-5:])
-                    create_splitword_focus(t_word[:-5])
-                    create_splitword_negated(t_word[:-5])
-                    create_splitword_scope(t_word[:-5])
-
-            def guess_splitwords():
-                """ This function tries to guess splitwords starting with un-
-                    and having ADJD or ADJA pos tags
-                """
-
-                if t_word[:2] == 'un' and (t_pos == 'ADJD' or t_pos == 'ADJA'):
-                    create_splitword_tags(t_word[:2], t_word[2:])
-                    create_negation_frame()
-                    create_splitword_target(t_word[:2])
-                    create_splitword_focus(t_word[2:])
-                    create_splitword_negated(t_word[2:])
-                    create_splitword_scope(t_word[2:])
-
-
-            def detect_cuewords():
-                """ Collection of functions for detecting other cuewords,
-                    such as: ni-emals, kein-er, kein, etc.
-                    It is called from within the main loop and it consists of multiple rules.
-                """
-
-                # cuewords
-
-                if t_word[:2] == 'ni':
-                    create_negation_frame()
-                    create_target_focus_scope()
-
-                if t_word[:4] == 'kein':
-                    create_negation_frame()
-                    create_target_focus_scope()
-
-                if t_word[:4] == 'nein':
-                    create_negation_frame()
-                    create_target_focus_scope()
-
-
-            def guess_cuewords():
-                """ This function tries to guess splitwords starting with
-                    ni-
-                """
-
-                if t_word[:3] == 'nie':
-                    create_negation_frame()
-                    create_target_focus_scope()
-
-                if t_word[:3] == 'nic':
-                    create_negation_frame()
-                    create_target_focus_scope()
-
-
-            def create_splitword_tags(wordpart_1, wordpart_2):
-                """
-                Function for creating splitword tags.
-
-                Args:
-                    wordpart_1 (str): First part of the splitword
-                    wordpart_2 (str): Second part of the splitword
-
-                Returns:
-                    xml tags
-                    <splitword idref="TOKEN-ID">
-                        <part id="TOKEN-ID_s0" word="wordpart_1"/>
-                        <part id="TOKEN-ID_s1" word="wordpart_2"/>
-                    </splitword>
-
-                Example:
-                    create_splitword_tags('zweifel','los')
-                    or
-                    word = "zweifellos"
-                    create_splitword_tags(word[:-3], [:-3])
-                """
-
-                # Create new <splitwords> tag
-                if not sentence.sem.find('splitwords'):
-                    splitwords = chapter_input.new_tag('splitwords')
-                    sentence.sem.insert(2, splitwords)
-                else:
-                    splitwords = sentence.sem.find('splitwords')
+    if shard:
+        for file in list_xml_files(xml_file_path):
+            cached_call(*detection_job(file, xml_out, matcher, workers, strip, stripped_out, scope, conll_path))
+
+    else:
+        jobs = [detection_job(file, xml_out, matcher, 1, strip, stripped_out, scope, conll_path)
+                for file in list_xml_files(xml_file_path)]
+        for chapter_output in map_files(cached_call, jobs, workers):
+            pass
+
+
+def detection_job(file, xml_out, matcher, workers=1, strip=False, stripped_out=None, scope=LINEAR_SCOPE,
+                  conll_path=CONLL_PATH):
+    """ Returns the arguments of cached_call() for detect_file_negation(), see artifactCache.py.
+        The result depends on the input file, its dependency trees for DEPENDENCY_SCOPE,
+        the cuewords and the code, not on the number of workers.
+    """
+    inputs = [file]
+    if scope == DEPENDENCY_SCOPE and os.path.isfile(dependency_path(file, conll_path)):
+        inputs.append(dependency_path(file, conll_path))
+    outputs = [xml_out+os.path.split(file)[-1]]
+    if strip and stripped_out is not None:
+        outputs.append(stripped_out+os.path.split(file)[-1])
+    return ('detect', detect_file_negation, (file, xml_out, matcher, workers, strip, stripped_out, scope, conll_path),
+            inputs, outputs, [sorted(matcher.cuewords), strip, scope], ['removeFrames', 'negationFrames', 'dependencyTree'])
 
-                # Create new <splitword> tag within <splitwords>
-                splitword = chapter_input.new_tag('splitword', idref=t_id)
-                splitwords.append(splitword)
 
-                # Create sub tags <part> 1
-                part1 = chapter_input.new_tag('part', word=wordpart_1, id=t_id+'_s0')
-                splitword.insert(0, part1)
+def detect_file_negation(file, xml_out, cuewords, workers=1, strip=False, stripped_out=None, scope=LINEAR_SCOPE,
+                         conll_path=CONLL_PATH):
+    """ This function annotates one corpus file in xml format with negation, scope and focus frames.
 
-                # Create sub tags <part> 2
-                part2 = chapter_input.new_tag('part', word=wordpart_2, id=t_id+'_s1')
-                splitword.insert(1, part2)
+        Args:
+            file (str): Path to a corpus file in xml format without frame annotations
+            xml_out (str): Path for output
+            cuewords: Cuewords read with read_cuewords(), a CueMatcher or a NegationDetector
+            workers (int): Number of processes, shards of the file are tagged in parallel if > 1
+            strip (bool): file is a gold file, its splitwords and Negation frames are removed in memory
+            stripped_out (str): Path for the stripped file if strip is set, for debugging, None writes none
+            scope (str): Scope resolver from SCOPE_RESOLVERS, see file_detector()
+            conll_path (str): Path to the .dep.conll files for DEPENDENCY_SCOPE
 
+        Returns:
+            Path to the written file
 
-            def create_negation_frame():
-                """
-                Function for creating a Negation frame.
-                It looks for a <frames> tag within <sem> and creates a new one if not found.
-                Within it creates a <frame name="Negation"> tag.
-                Each new frame is set on the last index so other functions can find it easily.
+        Example:
+            >>> detect_file_negation('../../res/xml/train/output/baskerville_ch4.jr.xml',
+            '../../res/xml/train/output/tagged/', ['nicht', 'kein'])
+    """
 
-                Returns:
-                    xml tag
-                    <frame id="SENTENCE-ID_FRAME-ID" name="Negation">
-                """
+    # Create Same Filename in Tagged Folder
+    chapter_output = xml_out+os.path.split(file)[-1]
 
+    # The stripped file is only a debug artifact, tagging does not read it
+    if strip and stripped_out is not None:
+        remove_file_frames(file, stripped_out)
+
+    # Console log
+    print('Writing Negation frames from: ' + file + ' to output file: ' + chapter_output)
+
+    stage = strip_and_tag_sentences if strip else tag_sentences
+    detector = file_detector(file, cuewords, scope, conll_path)
+
+    if workers > 1:
+        # Shards of sentences balanced by estimated cost, frame ids only depend on the sentence
+        rewrite_sentences_sharded(file, chapter_output, lambda data: sentence_cost(data, detector.matcher),
+                                  workers, stage, detector)
+
+    else:
+        # Stream sentences through the detector, one sentence at a time
+        rewrite_sentences(file, chapter_output, stage, detector)
+
+    print('Done!')
+
+    return chapter_output
 
-                # Create <frames>
-                if not sentence.sem.find('frames'):
-                    frames = chapter_input.new_tag('frames')
-                    sentence.sem.insert(3, frames)
-                else:
-                    frames = sentence.sem.find('frames')
 
-                frame = chapter_input.new_tag('frame')
-                frame['name'] = NEGATION_FRAME_NAME
-                frames.append(frame)
+def file_detector(file, cuewords, scope=LINEAR_SCOPE, conll_path=CONLL_PATH):
+    """ This function returns the NegationDetector for one corpus file.
 
-                def count_frames():
-                    """ Returns the count of all Negation Frames """
-                    frames = sentence.sem.frames.find_all('frame', {'name' : NEGATION_FRAME_NAME})
-                    frame_count = []
-                    for f_r in frames:
-                        frame_count.append(f_r)
-                    return len(frame_count)
+        Args:
+            file (str): Path to a corpus file in xml or CoNLL-2009 format
+            cuewords: Cuewords read with read_cuewords(), a CueMatcher or a NegationDetector
+            scope (str): Scope resolver from SCOPE_RESOLVERS
+            conll_path (str): Path to the .dep.conll files for DEPENDENCY_SCOPE, .dep.conll files are their own
+
+        Returns:
+            NegationDetector, with the dependency trees of the file for DEPENDENCY_SCOPE
+
+        Example:
+            >>> file_detector('../../res/xml/train/output/baskerville_ch4.jr.xml', ['nicht', 'kein'], DEPENDENCY_SCOPE)
+    """
+
+    if scope == LINEAR_SCOPE:
+        return load_detector(cuewords)
+
+    dependency_file = file if is_conll_file(file) else dependency_path(file, conll_path)
+    if not os.path.isfile(dependency_file):
+        print('No dependency trees for: ' + file + ', using ' + LINEAR_SCOPE + ' scope')
+        return load_detector(cuewords)
+
+    return NegationDetector(load_matcher(cuewords), scope=scope, dependencies=read_dependencies(dependency_file))
+
+
+def detect_sentence(file, sentence_id, cuewords):
+    """ This function annotates a single sentence of a corpus file with negation, scope and focus frames.
+        The sentence is read from its byte offset in the sentence index, see sentenceIndex.py,
+        so the rest of the file is never parsed.
+
+        Args:
+            file (str): Path to a corpus file in xml format without frame annotations
+            sentence_id (str): Id of the sentence, or its ordinal as int
+            cuewords: Cuewords read with read_cuewords(), a CueMatcher or a NegationDetector
+
+        Returns:
+            The annotated lxml <s> element
+
+        Example:
+            >>> detect_sentence('../../res/xml/train/output/baskerville_ch4.jr.xml', 's12', ['nicht', 'kein'])
+    """
+
+    sentence = load_index(file).element(sentence_id)
+
+    for sentence in tag_sentences([sentence], cuewords):
+        return sentence
+
+
+def sentence_cost(data, matcher):
+    """ This function estimates how long tagging a sentence takes, without parsing it.
+        Every token is read once and every candidate cue scans the sentence
+        for scope and focus, so the cost is tokens * (1 + candidate cues).
+
+        Args:
+            data (bytes): A sentence from split_sentences()
+            matcher (CueMatcher): Compiled cuewords and rules
+
+        Returns:
+            Estimated cost
+
+        Example:
+            >>> sentence_cost(b'<s id="s1"><t id="s1_1" word="nicht" pos="PTKNEG"/></s>', matcher)
+            2
+    """
 
-                frame['id'] = s_id+'_f'+str(count_frames())
+    words = WORD_ATTRIBUTE.findall(data)
+    candidates = sum(1 for word in words if matcher.match(word.decode('utf-8').lower())[1])
 
+    return len(words) * (1 + candidates)
 
-            def create_splitword_target(word_part):
-                """
-                Function for creating a splitword target.
 
-                Args:
-                    word_part (str): Target part of the negated slpitword
+def strip_and_tag_sentences(sentences, cuewords):
+    """ This function removes splitwords and Negation frames from a stream of gold sentences
+        and annotates them again with tag_sentences(), without writing them in between.
 
-                Returns:
-                    xml tag
-                    <target>
-                        <fenode idref="SPLITWORDPART-ID" is_split="yes"/>
-                    </target>
+        Args:
+            sentences (iterable): lxml <s> elements with gold annotations
+            cuewords: Cuewords read with read_cuewords(), a CueMatcher or a NegationDetector
 
-                Example:
-                    create_splitword_target('los')
-                """
+        Returns:
+            Generator of the annotated <s> elements
 
-                split_word = sentence.sem.find('splitword', {'idref' : t_id})
-                wordpart_idref = split_word.find('part', {'word' : word_part})
+        Example:
+            >>> strip_and_tag_sentences(iter_sentences('../../res/xml/train/baskerville_ch4.jr.xml'),
+            ['nicht', 'kein'])
+    """
 
-                last_frame = sentence.sem.frames.find_all('frame', {'name' : NEGATION_FRAME_NAME})[-1]
+    return tag_sentences(strip_sentences(sentences), cuewords)
 
-                # Create <target>
-                target = chapter_input.new_tag('target')
-                last_frame.insert(0, target)
 
-                # Create target <fenode>
-                target_fenode = chapter_input.new_tag('fenode')
-                target_fenode['idref'] = wordpart_idref.get('id')
-                target_fenode['is_split'] = 'yes'
-                target.insert(0, target_fenode)
+def tag_sentences(sentences, cuewords):
+    """ This function runs the splitword and cueword rules on a stream of sentences
+        and annotates each sentence with negation, scope and focus frames.
 
+        Args:
+            sentences (iterable): lxml <s> elements, for example from iter_sentences()
+            cuewords: Cuewords read with read_cuewords(), a CueMatcher or a NegationDetector
 
-            def create_splitword_focus(word_part):
-                """
-                Function for creating a splitword focus.
+        Returns:
+            Generator of the annotated <s> elements
 
-                Args:
-                    word_part (str): Focus part of the negated splitword
+        Example:
+            >>> tag_sentences(iter_sentences('../../res/xml/train/output/baskerville_ch4.jr.xml'),
+            ['nicht', 'kein'])
+    """
 
-                Returns:
-                    xml tag
-                    <fe id="SENTENCE-ID_FE-ID" name="Focus">
-                        <fenode idref="SPLITWORDPART-ID" is_split="yes"/>
-                    </fe>
+    for element, sentence, frames in annotate_sentences(sentences, cuewords):
+        yield write_salsa(element, sentence, frames)
 
-                Example:
-                    create_splitword_focus('zweifel')
-                """
-
-                split_word = sentence.sem.find('splitword', {'idref' : t_id})
-                wordpart_idref = split_word.find('part', {'word' : word_part})
-
-                last_frame = sentence.sem.frames.find_all('frame', {'name' : NEGATION_FRAME_NAME})[-1]
-
-                # Create focus
-                focus = chapter_input.new_tag('fe')
-                focus['name'] = FOCUS_TAG_NAME
-                focus['id'] = last_frame.get('id')+'_e1'
-                last_frame.insert(1, focus)
-
-                # Create focus <fenode>
-                focus_fenode = chapter_input.new_tag('fenode')
-                focus_fenode['idref'] = wordpart_idref.get('id')
-                focus_fenode['is_split'] = 'yes'
-                focus.insert(0, focus_fenode)
-
-            def create_splitword_negated(word_part):
-                """
-                Function for creating the negated part of a splitword.
-
-                Args:
-                    word_part (str): Negated part of the splitword
-
-                Returns:
-                    xml tag
-                    <fe id="SENTENCE-ID_FE-ID" name="Negated">
-                        <fenode idref="SPLITWORDPART-ID" is_split="yes"/>
-                    </fe>
-
-                Example:
-                    create_splitword_negated('zweifel')
-                """
-
-                split_word = sentence.find('splitword', {'idref' : t_id})
-                wordpart_idref = split_word.find('part', {'word' : word_part})
-
-                last_frame = sentence.sem.frames.find_all('frame', {'name' : NEGATION_FRAME_NAME})[-1]
-
-                # Create negated
-                negated = chapter_input.new_tag('fe')
-                negated['name'] = NEGATED_TAG_NAME
-                negated['id'] = last_frame.get('id')+'_e2'
-                last_frame.insert(2, negated)
-
-                # Create negated <fenode>
-                negated_fenode = chapter_input.new_tag('fenode')
-                negated_fenode['idref'] = wordpart_idref.get('id')
-                negated_fenode['is_split'] = 'yes'
-                negated.insert(0, negated_fenode)
-
-            def create_splitword_scope(word_part):
-                """
-                Function for creating the scope part of a splitword.
-
-                Args:
-                    word_part (str): Scope part of the splitword
-
-                Returns:
-                    xml tag
-                    <fe id="SENTENCE-ID_FE-ID" name="Negated">
-                        <fenode idref="SPLITWORDPART-ID" is_split="yes"/>
-                    </fe>
-
-                Example:
-                    create_splitword_scope('zweifel')
-                """
-
-                split_word = sentence.find('splitword', {'idref' : t_id})
-                wordpart_idref = split_word.find('part', {'word' : word_part})
-
-                last_frame = sentence.sem.frames.find_all('frame', {'name' : NEGATION_FRAME_NAME})[-1]
-
-                # Create scope
-                scope = chapter_input.new_tag('fe')
-                scope['name'] = SCOPE_TAG_NAME
-                scope['id'] = last_frame.get('id')+'_e3'
-                last_frame.insert(3, scope)
-
-                # Create scope <fenode>
-                scope_fenode = chapter_input.new_tag('fenode')
-                scope_fenode['idref'] = wordpart_idref.get('id')
-                scope_fenode['is_split'] = 'yes'
-                scope.insert(0, scope_fenode)
-
-
-            def create_target_focus_scope():
-                """
-                Function for creating target focus and scope, for other cuewords.
-
-                Returns:
-                    Full xml frame tag
-                    <frame id="SENTENCE-ID_FRAME-ID" name="Negation">
-                      <target>
-                        <fenode idref="WORD-ID"/>
-                      </target>
-                      <fe id="67_f1_e1" name="Focus">
-                        <fenode idref="WORD-ID"/>
-                      </fe>
-                      <fe id="67_f1_e1" name="Negated">
-                        <fenode idref="WORD-ID"/>
-                      </fe>
-                      <fe id="67_f1_e3" name="Scope">
-                        <fenode idref="WORD-ID"/>
-                      </fe>
-                   </frame>
-
-                Example:
-                    create_target_focus_scope()
-                """
-
-                # Create <target>
-                target = chapter_input.new_tag('target')
-                last_frame = sentence.sem.frames.find_all('frame', {'name' : NEGATION_FRAME_NAME})[-1]
-                last_frame.insert(0, target)
-
-                # Create focus
-                focus = chapter_input.new_tag('fe')
-                focus['name'] = FOCUS_TAG_NAME
-                focus['id'] = last_frame.get('id')+'_e1'
-                last_frame.insert(1, focus)
-
-                # Create negated
-                negated = chapter_input.new_tag('fe')
-                negated['name'] = NEGATED_TAG_NAME
-                negated['id'] = last_frame.get('id')+'_e2'
-                last_frame.insert(2, negated)
-
-                # Create scope
-                scope = chapter_input.new_tag('fe')
-                scope['name'] = SCOPE_TAG_NAME
-                scope['id'] = last_frame.get('id')+'_e3'
-                last_frame.append(scope)
-
-
-                def create_target_fenode():
-                    """
-                    Function for creating target fenode
-                    """
-                    # Create target <fenode>
-                    target_fenode = chapter_input.new_tag('fenode')
-                    target_fenode['idref'] = t_id
-                    target.insert(0, target_fenode)
-
-                def create_focus_fenode(t_id):
-                    """
-                    Function for creating target fenode
-
-                    Args:
-                        t_id (str): Terminal ID
-                    """
-                    # Create focus <fenode>
-                    focus_fenode = chapter_input.new_tag('fenode')
-                    focus_fenode['idref'] = t_id
-                    focus.insert(0, focus_fenode)
-
-                def create_negated_fenode(t_id):
-                    """
-                    Function for creating negated fenode
-
-                    Args:
-                        t_id (str): Terminal ID
-                    """
-                    # Create focus <fenode>
-                    negated_fenode = chapter_input.new_tag('fenode')
-                    negated_fenode['idref'] = t_id
-                    negated.insert(0, negated_fenode)
-
-                def create_scope_fenode(t_id):
-                    """
-                    Function for creating scope fenode
-
-                    Args:
-                        t_id (str): Terminal ID
-                    """
-                    # Create scope <fenode>
-                    scope_fenode = chapter_input.new_tag('fenode')
-                    scope_fenode['idref'] = t_id
-                    scope.append(scope_fenode)
-
-
-                # Run Target Function and mark cueword
-                create_target_fenode()
-
-                # Find previous and next siblings of the cueword within a sentence
-                prev_siblings = sentence.find('t', id=t_id).find_previous_siblings('t')
-                next_siblings = sentence.find('t', id=t_id).find_next_siblings('t')
-
-                # Mark scope for terminals left of the cueword
-                for p_s in prev_siblings:
-
-                    # Break scope if POS in SCOPE_START_FENODE
-                    if p_s.get('pos') in SCOPE_START_FENODE:
-                        break
-
-                    # Create scope <fenode>
-                    create_scope_fenode(p_s.get('id'))
-
-
-                # Mark scope for terminals right of the cueword
-                for n_s in next_siblings:
-
-                    # End Scope if pos in SCOPE_END_FENODE
-                    if n_s.get('pos') in SCOPE_END_FENODE or n_s.get('lemma') in SCOPE_END_LEMMA:
-                        break
-
-                    # Continue Scope for exceptions
-                    if n_s.get('pos') in SCOPE_BREAKING_FENODE[0]:
-                        ns_next = n_s.find_next_sibling('t')
-                        if ns_next.get('pos') in SCOPE_CONTINUE_FENODE:
-                            continue
-                        elif ns_next.get('pos') not in SCOPE_CONTINUE_FENODE:
-                            break
-
-                    # Create scope <fenode>
-                    create_scope_fenode(n_s.get('id'))
-
-
-                # Find negated for word nicht right of the cueword
-                for n_s in next_siblings:
-                    if t_word == 'nicht':
-                        if n_s.get('pos') in NICHT_NEGATED_RULES:
-                            create_negated_fenode(n_s.get('id'))
-                            break
-
-                # Find negated for word nicht left of the cueword
-                for p_s in prev_siblings:
-                    if t_word == 'nicht':
-                        if p_s.get('pos') in NICHT_NEGATED_RULES and not negated.find('fenode'):
-                            create_negated_fenode(p_s.get('id'))
-                            break
 
-                # Find focus for terminals right of the cueword
-                for n_s in next_siblings:
-
-                    # RULE 1: nicht PTKNEG
-                    if t_word == 'nicht' and t_pos == 'PTKNEG':
-                        if n_s.get('pos') in NICHT_RULES and not focus.find('fenode'):
-                            create_focus_fenode(n_s.get('id'))
-                            break
+def serialize_sentences(sentences, cuewords, serializer='json'):
+    """ This function runs the splitword and cueword rules on a stream of sentences
+        and passes the new frames of each sentence to a serializer from negationFrames.py.
 
-                    if t_word == 'nein':
-                        continue
+        Args:
+            sentences (iterable): lxml <s> elements, for example from iter_sentences()
+            cuewords: Cuewords read with read_cuewords(), a CueMatcher or a NegationDetector
+            serializer (str): 'salsa', 'json' or 'inline', or a function taking (element, sentence, frames)
 
-                    elif n_s.get('pos') in FOCUS_LEMMA_RULES and not focus.find('fenode'):
-                        create_focus_fenode(n_s.get('id'))
+        Returns:
+            Generator of the serialized sentences
 
-                    # RULE 2: kein
-                    if t_word[:4] == 'kein' and t_pos == 'PIAT':
-                        if n_s.get('pos') in NICHT_RULES and not focus.find('fenode'):
-                            create_focus_fenode(n_s.get('id'))
-                            break
+        Example:
+            >>> for frames in serialize_sentences(iter_sentences('../../res/xml/test/output/baskerville_ch1.jr.xml'),
+            ...                                   ['nicht', 'kein'], 'json'):
+            ...     print(json.dumps(frames))
+    """
 
-                    elif n_s.get('pos') in FOCUS_LEMMA_RULES and not focus.find('fenode'):
-                        create_focus_fenode(n_s.get('id'))
+    if not callable(serializer):
+        serializer = SERIALIZERS[serializer]
 
-                # Find focus for 'nichts' right of the cueword
-                for n_s in next_siblings:
-                    if t_word == 'nichts' and t_pos in NICHTS_RULES:
-                        if n_s.get('pos') in NICHTS_FOCUS_RULES and not focus.find('fenode'):
-                            create_focus_fenode(n_s.get('id'))
+    for element, sentence, frames in annotate_sentences(sentences, cuewords):
+        yield serializer(element, sentence, frames)
 
-                # Find focus and target for terminals left of the cueword
-                for p_s in prev_siblings:
 
-                    # RULE 1: nicht PTKNEG for previous siblings
-                    if t_word == 'nicht' and t_pos == 'PTKNEG':
-                        if p_s.get('pos') in NICHT_PREV_RULES and not focus.find('fenode'):
-                            create_focus_fenode(p_s.get('id'))
-                            break
+def export_file_negation(file, out_file, cuewords, serializer='json'):
+    """ This function detects negation in a corpus file and writes the frames as JSON lines,
+        one object per sentence, or inline as in res/xml/simplified/, one line per negated sentence.
 
-                    elif t_word == 'nicht' and not focus.find('fenode'):
-                        create_focus_fenode(t_id)
+        Args:
+            file (str): Path to a corpus file in xml format, or in CoNLL-2009 format, see detect_conll()
+            out_file (str): Path for the output
+            cuewords: Cuewords read with read_cuewords(), a CueMatcher or a NegationDetector
+            serializer (str): 'json' or 'inline'
 
-                    if p_s.get('pos') in FOCUS_LEMMA_RULES:
-                        pass
+        Example:
+            >>> export_file_negation('../../res/xml/test/output/baskerville_ch1.jr.xml',
+            '../../res/xml/simplified/baskerville_ch1.jr.simplified.xml', cuewords, 'inline')
+    """
 
-                if t_word == 'nichts' and t_pos == 'NN':
-                    create_focus_fenode(t_id)
+    if is_conll_file(file):
+        if serializer not in ('json', 'inline'):
+            raise ValueError('CoNLL-2009 files can only be written as json or inline, not as ' + str(serializer))
+        results = (SERIALIZERS[serializer](None, sentence, frames) for sentence, frames in detect_conll(file, cuewords))
+    else:
+        results = serialize_sentences(iter_sentences(file), cuewords, serializer)
 
+    print('Writing Negation frames from:', file, 'as', serializer, 'to:', out_file)
 
-            ###########
-            # The Loop
-            for sentence in chapter_input.find_all('s'):
+    with open(out_file, 'w', encoding='utf8') as output:
+        if serializer == 'inline':
+            lines = [line for line in results if line is not None]
+            output.write('<sentences>\n<sentence>' + '</sentence>\n<sentence>'.join(lines) + '</sentence>\n</sentences>')
+        else:
+            for frames in results:
+                output.write(json.dumps(frames, ensure_ascii=False) + '\n')
 
-                for terminal in sentence.find_all('t'):
 
-                    # collect terminal word in lowercase
-                    t_word = terminal.get('word').lower()
+def detect_conll(conll_file, cuewords=None, scope=LINEAR_SCOPE):
+    """ This function detects negation in a corpus file in CoNLL-2009 format, as written by xmlToConll.py
+        or by the dependency parser. The columns are read without building any xml, and the frames
+        refer to the terminal ids of the ID column, so they match the corpus file in TIGER-XML format.
 
-                    # collect terminal IDs
-                    t_id = terminal.get('id')
+        Args:
+            conll_file (str): Path to a .conll or .dep.conll file, plain or compressed
+            cuewords: NegationDetector from load_detector(), a CueMatcher, a set of cuewords
+                      or the path to a cuewords file, None loads the default lexicon once per process
+            scope (str): Scope resolver from SCOPE_RESOLVERS, DEPENDENCY_SCOPE reads the heads of the file
 
-                    # Collect terminal POS tags
-                    t_pos = terminal.get('pos')
+        Returns:
+            Generator of (Sentence, SentenceFrames) tuples, see negationFrames.py
 
-                    # collect sentence IDs
-                    s_id = sentence.get('id')
+        Example:
+            >>> for sentence, frames in detect_conll('../../res/conll/baskerville_ch4.jr.dep.conll'):
+            ...     print(frames.id, [frame.target.fenodes for frame in frames.frames])
+    """
 
-                    if t_word in cueword_list:
-                        detect_splitwords()
-                        detect_cuewords()
+    return file_detector(conll_file, cuewords, scope).detect_sentences(iter_conll(conll_file))
+
+
+def annotate_sentences(sentences, cuewords):
+    """ This function runs the splitword and cueword rules on a stream of sentences.
+        New splitwords and frames are collected as objects, see negationFrames.py,
+        the sentences are not changed.
+
+        Args:
+            sentences (iterable): lxml <s> elements, for example from iter_sentences()
+            cuewords: Cuewords read with read_cuewords(), a CueMatcher or a NegationDetector
+
+        Returns:
+            Generator of (element, Sentence, SentenceFrames) tuples
 
-                    elif t_word not in cueword_list:
-                        guess_splitwords()
-                        guess_cuewords()
+        Example:
+            >>> for element, sentence, frames in annotate_sentences(sentences, ['nicht', 'kein']):
+            ...     write_salsa(element, sentence, frames)
+    """
+
+    # Elements of the sentences find_frames() is working on
+    pending = deque()
+
+    def read_sentences():
+        """ Reads each element into a Sentence and keeps the element until its frames are found """
+        for element in sentences:
+            pending.append(element)
+            yield read_sentence(element)
+
+    for sentence, frames in find_frames(read_sentences(), cuewords):
+        yield pending.popleft(), sentence, frames
+
+
+def detect_tokens(sentences, cuewords=None, batch_size=BATCH_SIZE):
+    """ This function detects negation in tokenized and POS tagged sentences held in memory,
+        without reading or writing any file besides the default lexicon.
+
+        Args:
+            sentences (iterable): Sentences, each one a list of (id, word, lemma, pos) tuples,
+                                  for example [('s1_1', 'Er', 'er', 'PPER'), ('s1_2', 'kam', 'kommen', 'VVFIN'), ...]
+            cuewords: NegationDetector from load_detector(), a CueMatcher, a set of cuewords
+                      or the path to a cuewords file, None loads the default lexicon once per process
+            batch_size (int): Sentences converted and annotated together, they share their cueword lookups.
+                              Larger batches are faster for long streams, smaller ones yield sooner.
+
+        Returns:
+            Generator of SentenceFrames, one per sentence and in input order, see negationFrames.py
+
+        Example:
+            >>> for frames in detect_tokens([[('s1_1', 'Er', 'er', 'PPER'), ('s1_2', 'kam', 'kommen', 'VVFIN'),
+            ...                               ('s1_3', 'nicht', 'nicht', 'PTKNEG'), ('s1_4', '.', '.', '$.')]]):
+            ...     print([frame.target.fenodes for frame in frames.frames])
+            [['s1_3']]
+    """
+
+    detector = load_detector(cuewords)
+    batch = []
+
+    for number, tokens in enumerate(sentences, 1):
+        # Sentences without ids in their terminal ids are numbered
+        sentence = sentence_from_tokens(tokens)
+        if sentence.id is None:
+            sentence.id = 's' + str(number)
+        batch.append(sentence)
+
+        if len(batch) >= batch_size:
+            for sentence, frames in detector.detect_sentences(batch):
+                yield frames
+            batch = []
+
+    for sentence, frames in detector.detect_sentences(batch):
+        yield frames
+
+
+def load_matcher(cuewords=None):
+    """ This function compiles cuewords into a CueMatcher for detect_tokens() and tag_sentences().
+
+        Args:
+            cuewords: A set of cuewords, the path to a cuewords file or a CueMatcher,
+                      None loads CUEWORDS_FILE from the res/cuewords/ directory of the project
+
+        Returns:
+            CueMatcher, the default lexicon is compiled once per process
+
+        Example:
+            >>> matcher = load_matcher()
+            >>> matcher.match('niemals')
+    """
+
+    if isinstance(cuewords, CueMatcher):
+        return cuewords
+
+    if isinstance(cuewords, NegationDetector):
+        return cuewords.matcher
+
+    if cuewords is None:
+        if DEFAULT_MATCHER[0] is None:
+            DEFAULT_MATCHER[0] = CueMatcher(read_cuewords(DEFAULT_CUEWORDS_FILE), CUE_RULES)
+        return DEFAULT_MATCHER[0]
+
+    if isinstance(cuewords, str):
+        cuewords = read_cuewords(cuewords)
+
+    return CueMatcher(cuewords, CUE_RULES)
+
+
+def load_detector(cuewords=None):
+    """ This function returns a NegationDetector, the one of the default lexicon is created once per process.
+
+        Args:
+            cuewords: A set of cuewords, the path to a cuewords file, a CueMatcher or a NegationDetector,
+                      None for the default lexicon
+
+        Returns:
+            NegationDetector
+
+        Example:
+            >>> detector = load_detector()
+    """
+
+    if isinstance(cuewords, NegationDetector):
+        return cuewords
+
+    if cuewords is None:
+        if DEFAULT_DETECTOR[0] is None:
+            DEFAULT_DETECTOR[0] = NegationDetector()
+        return DEFAULT_DETECTOR[0]
+
+    return NegationDetector(cuewords)
+
+
+def find_frames(sentences, cuewords):
+    """ This function runs the splitword and cueword rules on a stream of Sentence objects.
+
+        Args:
+            sentences (iterable): Sentence objects, see corpusModel.py
+            cuewords: A NegationDetector, a CueMatcher or cuewords read with read_cuewords()
+
+        Returns:
+            Generator of (Sentence, SentenceFrames) tuples
+
+        Example:
+            >>> for sentence, frames in find_frames(iter_corpus(file), load_detector()):
+            ...     print(sentence.id, len(frames.frames))
+    """
 
-            chapter_output.write(chapter_input.prettify())
-            print('Done!')
-            chapter_output.close()
+    return load_detector(cuewords).detect_sentences(sentences)
 
 
 if __name__ == "__main__":
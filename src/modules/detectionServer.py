@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+detection_server
+
+Short description:
+This module runs the negation detection as a long running local HTTP/JSON
+service, so the lexicon and the rules are compiled once and stay warm.
+Requests that arrive at the same time are grouped into micro-batches
+and handed to a pool of worker processes. Latency and queue depth
+are reported on the /stats endpoint.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import argparse
+import json
+import queue
+import socket
+import sys
+import threading
+import urllib.error
+import urllib.request
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lxml import etree
+
+from corpusModel import check_token, sentence_from_tokens
+from detectNegation import annotate_sentences, load_detector
+from negationFrames import SERIALIZERS
+from streamCorpus import SENTENCE_PARSER
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+# Worker processes, 1 runs the batches in the server process
+WORKERS = 1
+
+# Sentences of a micro-batch, and seconds a batch waits for more requests
+BATCH_SIZE = 256
+BATCH_WAIT = 0.005
+
+# Requests the latency percentiles are computed from
+LATENCY_WINDOW = 10000
+
+# Connections the operating system queues before the server accepts them, clients that
+# connect together must fit, the default of socketserver is 5
+BACKLOG = socket.SOMAXCONN
+
+# Largest request body in bytes
+MAX_REQUEST_SIZE = 1 << 26
+
+# NegationDetector of this process, created by init_worker()
+DETECTOR = [None]
+
+
+def init_worker(cuewords=None):
+    """ Compiles the lexicon once per worker process, see detectNegation.load_detector() """
+    DETECTOR[0] = load_detector(cuewords)
+
+
+def parse_request(request):
+    """ This function checks a detection request and brings it into a picklable form.
+
+        Args:
+            request (dict): {"sentences": [[[id, word, lemma, pos], ...], ...]} for tokenized sentences
+                            or {"xml": "<s id=...>...</s>"} for TIGER-XML fragments with one or more
+                            <s> elements, and optionally "format": "json", "inline" or "salsa"
+
+        Returns:
+            Tuple of (kind, sentences, format), kind is 'tokens' or 'xml'
+
+        Example:
+            >>> parse_request({'sentences': [[['s1_1', 'nicht', 'nicht', 'PTKNEG']]]})
+            ('tokens', [[('s1_1', 'nicht', 'nicht', 'PTKNEG')]], 'json')
+    """
+
+    if not isinstance(request, dict):
+        raise ValueError('Request must be a JSON object')
+
+    serializer = request.get('format', 'json')
+    if serializer not in SERIALIZERS:
+        raise ValueError('Unknown format: ' + str(serializer) + ', formats are: ' + ', '.join(SERIALIZERS))
+
+    if 'xml' in request:
+        if not isinstance(request['xml'], str):
+            raise ValueError('xml must be a string')
+        # Fail early on broken fragments
+        read_fragment(request['xml'])
+        return 'xml', request['xml'], serializer
+
+    sentences = request.get('sentences')
+    if not isinstance(sentences, list):
+        raise ValueError('Request needs "sentences" or "xml"')
+    if serializer == 'salsa':
+        raise ValueError('Format salsa needs "xml" input')
+
+    for tokens in sentences:
+        if not isinstance(tokens, list):
+            raise ValueError('Sentences must be lists of [id, word, lemma, pos] tokens')
+    sentences = [[check_token(token) for token in tokens] for tokens in sentences]
+
+    return 'tokens', sentences, serializer
+
+
+def read_fragment(xml):
+    """ Returns the <s> elements of a TIGER-XML fragment """
+    root = etree.fromstring('<body>' + xml + '</body>', SENTENCE_PARSER)
+    return list(root.iter('s'))
+
+
+def detect_batch(requests):
+    """ This function detects negation for a micro-batch of parsed requests.
+        Tokenized sentences of all requests share one pass, and their cueword lookups.
+        A request that fails gets its exception as result, the other requests of the batch are not affected.
+
+        Args:
+            requests (list): Tuples from parse_request()
+
+        Returns:
+            List of results, one list of serialized sentences or one exception per request
+    """
+
+    if DETECTOR[0] is None:
+        init_worker()
+    detector = DETECTOR[0]
+
+    results = [None] * len(requests)
+
+    # Tokenized sentences of all requests in one pass
+    numbers = [number for number, request in enumerate(requests) if request[0] == 'tokens']
+    try:
+        results_tokens = detect_token_requests(detector, [requests[number] for number in numbers])
+    except Exception:
+        # One request spoils the shared pass, run the requests one by one
+        results_tokens = []
+        for number in numbers:
+            try:
+                results_tokens.append(detect_token_requests(detector, [requests[number]])[0])
+            except Exception as error:
+                results_tokens.append(error)
+    for number, result in zip(numbers, results_tokens):
+        results[number] = result
+
+    # TIGER-XML fragments
+    for number, (kind, xml, serializer) in enumerate(requests):
+        if kind != 'xml':
+            continue
+        try:
+            results[number] = detect_xml_request(detector, xml, serializer)
+        except Exception as error:
+            results[number] = error
+
+    return results
+
+
+def detect_token_requests(detector, requests):
+    """ Returns the serialized sentences of each request with tokenized sentences, in one pass """
+    results = [[] for request in requests]
+
+    batch = []
+    owners = []
+    for number, (kind, sentences, serializer) in enumerate(requests):
+        for ordinal, tokens in enumerate(sentences, 1):
+            sentence = sentence_from_tokens(tokens)
+            if sentence.id is None:
+                sentence.id = 's' + str(ordinal)
+            batch.append(sentence)
+            owners.append(number)
+
+    for number, (sentence, frames) in zip(owners, detector.detect_sentences(batch)):
+        results[number].append(SERIALIZERS[requests[number][2]](None, sentence, frames))
+
+    return results
+
+
+def detect_xml_request(detector, xml, serializer):
+    """ Returns the serialized sentences of a request with a TIGER-XML fragment """
+    results = []
+    for element, sentence, frames in annotate_sentences(read_fragment(xml), detector):
+        result = SERIALIZERS[serializer](element, sentence, frames)
+        if serializer == 'salsa':
+            result = etree.tostring(result, encoding='unicode', with_tail=False)
+        results.append(result)
+    return results
+
+
+class PendingRequest:
+    """ A parsed request waiting for its batch, with the time it arrived. """
+
+    __slots__ = ('request', 'size', 'arrived', 'done', 'result', 'error')
+
+    def __init__(self, request):
+        self.request = request
+        self.size = max(1, len(request[1]) if request[0] == 'tokens' else 1)
+        self.arrived = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """ Groups concurrent requests into batches of up to batch_size sentences
+        and runs them in a pool of worker processes.
+
+        Args:
+            workers (int): Worker processes, 1 runs the batches on the batching thread
+            batch_size (int): Sentences per batch
+            batch_wait (float): Seconds the first request of a batch waits for more requests
+            cuewords: Lexicon for load_detector(), None for the default lexicon
+
+        Example:
+            >>> batcher = MicroBatcher(workers=4)
+            >>> batcher.detect(parse_request({'sentences': [[['s1_1', 'nicht', 'nicht', 'PTKNEG']]]}))
+    """
+
+    def __init__(self, workers=WORKERS, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT, cuewords=None):
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.pending = queue.Queue()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.requests = 0
+        self.sentences = 0
+        self.batches = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+        if workers is None or workers <= 1:
+            self.executor = None
+            init_worker(cuewords)
+        else:
+            self.executor = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(cuewords,))
+            # Start and warm up all workers before the first request
+            for future in [self.executor.submit(detect_batch, []) for worker in range(workers)]:
+                future.result()
+
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def detect(self, request):
+        """ Queues a parsed request and waits for its result """
+        pending = PendingRequest(request)
+        self.pending.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def run(self):
+        """ Collects requests into batches until close() sends None """
+        while True:
+            first = self.pending.get()
+            if first is None:
+                break
+
+            batch = [first]
+            size = first.size
+            deadline = time.perf_counter() + self.batch_wait
+
+            while size < self.batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    pending = self.pending.get(timeout=timeout) if timeout > 0 else self.pending.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    self.pending.put(None)
+                    break
+                batch.append(pending)
+                size += pending.size
+
+            self.submit(batch, size)
+
+    def submit(self, batch, size):
+        """ Runs a batch in the pool, or on this thread without a pool """
+        with self.lock:
+            self.running += 1
+            self.batches += 1
+
+        requests = [pending.request for pending in batch]
+
+        if self.executor is None:
+            try:
+                results = detect_batch(requests)
+            except Exception as error:
+                self.finish(batch, size, None, error)
+            else:
+                self.finish(batch, size, results, None)
+            return
+
+        future = self.executor.submit(detect_batch, requests)
+        future.add_done_callback(lambda future: self.finish(batch, size, *future_result(future)))
+
+    def finish(self, batch, size, results, error):
+        """ Hands results to the waiting requests and records their latency """
+        now = time.perf_counter()
+        with self.lock:
+            self.running -= 1
+            self.requests += len(batch)
+            self.sentences += size
+            if error is not None:
+                self.errors += len(batch)
+            else:
+                self.errors += sum(1 for result in results if isinstance(result, Exception))
+            for pending in batch:
+                self.latencies.append(now - pending.arrived)
+
+        for number, pending in enumerate(batch):
+            if error is not None:
+                pending.error = error
+            elif isinstance(results[number], Exception):
+                pending.error = results[number]
+            else:
+                pending.result = results[number]
+            pending.done.set()
+
+    def stats(self):
+        """ Returns counters, queue depth and latency percentiles in milliseconds """
+        with self.lock:
+            latencies = sorted(self.latencies)
+            return {
+                'requests': self.requests,
+                'sentences': self.sentences,
+                'batches': self.batches,
+                'errors': self.errors,
+                'queue_depth': self.pending.qsize(),
+                'running_batches': self.running,
+                'latency_ms': {'p50': percentile(latencies, 50) * 1000,
+                               'p99': percentile(latencies, 99) * 1000,
+                               'window': len(latencies)},
+            }
+
+    def close(self):
+        """ Finishes queued requests and stops the workers """
+        self.pending.put(None)
+        self.thread.join()
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def future_result(future):
+    """ Returns (result, None) of a finished future, or (None, exception) """
+    error = future.exception()
+    return (None, error) if error is not None else (future.result(), None)
+
+
+def percentile(values, percent):
+    """ Returns the percentile of sorted values, nearest rank, 0 for no values """
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+class DetectionHandler(BaseHTTPRequestHandler):
+    """ POST /detect runs the detection, GET /stats returns the statistics of the batcher. """
+
+    # Set by serve()
+    batcher = None
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.send_json(200, self.batcher.stats())
+        elif self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        else:
+            self.send_json(404, {'error': 'Not found: ' + self.path})
+
+    def do_POST(self):
+        if self.path != '/detect':
+            self.send_json(404, {'error': 'Not found: ' + self.path})
+            return
+
+        # The body can not be skipped after a broken length, so the connection is closed
+        header = self.headers.get('Content-Length')
+        if header is None:
+            self.close_connection = True
+            self.send_json(411, {'error': 'Content-Length required'})
+            return
+
+        if not header.strip().isdigit():
+            self.close_connection = True
+            self.send_json(400, {'error': 'Content-Length must be a non-negative integer, got: ' + header})
+            return
+
+        length = int(header)
+        if length > MAX_REQUEST_SIZE:
+            self.close_connection = True
+            self.send_json(413, {'error': 'Request larger than ' + str(MAX_REQUEST_SIZE) + ' bytes'})
+            return
+
+        try:
+            request = parse_request(json.loads(self.rfile.read(length).decode('utf-8')))
+        except (ValueError, etree.XMLSyntaxError) as error:
+            self.send_json(400, {'error': str(error)})
+            return
+
+        try:
+            result = self.batcher.detect(request)
+        except Exception as error:
+            self.send_json(500, {'error': type(error).__name__ + ': ' + str(error)})
+            return
+
+        self.send_json(200, {'sentences': result})
+
+    def send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Requests are counted on /stats instead of printed
+        pass
+
+
+class DetectionServer(ThreadingHTTPServer):
+    """ ThreadingHTTPServer with a listen backlog for many clients that connect at the same time. """
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, backlog=BACKLOG):
+        # Read by server_activate() in the constructor
+        self.request_queue_size = backlog
+        super().__init__(address, handler)
+
+
+def create_server(host=HOST, port=PORT, workers=WORKERS, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT,
+                  cuewords=None, backlog=BACKLOG):
+    """ This function creates the detection server, with warm workers, without starting it.
+
+        Args:
+            host (str): Address to listen on, local only by default
+            port (int): Port, 0 picks a free port
+            workers (int): Worker processes, 1 runs the detection in the server process
+            batch_size (int): Sentences per micro-batch
+            batch_wait (float): Seconds a batch waits for more requests
+            cuewords: Lexicon for load_detector(), None for the default lexicon
+            backlog (int): Connections queued before they are accepted
+
+        Returns:
+            DetectionServer, its batcher attribute holds the MicroBatcher
+
+        Example:
+            >>> server = create_server(port=0)
+            >>> threading.Thread(target=server.serve_forever, daemon=True).start()
+            >>> urllib.request.urlopen('http://127.0.0.1:%d/stats' % server.server_port).read()
+    """
+
+    batcher = MicroBatcher(workers, batch_size, batch_wait, cuewords)
+    handler = type('Handler', (DetectionHandler,), {'batcher': batcher})
+
+    server = DetectionServer((host, port), handler, backlog)
+    server.batcher = batcher
+
+    return server
+
+
+def serve(host=HOST, port=PORT, workers=WORKERS, batch_size=BATCH_SIZE, batch_wait=BATCH_WAIT, cuewords=None,
+          backlog=BACKLOG):
+    """ This function runs the detection server until it is interrupted.
+
+        Example:
+            >>> serve(port=8765, workers=4)
+
+            $ curl -d '{"sentences": [[["s1_1", "nicht", "nicht", "PTKNEG"]]]}' http://127.0.0.1:8765/detect
+            $ curl http://127.0.0.1:8765/stats
+    """
+
+    server = create_server(host, port, workers, batch_size, batch_wait, cuewords, backlog)
+    print('Serving negation detection on http://' + host + ':' + str(server.server_port) + '/detect')
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+def check_server(clients=64, requests=300, workers=WORKERS, cuewords=None, backlog=BACKLOG):
+    """ This function starts a server on a free local port and sends it many /detect requests at once.
+        No network access is needed.
+
+        Args:
+            clients (int): Requests sent at the same time
+            requests (int): Requests sent in total
+            workers (int): Worker processes of the server
+            cuewords: Lexicon for load_detector(), None for the default lexicon
+            backlog (int): Connections queued before they are accepted
+
+        Returns:
+            True if every request was answered with 200 and one result per sentence
+
+        Example:
+            >>> check_server(clients=64)
+            True
+    """
+
+    server = create_server('127.0.0.1', 0, workers, cuewords=cuewords, backlog=backlog)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:' + str(server.server_port) + '/detect'
+
+    body = json.dumps({'sentences': [[['s1_1', 'Er', 'er', 'PPER'], ['s1_2', 'kam', 'kommen', 'VVFIN'],
+                                      ['s1_3', 'nicht', 'nicht', 'PTKNEG'], ['s1_4', '.', '.', '$.']]]})
+
+    def send(number):
+        try:
+            with urllib.request.urlopen(url, body.encode('utf-8'), timeout=60) as response:
+                return response.status, len(json.loads(response.read().decode('utf-8'))['sentences'])
+        except urllib.error.HTTPError as error:
+            return error.code, 0
+        except OSError as error:
+            return type(error).__name__, 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            results = list(executor.map(send, range(requests)))
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.batcher.close()
+
+    failed = [result for result in results if result != (200, 1)]
+    print('Requests:', len(results), 'Clients:', clients, 'Failed:', len(failed), failed[:5])
+    print('Stats:', server.batcher.stats())
+
+    return not failed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Local HTTP/JSON negation detection service')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--batch-wait', type=float, default=BATCH_WAIT)
+    parser.add_argument('--cuewords', default=None, help='Path to a cuewords file, defaults to the project lexicon')
+    parser.add_argument('--backlog', type=int, default=BACKLOG, help='Connections queued before they are accepted')
+    parser.add_argument('--check', action='store_true',
+                        help='Send many concurrent requests to a server on a free local port and exit')
+    arguments = parser.parse_args()
+
+    if arguments.check:
+        sys.exit(0 if check_server(workers=arguments.workers, cuewords=arguments.cuewords, backlog=arguments.backlog) else 1)
+
+    serve(arguments.host, arguments.port, arguments.workers, arguments.batch_size, arguments.batch_wait,
+          arguments.cuewords, arguments.backlog)
@@ -20,20 +20,17 @@ Version: 1.0
 """
 
 # import dependencies
+import argparse
 import codecs
 import os
 import sys
 
-from bs4 import BeautifulSoup
-import lxml
+from artifactCache import cached_call
+from processPool import list_xml_files, map_files
+from sentenceIndex import FRAMES_FLAG, load_index
 
 import numpy as np
 
-from sklearn.metrics import f1_score
-from sklearn.metrics import precision_score
-from sklearn.metrics import recall_score
-from sklearn.metrics import jaccard_similarity_score
-
 XML_TRAIN_FILES_PATH = '../../res/xml/train/'
 XML_TEST_FILES_PATH = '../../res/xml/test/'
 
@@ -48,13 +45,23 @@ NEGATED_TAG_NAME = 'Negated' #CaseSensitive
 FOCUS_TAG_NAME = 'Focus' #CaseSensitive
 SCOPE_TAG_NAME = 'Scope' #CaseSensitive
 
-def evaluate(xml_gold_path, xml_output_path):
+# Frame elements scored for each pair of Gold and Test frames
+SCORE_ROLES = ['target', 'focus', 'negated', 'scope']
+
+# Counts of a frame and role: true positives, false positives, false negatives
+# and true negatives of label 1, equal words at the same position and words
+COUNT_TP, COUNT_FP, COUNT_FN, COUNT_TN, COUNT_EQUAL, COUNT_WORDS = range(6)
+
+def evaluate(xml_gold_path, xml_output_path, workers=1, gold=None):
     """ This function iterates over Gold standard files and output files created with the detect_negation() module.
         It calculates the average f1 score between all cuewords.
 
         Args:
             xml_gold_path (str): Path to corpus gold files in xml format with frame annotations
             xml_output_path (str):  Path to corpus files in xml format created with detect_negation() module
+            workers (int): Number of processes, files are evaluated in parallel if > 1
+            gold (dict): Gold sentences already read by the fused pipeline, see fusedPipeline.py,
+                         file name -> {ordinal: Sentence} of all sentences with frames
 
         Returns:
             The average f1 score per file
@@ -63,475 +70,626 @@ def evaluate(xml_gold_path, xml_output_path):
             >>> evaluate('../res/xml/train/', '../res/xml/train/output/tagged/')
     """
 
+    jobs = []
+
     # Go through all files in xml_gold_path directory
-    for file in os.listdir(xml_gold_path):
+    for file in list_xml_files(xml_gold_path):
 
-        # Set path to file
-        file = xml_gold_path+file
+        # Set paths to gold and test files
+        chapter_input_gold = file
+        chapter_input_test = xml_output_path+os.path.split(file)[-1]
 
-        # Open files only, ignore subdirectories
-        if os.path.isfile(file) and file.lower().endswith('.xml'):
+        # Check if filenams are the same
+        chapter_input_gold_name = os.path.split(chapter_input_gold)[-1]
+        chapter_input_test_name = os.path.split(chapter_input_test)[-1]
 
-            # Open xml files
-            chapter_input_gold = open(file, 'r', encoding='utf8')
-            chapter_input_test = open(xml_output_path+os.path.split(file)[-1], 'r', encoding='utf8')
+        if chapter_input_gold_name == chapter_input_test_name:
+            jobs.append(('evaluate', evaluate_file,
+                         (chapter_input_gold, chapter_input_test,
+                          gold.get(chapter_input_gold_name) if gold is not None else None),
+                         [chapter_input_gold, chapter_input_test]))
 
-            # Check if filenams are the same
-            chapter_input_gold_name = os.path.split(chapter_input_gold.name)[-1]
-            chapter_input_test_name = os.path.split(chapter_input_test.name)[-1]
+    # Scores are printed in file order
+    for result in map_files(cached_call, jobs, workers):
+        pass
 
-            if chapter_input_gold_name == chapter_input_test_name:
+    print('Done!')
 
-                # Console log
-                chapter_input_gold_name = chapter_input_gold.name
-                chapter_input_test_name = chapter_input_test.name
-                #print('Calculating score for: ' + chapter_input_gold_name + ' and: ' + chapter_input_test_name)
 
-                # Process xml input file with BeautifulSoup
-                chapter_input_gold = BeautifulSoup(chapter_input_gold, 'xml')
-                chapter_input_test = BeautifulSoup(chapter_input_test, 'xml')
+def resolve_non_terminals(sentence, idref):
+    """ This function resolves a nonterminal of a complex graph to
+        a simple flat list of lowercased tokens, from the yields
+        the sentence resolves once for all its nonterminals.
 
-                # Empty variables for collecting Target scores
-                target_precision_scores = 0
-                target_recall_scores = 0
-                target_f1_scores = 0
-                target_jaccard_scores = 0
+        Args:
+            sentence (Sentence): The gold or the test sentence the nonterminal belongs to
+            idref (str): Id of the nonterminal
 
-                # Empty variables for collecting Focus scores
-                focus_precision_scores = 0
-                focus_recall_scores = 0
-                focus_f1_scores = 0
-                focus_jaccard_scores = 0
+        Returns:
+            List of words in sentence order
 
-                # Empty variables for collecting Negated scores
-                negated_precision_scores = 0
-                negated_recall_scores = 0
-                negated_f1_scores = 0
-                negated_jaccard_scores = 0
+        Example:
+            >>> resolve_non_terminals(s_gold, 's9_534')
+            ['mein', 'freund']
+    """
 
-                # Empty variables for collecting Scope scores
-                scope_precision_scores = 0
-                scope_recall_scores = 0
-                scope_f1_scores = 0
-                scope_jaccard_scores = 0
+    return [word.lower() for word in sentence.yield_words(idref) if word is not None]
 
-                # Count sentences and frames
-                sentence_count = 0
-                gold_frames_count = 0
-                test_frames_count = 0
 
-                scope_gold_frames_count = 0
-                #scope_test_frames_count = 0
+def frame_counts(gold_labels, test_labels, gold_words, test_words):
+    """ This function counts the aligned 0/1 labels and words of one frame element.
 
-                # Find all Gold and Test Sentences
-                sentences_gold = chapter_input_gold.find_all('s')
-                sentences_test = chapter_input_test.find_all('s')
+        Args:
+            gold_labels (list): Labels of the Gold words, 1 for a word, 0 for padding
+            test_labels (list): Labels of the Test words, 1 for a word that is also in Gold
+            gold_words (list): Sorted Gold words, padded with ''
+            test_words (list): Sorted Test words, padded with ''
 
-                #targets_gold = chapter_input_gold.find_all('target')
-                #targets_test = chapter_input_test.find_all('target')
+        Returns:
+            Tuple of counts, see COUNT_TP
 
-                scope_gold_frames = chapter_input_gold.find_all('fe', {'name' : SCOPE_TAG_NAME})
-                scope_gold_frames_count = len(scope_gold_frames)
+        Example:
+            >>> frame_counts([1, 1], [1, 0], ['nicht', 'so'], ['nicht', ''])
+            (1, 0, 1, 0, 1, 2)
+    """
 
-                scope_test_frames = chapter_input_test.find_all('fe', {'name' : SCOPE_TAG_NAME})
-                scope_test_frames_count = len(scope_test_frames)
+    tp = fp = fn = tn = 0
+    for gold, test in zip(gold_labels, test_labels):
+        if gold:
+            if test:
+                tp += 1
+            else:
+                fn += 1
+        elif test:
+            fp += 1
+        else:
+            tn += 1
 
-                # Exit if number of sentences != between Gold and Test files
-                if len(sentences_gold) != len(sentences_test):
-                    raise SystemExit(print('Number of sentences between Gold and Test files does not match.\nGold:',
-                                           len(sentences_gold), 'Test:', len(sentences_test)))
+    equal = sum(1 for gold, test in zip(gold_words, test_words) if gold == test)
 
-                # Zip Gold and Test Sentences
-                for s_gold, s_test in zip(sentences_gold, sentences_test):
+    return tp, fp, fn, tn, equal, min(len(gold_words), len(test_words))
 
-                    sentence_count = sentence_count + 1
 
-                    gold_frames = s_gold.find_all('frame', {'name' : NEGATION_FRAME_NAME})
-                    test_frames = s_test.find_all('frame', {'name' : NEGATION_FRAME_NAME})
+def divide(numerator, denominator):
+    """ Divides arrays element by element, 0 where the denominator is 0 """
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator != 0)
 
-                    gold_frames_count = gold_frames_count + len(gold_frames)
-                    test_frames_count = test_frames_count + len(test_frames)
 
-                    for item in zip(gold_frames, test_frames):
+class FrameScorer:
+    """ Collects the counts of each pair of Gold and Test frames and scores all frames
+        and roles at once. Precision, recall and f1 of a frame are the averages over
+        the labels 0 and 1 weighted by their Gold support, as sklearn.metrics computes
+        them with average='weighted'. Jaccard similarity is the share of equal words.
 
-                        #print('\n=========')
-                        #print('\nFrame:', item[0].get('id'))
+        Args:
+            roles (list): Names of the scored frame elements
 
-                        target_gold_list = []
-                        target_test_list = []
+        Example:
+            >>> scorer = FrameScorer()
+            >>> scorer.add([frame_counts([1], [1], ['nicht'], ['nicht'])] * 4)
+            >>> scorer.totals()['scope']['f1']
+            1.0
+    """
 
-                        focus_gold_list = []
-                        focus_test_list = []
+    __slots__ = ('roles', 'counts')
 
-                        negated_gold_list = []
-                        negated_test_list = []
+    def __init__(self, roles=SCORE_ROLES):
+        self.roles = roles
+        self.counts = []
 
-                        scope_gold_list = []
-                        scope_test_list = []
+    def __len__(self):
+        return len(self.counts)
 
-                        # Flatten a nested list of fenodes
-                        def flatten(nested_list):
-                            """ Flatten a nested list of fenodes """
-                            t_l = []
-                            for i in nested_list:
-                                if not isinstance(i, list):
-                                    t_l.append(i)
-                                else:
-                                    t_l.extend(flatten(i))
-                            return t_l
+    def add(self, counts):
+        """ Adds the frame_counts() of each role of one frame pair """
+        self.counts.append(counts)
 
-                        # Target
-                        if item[0].find('target'):
-                            target_gold = item[0].find('target')
-                            target_gold_fenode_id = target_gold.find('fenode').get('idref')
-                            target_gold_word = s_gold.find(id=target_gold_fenode_id).get('word').lower()
+    def frame_scores(self):
+        """ Returns metric -> array of the scores of each frame and role, shape (frames, roles) """
+        counts = np.array(self.counts, dtype=np.float64).reshape(len(self.counts), len(self.roles), 6)
+        tp, fp, fn, tn, equal, words = np.moveaxis(counts, -1, 0)
 
-                            try:
-                                target_test = item[1].find('target')
-                                target_test_fenode__id = target_test.find('fenode').get('idref')
-                                target_test_word = s_test.find(id=target_test_fenode__id).get('word').lower()
-                            except:
-                                target_test_word = ''
+        # Gold support and predictions of the labels 1 and 0
+        true_1 = tp + fn
+        pred_1 = tp + fp
+        true_0 = tn + fp
+        pred_0 = tn + fn
+        support = true_0 + true_1
 
-                        elif item[1].find('target'):
-                            target_test = item[1].find('target')
-                            target_test_fenode__id = target_test.find('fenode').get('idref')
-                            target_test_word = s_test.find(id=target_test_fenode__id).get('word').lower()
+        def weighted(score_0, score_1):
+            return divide(score_0 * true_0 + score_1 * true_1, support)
 
-                            try:
-                                target_gold = item[0].find('target')
-                                target_gold_fenode_id = target_gold.find('fenode').get('idref')
-                                target_gold_word = s_gold.find(id=target_gold_fenode_id).get('word').lower()
-                            except:
-                                target_gold_word = ''
+        return {
+            'precision': weighted(divide(tn, pred_0), divide(tp, pred_1)),
+            'recall': weighted(divide(tn, true_0), divide(tp, true_1)),
+            'f1': weighted(divide(2 * tn, true_0 + pred_0), divide(2 * tp, true_1 + pred_1)),
+            'jaccard': divide(equal, words),
+        }
 
-                        target_gold_list.append(target_gold_word)
-                        target_test_list.append(target_test_word)
+    def totals(self):
+        """ Returns role -> metric -> sum of the scores of all frames """
+        totals = {role: {} for role in self.roles}
+        for metric, scores in self.frame_scores().items():
+            # Summed in frame order, so the totals are the same as adding up each frame
+            sums = np.cumsum(scores, axis=0)[-1] if len(self.counts) else np.zeros(len(self.roles))
+            for role, total in zip(self.roles, sums.tolist()):
+                totals[role][metric] = total
+        return totals
 
-                        # Sort lists
-                        sorted_target_gold_list = sorted(flatten(target_gold_list))
-                        sorted_target_test_list = sorted(flatten(target_test_list))
 
-                        #print('\nTarget [Gold]:', sorted_target_gold_list)
-                        #print('Target [Test]:', sorted_target_test_list)
+def check_scorer(frames=2000, seed=1):
+    """ This function checks FrameScorer against sklearn.metrics on random frames.
+        sklearn is only needed for this check, install it with pip install scikit-learn.
 
+        Args:
+            frames (int): Number of random frames
+            seed (int): Seed of the random frames
 
-                        # Focus
-                        if item[0].find('fe', {'name' : FOCUS_TAG_NAME}):
-                            focus_gold = item[0].find('fe', {'name' : FOCUS_TAG_NAME})
-                            try:
-                                focus_gold_fenode_id = focus_gold.find('fenode').get('idref')
-                                focus_gold_word = s_gold.find(id=focus_gold_fenode_id).get('word').lower()
-                            except:
-                                focus_gold_word = ''
-                            if item[1].find('fe', {'name' : FOCUS_TAG_NAME}):
-                                focus_test = item[1].find('fe', {'name' : FOCUS_TAG_NAME})
-                                try:
-                                    focus_test_fenode_id = focus_test.find('fenode').get('idref')
-                                    focus_test_word = s_test.find(id=focus_test_fenode_id).get('word').lower()
-                                except:
-                                    focus_test_word = ''
-                            else:
-                                focus_test_word = ''
-
-                        elif item[1].find('fe', {'name' : FOCUS_TAG_NAME}):
-                            focus_test = item[1].find('fe', {'name' : FOCUS_TAG_NAME})
+        Returns:
+            True if all totals are the same as the sums of the per-frame sklearn scores
+
+        Example:
+            >>> check_scorer()
+            True
+    """
+
+    import random
+    from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+
+    generator = random.Random(seed)
+    scorer = FrameScorer(['frame'])
+    expected = {'precision': 0, 'recall': 0, 'f1': 0, 'jaccard': 0}
+
+    for frame in range(frames):
+        length = generator.randint(1, 8)
+        gold_labels = [generator.choice([0, 1, 1]) for position in range(length)]
+        test_labels = [generator.choice([0, 1]) for position in range(length)]
+        gold_words = sorted(generator.choice(['', 'nicht', 'kein', 'nie']) for position in range(length))
+        test_words = sorted(generator.choice(['', 'nicht', 'kein', 'nie']) for position in range(length))
+
+        scorer.add([frame_counts(gold_labels, test_labels, gold_words, test_words)])
+
+        # Per-frame scores of the sklearn calls FrameScorer replaces, jaccard_similarity_score
+        # of 1d lists was the share of equal items, as accuracy_score computes it
+        expected['precision'] = expected['precision'] + precision_score(gold_labels, test_labels, average='weighted',
+                                                                        zero_division=0)
+        expected['recall'] = expected['recall'] + recall_score(gold_labels, test_labels, average='weighted',
+                                                               zero_division=0)
+        expected['f1'] = expected['f1'] + f1_score(gold_labels, test_labels, average='weighted', zero_division=0)
+        expected['jaccard'] = expected['jaccard'] + accuracy_score(gold_words, test_words)
+
+    totals = scorer.totals()['frame']
+    for metric in sorted(expected):
+        print(metric + ':\t', totals[metric], 'sklearn:', expected[metric])
+
+    return totals == expected
+
+
+def evaluate_file(chapter_input_gold, chapter_input_test, gold_sentences=None):
+    """ This function compares one Gold standard file with its output file
+        and prints the scores for cuewords, focus, negated and scope.
+
+        Args:
+            chapter_input_gold (str): Path to a corpus gold file in xml format with frame annotations
+            chapter_input_test (str): Path to the same file created with detect_negation() module
+            gold_sentences (dict): Ordinal -> Sentence of the gold sentences with frames, if they were
+                                   already read, other gold sentences are read from the file when needed
+
+        Returns:
+            Nothing, the scores are printed
+
+        Example:
+            >>> evaluate_file('../res/xml/train/baskerville_ch4.jr.xml',
+            '../res/xml/train/output/tagged/baskerville_ch4.jr.xml')
+    """
+
+    # Console log
+    chapter_input_gold_name = chapter_input_gold
+    chapter_input_test_name = chapter_input_test
+    #print('Calculating score for: ' + chapter_input_gold_name + ' and: ' + chapter_input_test_name)
+
+    # Index Gold and Test files, see sentenceIndex.py
+    index_gold = load_index(chapter_input_gold)
+    index_test = load_index(chapter_input_test)
+
+    # Exit if number of sentences != between Gold and Test files
+    if len(index_gold) != len(index_test):
+        raise SystemExit(print('Number of sentences between Gold and Test files does not match.\nGold:',
+                               len(index_gold), 'Test:', len(index_test)))
+
+    # Read Gold and Test Sentences, sentences without frames in both files are skipped
+    positions = sorted(set(index_gold.select(FRAMES_FLAG)) | set(index_test.select(FRAMES_FLAG)))
+    if gold_sentences is None:
+        gold_sentences = dict(index_gold.iter_sentences(positions))
+    else:
+        gold_sentences = dict(gold_sentences)
+        gold_sentences.update(index_gold.iter_sentences([position for position in positions
+                                                         if position not in gold_sentences]))
+    sentences_gold = [gold_sentences[position] for position in positions]
+    sentences_test = [sentence for position, sentence in index_test.iter_sentences(positions)]
+
+    # Counts of each frame pair, scored once all frames are read
+    scorer = FrameScorer()
+
+    # Count sentences and frames
+    sentence_count = len(index_gold)
+    gold_frames_count = 0
+    test_frames_count = 0
+
+    scope_gold_frames_count = 0
+    #scope_test_frames_count = 0
+
+    #targets_gold = chapter_input_gold.find_all('target')
+    #targets_test = chapter_input_test.find_all('target')
+
+    scope_gold_frames = [fe for s_gold in sentences_gold for frame in s_gold.frames
+                         for fe in frame.fes if fe.name == SCOPE_TAG_NAME]
+    scope_gold_frames_count = len(scope_gold_frames)
+
+    scope_test_frames = [fe for s_test in sentences_test for frame in s_test.frames
+                         for fe in frame.fes if fe.name == SCOPE_TAG_NAME]
+    scope_test_frames_count = len(scope_test_frames)
+
+    # Zip Gold and Test Sentences
+    for s_gold, s_test in zip(sentences_gold, sentences_test):
+
+        gold_frames = [frame for frame in s_gold.frames if frame.name == NEGATION_FRAME_NAME]
+        test_frames = [frame for frame in s_test.frames if frame.name == NEGATION_FRAME_NAME]
+
+        gold_frames_count = gold_frames_count + len(gold_frames)
+        test_frames_count = test_frames_count + len(test_frames)
+
+        for item in zip(gold_frames, test_frames):
+
+            #print('\n=========')
+            #print('\nFrame:', item[0].get('id'))
+
+            target_gold_list = []
+            target_test_list = []
+
+            focus_gold_list = []
+            focus_test_list = []
+
+            negated_gold_list = []
+            negated_test_list = []
+
+            scope_gold_list = []
+            scope_test_list = []
+
+            # Flatten a nested list of fenodes
+            def flatten(nested_list):
+                """ Flatten a nested list of fenodes """
+                t_l = []
+                for i in nested_list:
+                    if not isinstance(i, list):
+                        t_l.append(i)
+                    else:
+                        t_l.extend(flatten(i))
+                return t_l
+
+            # Target
+            if item[0].target:
+                target_gold = item[0].target
+                target_gold_fenode_id = target_gold.fenodes[0]
+                target_gold_word = s_gold.get(target_gold_fenode_id).word.lower()
+
+                try:
+                    target_test = item[1].target
+                    target_test_fenode__id = target_test.fenodes[0]
+                    target_test_word = s_test.get(target_test_fenode__id).word.lower()
+                except:
+                    target_test_word = ''
+
+            elif item[1].target:
+                target_test = item[1].target
+                target_test_fenode__id = target_test.fenodes[0]
+                target_test_word = s_test.get(target_test_fenode__id).word.lower()
+
+                try:
+                    target_gold = item[0].target
+                    target_gold_fenode_id = target_gold.fenodes[0]
+                    target_gold_word = s_gold.get(target_gold_fenode_id).word.lower()
+                except:
+                    target_gold_word = ''
+
+            target_gold_list.append(target_gold_word)
+            target_test_list.append(target_test_word)
+
+            # Sort lists
+            sorted_target_gold_list = sorted(flatten(target_gold_list))
+            sorted_target_test_list = sorted(flatten(target_test_list))
+
+            #print('\nTarget [Gold]:', sorted_target_gold_list)
+            #print('Target [Test]:', sorted_target_test_list)
+
+
+            # Focus
+            if item[0].fe(FOCUS_TAG_NAME):
+                focus_gold = item[0].fe(FOCUS_TAG_NAME)
+                try:
+                    focus_gold_fenode_id = focus_gold.fenodes[0]
+                    focus_gold_word = s_gold.get(focus_gold_fenode_id).word.lower()
+                except:
+                    focus_gold_word = ''
+                if item[1].fe(FOCUS_TAG_NAME):
+                    focus_test = item[1].fe(FOCUS_TAG_NAME)
+                    try:
+                        focus_test_fenode_id = focus_test.fenodes[0]
+                        focus_test_word = s_test.get(focus_test_fenode_id).word.lower()
+                    except:
+                        focus_test_word = ''
+                else:
+                    focus_test_word = ''
+
+            elif item[1].fe(FOCUS_TAG_NAME):
+                focus_test = item[1].fe(FOCUS_TAG_NAME)
+                try:
+                    focus_test_fenode_id = focus_test.fenodes[0]
+                    focus_test_word = s_test.get(focus_test_fenode_id).word.lower()
+                except:
+                    focus_test_word = ''
+                if item[0].fe(FOCUS_TAG_NAME):
+                    focus_gold = item[0].fe(FOCUS_TAG_NAME)
+                    focus_gold_fenode_id = focus_gold.fenodes[0]
+                    try:
+                        focus_gold_word = s_gold.get(focus_gold_fenode_id).word.lower()
+                    except AttributeError:
+                        focus_gold_word = ''
+                else:
+                    focus_gold_word = ''
+
+            focus_gold_list.append(focus_gold_word)
+            focus_test_list.append(focus_test_word)
+
+            # Sort lists
+            sorted_focus_gold_list = sorted(flatten(focus_gold_list))
+            sorted_focus_test_list = sorted(flatten(focus_test_list))
+
+            #print('\nFocus [Gold]:', sorted_focus_gold_list)
+            #print('Focus [Test]:', sorted_focus_test_list)
+
+
+            # Negated
+            if item[0].fe(NEGATED_TAG_NAME):
+                negated_gold = item[0].fe(NEGATED_TAG_NAME)
+                negated_gold_fenode_id = negated_gold.fenodes[0]
+                try:
+                    negated_gold_word = s_gold.get(negated_gold_fenode_id).word.lower()
+                except AttributeError:
+                    negated_gold_word = ''
+                if item[1].fe(NEGATED_TAG_NAME):
+                    negated_test = item[1].fe(NEGATED_TAG_NAME)
+                    try:
+                        negated_test_fenode_id = negated_test.fenodes[0]
+                        negated_test_word = s_test.get(negated_test_fenode_id).word.lower()
+                    except:
+                        negated_test_word = ''
+                else:
+                    negated_test_word = ''
+
+            elif item[1].fe(NEGATED_TAG_NAME):
+                negated_test = item[1].fe(NEGATED_TAG_NAME)
+                try:
+                    negated_test_fenode_id = negated_test.fenodes[0]
+                    negated_test_word = s_test.get(negated_test_fenode_id).word.lower()
+                except:
+                    negated_test_word = ''
+                if item[0].fe(NEGATED_TAG_NAME):
+                    negated_gold = item[0].fe(NEGATED_TAG_NAME)
+                    negated_gold_fenode_id = negated_gold.fenodes[0]
+                    try:
+                        negated_gold_word = s_gold.get(negated_gold_fenode_id).word.lower()
+                    except AttributeError:
+                        negated_gold_word = ''
+                else:
+                    negated_gold_word = ''
+            else:
+                negated_test_word = ''
+                negated_gold_word = ''
+
+            negated_gold_list.append(negated_gold_word)
+            negated_test_list.append(negated_test_word)
+
+            # Sort lists
+            sorted_negated_gold_list = sorted(flatten(negated_gold_list))
+            sorted_negated_test_list = sorted(flatten(negated_test_list))
+
+            #print('\nNegated [Gold]:', sorted_negated_gold_list)
+            #print('Negated [Test]:', sorted_negated_test_list)
+
+
+            # Scope
+            if item[0].fe(SCOPE_TAG_NAME):
+                scope_gold = item[0].fe(SCOPE_TAG_NAME)
+                scope_gold_fenodes = scope_gold.fenodes
+                for s_id in scope_gold_fenodes:
+                    if s_gold.get(s_id).word is not None:
+                        try:
+                            scope_word = s_gold.get(s_id).word.lower()
+                            scope_gold_list.append(scope_word)
+                        except:
+                            pass
+                    if s_gold.get(s_id).word is None:
+                        scope_gold_list.append(resolve_non_terminals(s_gold, s_id))
+                    else:
+                        pass
+
+                if item[1].fe(SCOPE_TAG_NAME):
+                    scope_test = item[1].fe(SCOPE_TAG_NAME)
+                    scope_test_fenodes = scope_test.fenodes
+                    for s_id in scope_test_fenodes:
+                        if s_test.get(s_id).word is not None:
                             try:
-                                focus_test_fenode_id = focus_test.find('fenode').get('idref')
-                                focus_test_word = s_test.find(id=focus_test_fenode_id).get('word').lower()
+                                scope_word = s_test.get(s_id).word.lower()
+                                scope_test_list.append(scope_word)
                             except:
-                                focus_test_word = ''
-                            if item[0].find('fe', {'name' : FOCUS_TAG_NAME}):
-                                focus_gold = item[0].find('fe', {'name' : FOCUS_TAG_NAME})
-                                focus_gold_fenode_id = focus_gold.find('fenode').get('idref')
-                                try:
-                                    focus_gold_word = s_gold.find(id=focus_gold_fenode_id).get('word').lower()
-                                except AttributeError:
-                                    focus_gold_word = ''
-                            else:
-                                focus_gold_word = ''
-
-                        focus_gold_list.append(focus_gold_word)
-                        focus_test_list.append(focus_test_word)
-
-                        # Sort lists
-                        sorted_focus_gold_list = sorted(flatten(focus_gold_list))
-                        sorted_focus_test_list = sorted(flatten(focus_test_list))
-
-                        #print('\nFocus [Gold]:', sorted_focus_gold_list)
-                        #print('Focus [Test]:', sorted_focus_test_list)
-
-
-                        # Negated
-                        if item[0].find('fe', {'name' : NEGATED_TAG_NAME}):
-                            negated_gold = item[0].find('fe', {'name' : NEGATED_TAG_NAME})
-                            negated_gold_fenode_id = negated_gold.find('fenode').get('idref')
-                            try:
-                                negated_gold_word = s_gold.find(id=negated_gold_fenode_id).get('word').lower()
-                            except AttributeError:
-                                negated_gold_word = ''
-                            if item[1].find('fe', {'name' : NEGATED_TAG_NAME}):
-                                negated_test = item[1].find('fe', {'name' : NEGATED_TAG_NAME})
-                                try:
-                                    negated_test_fenode_id = negated_test.find('fenode').get('idref')
-                                    negated_test_word = s_test.find(id=negated_test_fenode_id).get('word').lower()
-                                except:
-                                    negated_test_word = ''
-                            else:
-                                negated_test_word = ''
-
-                        elif item[1].find('fe', {'name' : NEGATED_TAG_NAME}):
-                            negated_test = item[1].find('fe', {'name' : NEGATED_TAG_NAME})
+                                pass
+                        elif s_test.get(s_id).word is None:
+                            scope_test_list.append(resolve_non_terminals(s_test, s_id))
+                else:
+                    scope_test_list.append('')
+
+            elif item[1].fe(SCOPE_TAG_NAME):
+                scope_test = item[1].fe(SCOPE_TAG_NAME)
+                scope_test_fenodes = scope_test.fenodes
+                for s_id in scope_test_fenodes:
+                    if s_test.get(s_id).word is not None:
+                        try:
+                            scope_word = s_test.get(s_id).word.lower()
+                            scope_test_list.append(scope_word)
+                        except:
+                            pass
+                    if s_test.get(s_id).word is None:
+                        scope_test_list.append(resolve_non_terminals(s_test, s_id))
+                    else:
+                        pass
+
+                if item[0].fe(SCOPE_TAG_NAME):
+                    scope_gold = item[0].fe(SCOPE_TAG_NAME)
+                    scope_gold_fenodes = scope_gold.fenodes
+                    for s_id in scope_gold_fenodes:
+                        if s_gold.get(s_id).word is not None:
                             try:
-                                negated_test_fenode_id = negated_test.find('fenode').get('idref')
-                                negated_test_word = s_test.find(id=negated_test_fenode_id).get('word').lower()
+                                scope_word = s_gold.get(s_id).word.lower()
+                                scope_gold_list.append(scope_word)
                             except:
-                                negated_test_word = ''
-                            if item[0].find('fe', {'name' : NEGATED_TAG_NAME}):
-                                negated_gold = item[0].find('fe', {'name' : NEGATED_TAG_NAME})
-                                negated_gold_fenode_id = negated_gold.find('fenode').get('idref')
-                                try:
-                                    negated_gold_word = s_gold.find(id=negated_gold_fenode_id).get('word').lower()
-                                except AttributeError:
-                                    negated_gold_word = ''
-                            else:
-                                negated_gold_word = ''
+                                pass
+                        if s_gold.get(s_id).word is None:
+                            scope_gold_list.append(resolve_non_terminals(s_gold, s_id))
                         else:
-                            negated_test_word = ''
-                            negated_gold_word = ''
-
-                        negated_gold_list.append(negated_gold_word)
-                        negated_test_list.append(negated_test_word)
-
-                        # Sort lists
-                        sorted_negated_gold_list = sorted(flatten(negated_gold_list))
-                        sorted_negated_test_list = sorted(flatten(negated_test_list))
-
-                        #print('\nNegated [Gold]:', sorted_negated_gold_list)
-                        #print('Negated [Test]:', sorted_negated_test_list)
-
-
-                        # Resolve Terminals if Scope on a complex graph
-                        def resolve_non_terminals(idref):
-                            """ This function resolves a complex gold graph to
-                                a simple flat list of tokens.
-                            """
-                            nonterminal = s_gold.find(id=idref)
-                            edges = nonterminal.find_all('edge')
-                            edge_words = []
-                            for edge in edges:
-                                e_id = edge.get('idref')
-                                if s_gold.find(id=e_id).get('word') is not None:
-                                    try:
-                                        edge_word = s_gold.find(id=e_id).get('word').lower()
-                                        edge_words.append(edge_word)
-                                    except:
-                                        pass
-                                if s_gold.find(id=e_id).get('word') is None:
-                                    edge_words.append(resolve_non_terminals(e_id))
-
-                            return edge_words
-
-                        def resolve_non_terminals_test(idref):
-                            """ This function resolves a complex test graph to
-                                a simple flat list of tokens.
-                            """
-                            nonterminal = s_test.find(id=idref)
-                            edges = nonterminal.find_all('edge')
-                            edge_words = []
-                            for edge in edges:
-                                e_id = edge.get('idref')
-                                if s_test.find(id=e_id).get('word') is not None:
-                                    try:
-                                        edge_word = s_test.find(id=e_id).get('word').lower()
-                                        edge_words.append(edge_word)
-                                    except:
-                                        pass
-                                if s_test.find(id=e_id).get('word') is None:
-                                    edge_words.append(resolve_non_terminals(e_id))
-
-                            return edge_words
-
-                        # Scope
-                        if item[0].find('fe', {'name' : SCOPE_TAG_NAME}):
-                            scope_gold = item[0].find('fe', {'name' : SCOPE_TAG_NAME})
-                            scope_gold_fenodes = scope_gold.find_all('fenode')
-                            for s_g in scope_gold_fenodes:
-                                s_id = s_g.get('idref')
-                                if s_gold.find(id=s_id).get('word') is not None:
-                                    try:
-                                        scope_word = s_gold.find(id=s_id).get('word').lower()
-                                        scope_gold_list.append(scope_word)
-                                    except:
-                                        pass
-                                if s_gold.find(id=s_id).get('word') is None:
-                                    scope_gold_list.append(resolve_non_terminals(s_id))
-                                else:
-                                    pass
-
-                            if item[1].find('fe', {'name' : SCOPE_TAG_NAME}):
-                                scope_test = item[1].find('fe', {'name' : SCOPE_TAG_NAME})
-                                scope_test_fenodes = scope_test.find_all('fenode')
-                                for s_t in scope_test_fenodes:
-                                    s_id = s_t.get('idref')
-                                    if s_test.find(id=s_id).get('word') is not None:
-                                        try:
-                                            scope_word = s_test.find(id=s_id).get('word').lower()
-                                            scope_test_list.append(scope_word)
-                                        except:
-                                            pass
-                                    elif s_test.find(id=s_id).get('word') is None:
-                                        scope_test_list.append(resolve_non_terminals_test(s_id))
-                            else:
-                                scope_test_list.append('')
-
-                        elif item[1].find('fe', {'name' : SCOPE_TAG_NAME}):
-                            scope_test = item[1].find('fe', {'name' : SCOPE_TAG_NAME})
-                            scope_test_fenodes = scope_test.find_all('fenode')
-                            for s_t in scope_test_fenodes:
-                                s_id = s_t.get('idref')
-                                if s_test.find(id=s_id).get('word') is not None:
-                                    try:
-                                        scope_word = s_test.find(id=s_id).get('word').lower()
-                                        scope_test_list.append(scope_word)
-                                    except:
-                                        pass
-                                if s_test.find(id=s_id).get('word') is None:
-                                    scope_test_list.append(resolve_non_terminals_test(s_id))
-                                else:
-                                    pass
-
-                            if item[0].find('fe', {'name' : SCOPE_TAG_NAME}):
-                                scope_gold = item[1].find('fe', {'name' : SCOPE_TAG_NAME})
-                                scope_gold_fenodes = scope_gold.find_all('fenode')
-                                for s_g in scope_gold_fenodes:
-                                    s_id = s_g.get('idref')
-                                    if s_gold.find(id=s_id).get('word') is not None:
-                                        try:
-                                            scope_word = s_gold.find(id=s_id).get('word').lower()
-                                            scope_gold_list.append(scope_word)
-                                        except:
-                                            pass
-                                    if s_gold.find(id=s_id).get('word') is None:
-                                        scope_gold_list.append(resolve_non_terminals(s_id))
-                                    else:
-                                        pass
-                            else:
-                                scope_gold_list.append('')
-
-                        # Sort lists
-                        sorted_scope_gold_list = sorted(flatten(scope_gold_list))
-                        sorted_scope_test_list = sorted(flatten(scope_test_list))
-
-                        #print('\nScope [Gold]:', sorted_scope_gold_list)
-                        #print('Scope [Test]:', sorted_scope_test_list)
-
-
-                        # If lists are same length, check if items are same
-                        if len(sorted_scope_gold_list) == len(sorted_scope_test_list):
-                            sorted_scope_test_list_intersection = set(sorted_scope_gold_list).intersection(sorted_scope_test_list)
-                            sorted_scope_test_list_intersection = list(sorted_scope_test_list_intersection)
-                            if len(sorted_scope_test_list_intersection) < len(sorted_scope_test_list):
-                                difference = len(sorted_scope_test_list) - len(sorted_scope_test_list_intersection)
-                                empty_element = 0
-
-                                while empty_element < difference:
-                                    sorted_scope_test_list_intersection.append('')
-                                    empty_element = empty_element + 1
-                                    
-                                sorted_scope_test_list = sorted_scope_test_list_intersection
-
-                        # If lists are different lengths, add empty elements
-                        elif len(sorted_scope_gold_list) > len(sorted_scope_test_list):
-                            difference = len(sorted_scope_gold_list) - len(sorted_scope_test_list)
-                            empty_element = 0
-
-                            while empty_element < difference:
-                                sorted_scope_test_list.append('')
-                                empty_element = empty_element + 1
-
-                        elif len(sorted_scope_test_list) > len(sorted_scope_gold_list):
-                            difference = len(sorted_scope_test_list) - len(sorted_scope_gold_list)
-                            empty_element = 0
-
-                            while empty_element < difference:
-                                sorted_scope_gold_list.append('')
-                                empty_element = empty_element + 1
-
-
-                        # Align items in the lists for sklearn, set 1 for matched items, else set 0
-                        sorted_target_gold_list_normalized = [1 if element in sorted_target_gold_list and not element == "" else 0 for element in sorted_target_gold_list]
-                        sorted_target_test_list_normalized = [1 if element in sorted_target_gold_list else 0 for element in sorted_target_test_list]
-
-                        sorted_focus_gold_list_normalized = [1 if element in sorted_focus_gold_list and not element == "" else 0 for element in sorted_focus_gold_list]
-                        sorted_focus_test_list_normalized = [1 if element in sorted_focus_gold_list else 0 for element in sorted_focus_test_list]
-
-                        sorted_negated_gold_list_normalized = [1 if element in sorted_negated_gold_list and not element == "" else 0 for element in sorted_negated_gold_list]
-                        sorted_negated_test_list_normalized = [1 if element in sorted_negated_gold_list else 0 for element in sorted_negated_test_list]
-
-                        sorted_scope_gold_list_normalized = [1 if element in sorted_scope_gold_list and not element == "" else 0 for element in sorted_scope_gold_list]
-                        sorted_scope_test_list_normalized = [1 if element in sorted_scope_gold_list else 1 if not element == "" else 0 for element in sorted_scope_test_list]
-
-                        #print(sorted_scope_gold_list_normalized)
-                        #print(sorted_scope_test_list_normalized)
-
-
-                        # Sklearn calculations
-                        #target_precision_scores = target_precision_scores + precision_score(sorted_target_gold_list_normalized, sorted_target_test_list_normalized, average='weighted')
-                        #target_recall_scores = target_recall_scores + recall_score(sorted_target_gold_list_normalized, sorted_target_test_list_normalized, average='weighted')
-                        target_f1_scores =  target_f1_scores + f1_score(sorted_target_gold_list_normalized, sorted_target_test_list_normalized, average='weighted')
-                        #target_jaccard_scores = target_jaccard_scores + jaccard_similarity_score(sorted_target_gold_list, sorted_target_test_list)
-
-                        #focus_precision_scores = focus_precision_scores + precision_score(sorted_focus_gold_list_normalized, sorted_focus_test_list_normalized, average='weighted')
-                        #focus_recall_scores = focus_recall_scores + recall_score(sorted_focus_gold_list_normalized, sorted_focus_test_list_normalized, average='weighted')
-                        focus_f1_scores =  focus_f1_scores + f1_score(sorted_focus_gold_list_normalized, sorted_focus_test_list_normalized, average='weighted')
-                        #focus_jaccard_scores = focus_jaccard_scores + jaccard_similarity_score(sorted_focus_gold_list, sorted_focus_test_list)
-
-                        #negated_precision_scores = negated_precision_scores + precision_score(sorted_negated_gold_list_normalized, sorted_negated_test_list_normalized, average='weighted')
-                        #negated_recall_scores = negated_recall_scores + recall_score(sorted_negated_gold_list_normalized, sorted_negated_test_list_normalized, average='weighted')
-                        negated_f1_scores =  negated_f1_scores + f1_score(sorted_negated_gold_list_normalized, sorted_negated_test_list_normalized, average='weighted')
-                        #negated_jaccard_scores = negated_jaccard_scores + jaccard_similarity_score(sorted_negated_gold_list, sorted_negated_test_list)
-
-                        scope_precision_scores = scope_precision_scores + precision_score(sorted_scope_gold_list_normalized, sorted_scope_test_list_normalized, average='weighted')
-                        scope_recall_scores = scope_recall_scores + recall_score(sorted_scope_gold_list_normalized, sorted_scope_test_list_normalized, average='weighted')
-                        scope_f1_scores =  scope_f1_scores + f1_score(sorted_scope_gold_list_normalized, sorted_scope_test_list_normalized, average='weighted')
-                        scope_jaccard_scores = scope_jaccard_scores + jaccard_similarity_score(sorted_scope_gold_list, sorted_scope_test_list)
-
-
-                print('\n=============================')
-                print('====== EVALUATION for:', chapter_input_test_name, '======')
-                print('Total Sentences:', sentence_count,
-                      '\nNegation Gold frames:', gold_frames_count,
-                      '\nNegation Test frames:', test_frames_count, '\n')
-
-                print('----- CUEWORDS -----')
-                #print('Precision:\t', target_precision_scores / gold_frames_count)
-                #print('Recall:\t', target_recall_scores / gold_frames_count)
-                print('F1 score:\t', target_f1_scores / gold_frames_count)
-                #print('Jaccard similarity:\t', target_jaccard_scores / gold_frames_count)
-
-                print('\n----- FOCUS -----')
-                #print('Precision:\t', focus_precision_scores / gold_frames_count)
-                #print('Recall:\t', focus_recall_scores / gold_frames_count)
-                print('F1 score:\t', focus_f1_scores / gold_frames_count)
-                #print('Jaccard similarity:\t', focus_jaccard_scores / gold_frames_count)
-
-                print('\n----- NEGATED -----')
-                #print('Precision:\t', negated_precision_scores / gold_frames_count)
-                #print('Recall:\t', negated_recall_scores / gold_frames_count)
-                print('F1 score:\t', negated_f1_scores / gold_frames_count)
-                #print('Jaccard similarity:\t', negated_jaccard_scores / gold_frames_count)
+                            pass
+                else:
+                    scope_gold_list.append('')
+
+            # Sort lists
+            sorted_scope_gold_list = sorted(flatten(scope_gold_list))
+            sorted_scope_test_list = sorted(flatten(scope_test_list))
+
+            #print('\nScope [Gold]:', sorted_scope_gold_list)
+            #print('Scope [Test]:', sorted_scope_test_list)
+
+
+            # If lists are same length, check if items are same
+            if len(sorted_scope_gold_list) == len(sorted_scope_test_list):
+                # Sorted, so the words line up with the Gold list the same way in every run
+                sorted_scope_test_list_intersection = sorted(set(sorted_scope_gold_list).intersection(sorted_scope_test_list))
+                if len(sorted_scope_test_list_intersection) < len(sorted_scope_test_list):
+                    difference = len(sorted_scope_test_list) - len(sorted_scope_test_list_intersection)
+                    empty_element = 0
+
+                    while empty_element < difference:
+                        sorted_scope_test_list_intersection.append('')
+                        empty_element = empty_element + 1
+                        
+                    sorted_scope_test_list = sorted_scope_test_list_intersection
+
+            # If lists are different lengths, add empty elements
+            elif len(sorted_scope_gold_list) > len(sorted_scope_test_list):
+                difference = len(sorted_scope_gold_list) - len(sorted_scope_test_list)
+                empty_element = 0
+
+                while empty_element < difference:
+                    sorted_scope_test_list.append('')
+                    empty_element = empty_element + 1
+
+            elif len(sorted_scope_test_list) > len(sorted_scope_gold_list):
+                difference = len(sorted_scope_test_list) - len(sorted_scope_gold_list)
+                empty_element = 0
+
+                while empty_element < difference:
+                    sorted_scope_gold_list.append('')
+                    empty_element = empty_element + 1
+
+
+            # Align items in the lists for scoring, set 1 for matched items, else set 0
+            sorted_target_gold_list_normalized = [1 if element in sorted_target_gold_list and not element == "" else 0 for element in sorted_target_gold_list]
+            sorted_target_test_list_normalized = [1 if element in sorted_target_gold_list else 0 for element in sorted_target_test_list]
+
+            sorted_focus_gold_list_normalized = [1 if element in sorted_focus_gold_list and not element == "" else 0 for element in sorted_focus_gold_list]
+            sorted_focus_test_list_normalized = [1 if element in sorted_focus_gold_list else 0 for element in sorted_focus_test_list]
+
+            sorted_negated_gold_list_normalized = [1 if element in sorted_negated_gold_list and not element == "" else 0 for element in sorted_negated_gold_list]
+            sorted_negated_test_list_normalized = [1 if element in sorted_negated_gold_list else 0 for element in sorted_negated_test_list]
+
+            sorted_scope_gold_list_normalized = [1 if element in sorted_scope_gold_list and not element == "" else 0 for element in sorted_scope_gold_list]
+            sorted_scope_test_list_normalized = [1 if element in sorted_scope_gold_list else 1 if not element == "" else 0 for element in sorted_scope_test_list]
+
+            #print(sorted_scope_gold_list_normalized)
+            #print(sorted_scope_test_list_normalized)
+
+
+            scorer.add([frame_counts(sorted_target_gold_list_normalized, sorted_target_test_list_normalized,
+                                     sorted_target_gold_list, sorted_target_test_list),
+                        frame_counts(sorted_focus_gold_list_normalized, sorted_focus_test_list_normalized,
+                                     sorted_focus_gold_list, sorted_focus_test_list),
+                        frame_counts(sorted_negated_gold_list_normalized, sorted_negated_test_list_normalized,
+                                     sorted_negated_gold_list, sorted_negated_test_list),
+                        frame_counts(sorted_scope_gold_list_normalized, sorted_scope_test_list_normalized,
+                                     sorted_scope_gold_list, sorted_scope_test_list)])
+
+    # Scores of all frames and roles
+    totals = scorer.totals()
+    target_precision_scores = totals['target']['precision']
+    target_recall_scores = totals['target']['recall']
+    target_f1_scores = totals['target']['f1']
+    target_jaccard_scores = totals['target']['jaccard']
+
+    focus_precision_scores = totals['focus']['precision']
+    focus_recall_scores = totals['focus']['recall']
+    focus_f1_scores = totals['focus']['f1']
+    focus_jaccard_scores = totals['focus']['jaccard']
+
+    negated_precision_scores = totals['negated']['precision']
+    negated_recall_scores = totals['negated']['recall']
+    negated_f1_scores = totals['negated']['f1']
+    negated_jaccard_scores = totals['negated']['jaccard']
+
+    scope_precision_scores = totals['scope']['precision']
+    scope_recall_scores = totals['scope']['recall']
+    scope_f1_scores = totals['scope']['f1']
+    scope_jaccard_scores = totals['scope']['jaccard']
+
+
+    print('\n=============================')
+    print('====== EVALUATION for:', chapter_input_test_name, '======')
+    print('Total Sentences:', sentence_count,
+          '\nNegation Gold frames:', gold_frames_count,
+          '\nNegation Test frames:', test_frames_count, '\n')
+
+    print('----- CUEWORDS -----')
+    #print('Precision:\t', target_precision_scores / gold_frames_count)
+    #print('Recall:\t', target_recall_scores / gold_frames_count)
+    print('F1 score:\t', target_f1_scores / gold_frames_count)
+    #print('Jaccard similarity:\t', target_jaccard_scores / gold_frames_count)
+
+    print('\n----- FOCUS -----')
+    #print('Precision:\t', focus_precision_scores / gold_frames_count)
+    #print('Recall:\t', focus_recall_scores / gold_frames_count)
+    print('F1 score:\t', focus_f1_scores / gold_frames_count)
+    #print('Jaccard similarity:\t', focus_jaccard_scores / gold_frames_count)
+
+    print('\n----- NEGATED -----')
+    #print('Precision:\t', negated_precision_scores / gold_frames_count)
+    #print('Recall:\t', negated_recall_scores / gold_frames_count)
+    print('F1 score:\t', negated_f1_scores / gold_frames_count)
+    #print('Jaccard similarity:\t', negated_jaccard_scores / gold_frames_count)
+
+    print('\n----- SCOPE -----\nScope Gold frames:', scope_gold_frames_count, '\nScope Test frames:', scope_test_frames_count, '\n')
+    print('Precision:\t', scope_precision_scores / scope_test_frames_count)
+    print('Recall:\t', scope_recall_scores / scope_test_frames_count)
+    print('F1 score:\t', scope_f1_scores / scope_test_frames_count)
+    print('Jaccard similarity:\t', scope_jaccard_scores / scope_test_frames_count)
 
-                print('\n----- SCOPE -----\nScope Gold frames:', scope_gold_frames_count, '\nScope Test frames:', scope_test_frames_count, '\n')
-                print('Precision:\t', scope_precision_scores / scope_test_frames_count)
-                print('Recall:\t', scope_recall_scores / scope_test_frames_count)
-                print('F1 score:\t', scope_f1_scores / scope_test_frames_count)
-                print('Jaccard similarity:\t', scope_jaccard_scores / scope_test_frames_count)
 
-    print('Done!')
+if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description='Evaluate the tagged files against the Gold standard')
+    parser.add_argument('--check-scorer', action='store_true',
+                        help='Check the scorer against sklearn.metrics on random frames instead')
+    arguments = parser.parse_args()
 
+    if arguments.check_scorer:
+        sys.exit(0 if check_scorer() else 1)
 
-if __name__ == "__main__":
     evaluate(XML_TRAIN_FILES_PATH, XML_TRAIN_FILES_TAGGED_PATH)
 
@@ -23,8 +23,9 @@ import codecs
 import os
 import sys
 
-from bs4 import BeautifulSoup
-import lxml
+from artifactCache import cached_call
+from corpusModel import iter_corpus
+from processPool import list_xml_files, map_files
 
 XML_TRAIN_FILES_PATH = '../../res/xml/train/'
 XML_TRAIN_FILES_OUTPUT_PATH = '../../res/xml/train/output/'
@@ -37,13 +38,15 @@ CUEWORDS_FILE_POS_TAGGED = 'baskerville_cuewords_postagged.txt'
 
 NEGATION_FRAME_NAME = 'Negation' #CaseSensitive
 
-def extract_cuewords(cuewords, xml_file_path):
+def extract_cuewords(cuewords, xml_file_path, cuewords_path=CUEWORDS_DATA_PATH, workers=1):
     """ This function extracts negation cuewords from xml files
         and writes them into a txt file, one word per line.
 
         Args:
             cuewords (str): Path to an empty txt file for output
             xml_file_path (str): Path to input files
+            cuewords_path (str): Path for output, defaults to CUEWORDS_DATA_PATH
+            workers (int): Number of processes, files are read in parallel if > 1
 
         Returns:
             Two written files with negation cues alphabetically sorted
@@ -53,60 +56,47 @@ def extract_cuewords(cuewords, xml_file_path):
             >>> extract_cuewords('../res/cuewords/baskerville_cuewords.txt', '../res/xml/train/')
     """
 
-    try:
-        file_output = open(CUEWORDS_DATA_PATH+CUEWORDS_FILE, 'w', encoding='utf8')
-        file_output_pos_tagged = open(CUEWORDS_DATA_PATH+CUEWORDS_FILE_POS_TAGGED,
-                                      'w', encoding='utf8')
-
-    except FileNotFoundError:
-        print('Please set correct filenames')
+    # Empty sets to collect data for all files
+    all_cuewords = set()
+    all_cuewords_pos_tagged = set()
 
-    # Empty lists for collecting data per file
-    cueword_ids = []
-    cuewords = []
+    print('Extracting cuewords from:', xml_file_path, 'to:', cuewords_path+CUEWORDS_FILE)
 
-    # Empty list to collect data for all files
-    all_cuewords = []
-    all_cuewords_pos_tagged = []
+    # Go through all files in xml_file_path directory and merge their cuewords
+    jobs = [('cuewords', collect_cuewords, (file,), [file]) for file in list_xml_files(xml_file_path)]
+    for file_cuewords, file_cuewords_pos_tagged in map_files(cached_call, jobs, workers):
+        all_cuewords.update(file_cuewords)
+        all_cuewords_pos_tagged.update(file_cuewords_pos_tagged)
 
-    print('Extracting cuewords from:', xml_file_path, 'to:', CUEWORDS_DATA_PATH+CUEWORDS_FILE)
+    write_cuewords(all_cuewords, all_cuewords_pos_tagged, cuewords_path)
 
-    # Go through all files in xml_file_path directory
-    for file in os.listdir(xml_file_path):
+def write_cuewords(all_cuewords, all_cuewords_pos_tagged, cuewords_path=CUEWORDS_DATA_PATH):
+    """ This function writes collected cuewords into two txt files, one word per line.
 
-        # For each file, open, parseXML
-        file = xml_file_path+file
-
-        # Open files only, ignore subdirectories
-        if os.path.isfile(file) and file.lower().endswith('.xml'):
-
-            file_input = open(file, 'r', encoding='utf8')
-            file_input = BeautifulSoup(file_input, 'xml')
+        Args:
+            all_cuewords (set): Cuewords in lowercase
+            all_cuewords_pos_tagged (set): Cuewords with POS tags
+            cuewords_path (str): Path for output, defaults to CUEWORDS_DATA_PATH
 
-            # Collect frames, get ids
-            for frame in file_input.find_all('frame', {'name' : NEGATION_FRAME_NAME}):
-                for target in frame.find_all('target'):
-                    for fenode in target.find_all('fenode'):
-                        cueword_ids.insert(0, fenode.get('idref'))
+        Returns:
+            Two written files with negation cues alphabetically sorted
+            and without duplicates, one file contains POS tags.
 
-            # Find all splitwords
-            for splitword in file_input.find_all('splitword'):
-                cueword_ids.insert(0, splitword.get('idref'))
+        Example:
+            >>> write_cuewords({'nicht'}, {'nicht\tPTKNEG'})
+    """
 
-            # Find all terminals, check if its ID is in cueword_ids[]
-            for terminal in file_input.find_all('t'):
-                if terminal.get('id') in cueword_ids:
-                    all_cuewords.insert(0, terminal.get('word').lower())
-                    all_cuewords_pos_tagged.insert(0, terminal.get('word').lower()+
-                                                   '\t'+terminal.get('pos'))
+    try:
+        file_output = open(cuewords_path+CUEWORDS_FILE, 'w', encoding='utf8')
+        file_output_pos_tagged = open(cuewords_path+CUEWORDS_FILE_POS_TAGGED,
+                                      'w', encoding='utf8')
 
-            # clear list for next document
-            cueword_ids = []
-            cuewords = []
+    except FileNotFoundError:
+        print('Please set correct filenames')
 
     # Sort final list
-    all_cuewords = sorted(set(all_cuewords))
-    all_cuewords_pos_tagged = sorted(set(all_cuewords_pos_tagged))
+    all_cuewords = sorted(all_cuewords)
+    all_cuewords_pos_tagged = sorted(all_cuewords_pos_tagged)
 
     # Write cuewords without duplicates to file:
     for cueword in all_cuewords:
@@ -122,5 +112,56 @@ def extract_cuewords(cuewords, xml_file_path):
     print('Cuewords extracted and POS tagged to:', file_output_pos_tagged.name)
     print('Done!')
 
+def collect_cuewords(file):
+    """ This function collects the negation cuewords of one xml file.
+
+        Args:
+            file (str): Path to a corpus file in xml format
+
+        Returns:
+            Two sets, the cuewords in lowercase and the cuewords with POS tags
+
+        Example:
+            >>> collect_cuewords('../res/xml/train/baskerville_ch4.jr.xml')
+    """
+
+    cuewords = set()
+    cuewords_pos_tagged = set()
+
+    for sentence in iter_corpus(file):
+        add_cuewords(sentence, cuewords, cuewords_pos_tagged)
+
+    return cuewords, cuewords_pos_tagged
+
+def add_cuewords(sentence, cuewords, cuewords_pos_tagged):
+    """ This function adds the negation cuewords of one sentence to two sets.
+
+        Args:
+            sentence (Sentence): Sentence from corpusModel.py
+            cuewords (set): Cuewords in lowercase
+            cuewords_pos_tagged (set): Cuewords with POS tags
+
+        Example:
+            >>> add_cuewords(sentence, cuewords, cuewords_pos_tagged)
+    """
+
+    # Empty set for collecting ids of this sentence
+    cueword_ids = set()
+
+    # Collect frames, get ids
+    for frame in sentence.frames:
+        if frame.name == NEGATION_FRAME_NAME and frame.target is not None:
+            cueword_ids.update(frame.target.fenodes)
+
+    # Find all splitwords
+    for splitword in sentence.splitwords:
+        cueword_ids.add(splitword.idref)
+
+    # Find all terminals, check if its ID is in cueword_ids
+    for terminal in sentence.terminals:
+        if terminal.id in cueword_ids:
+            cuewords.add(terminal.lower)
+            cuewords_pos_tagged.add(terminal.lower+'\t'+terminal.pos)
+
 if __name__ == "__main__":
     extract_cuewords(CUEWORDS_FILE, XML_TRAIN_FILES_PATH)
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+fused_pipeline
+
+Short description:
+This module runs the training stages that read the gold files in one pass.
+Each chapter is parsed once and every sentence is handed to the cueword
+collector, the statistics writer, the CoNLL writer and the frame remover.
+Gold sentences with frames are kept for the evaluation.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import os
+
+from artifactCache import cached_call
+from corpusModel import read_sentence
+from cueWordsStatistics import write_statistics
+from extractCueWords import add_cuewords, write_cuewords
+from processPool import list_xml_files, map_files
+from removeFrames import strip_sentences
+from streamCorpus import rewrite_sentences
+from xmlToConll import write_conll
+
+XML_TRAIN_FILES_PATH = '../../res/xml/train/'
+XML_TRAIN_FILES_OUTPUT_PATH = '../../res/xml/train/output/'
+
+CUEWORDS_DATA_PATH = '../../res/cuewords/'
+CUEWORDS_STATS_PATH = '../../res/cuewords/stats/'
+
+CONLL_PATH = '../../res/conll/'
+
+
+def fused_train(xml_file_path, xml_output_file_path, cuewords_path=CUEWORDS_DATA_PATH,
+                stats_path=CUEWORDS_STATS_PATH, conll_path=CONLL_PATH, workers=1):
+    """ This function extracts cuewords, writes cueword statistics and CoNLL files
+        and removes Negation frames, reading each gold file only once.
+        The written files are the same as from extract_cuewords(), cueword_statistics(),
+        xml_to_conll() and remove_frames().
+
+        Args:
+            xml_file_path (str): Path to corpus gold files in xml format
+            xml_output_file_path (str): Path for the files without frame annotations
+            cuewords_path (str): Path for the cuewords files, defaults to CUEWORDS_DATA_PATH
+            stats_path (str): Path for the statistics files, defaults to CUEWORDS_STATS_PATH
+            conll_path (str): Path for the CoNLL files, defaults to CONLL_PATH
+            workers (int): Number of processes, files are read in parallel if > 1
+
+        Returns:
+            Gold sentences for evaluate(), file name -> {ordinal: Sentence} of all sentences with frames
+
+        Example:
+            >>> gold = fused_train('../../res/xml/train/', '../../res/xml/train/output/')
+            >>> evaluate('../../res/xml/train/', '../../res/xml/train/output/tagged/', gold=gold)
+    """
+
+    if not os.path.exists(xml_output_file_path):
+        os.makedirs(xml_output_file_path)
+
+    print('Reading:', xml_file_path, 'once for cuewords, statistics, CoNLL and frame removal')
+
+    # Empty sets to collect data for all files
+    all_cuewords = set()
+    all_cuewords_pos_tagged = set()
+    gold = {}
+
+    jobs = []
+    for file in list_xml_files(xml_file_path):
+        name = os.path.split(file)[-1]
+        jobs.append(('fused', fuse_file, (file, xml_output_file_path, stats_path, conll_path), [file],
+                     [xml_output_file_path+name, stats_path+name+'_stats.txt', conll_path+name+'.conll'],
+                     [], ['cueWordsStatistics', 'extractCueWords', 'removeFrames', 'xmlToConll']))
+
+    for name, file_cuewords, file_cuewords_pos_tagged, file_gold in map_files(cached_call, jobs, workers):
+        all_cuewords.update(file_cuewords)
+        all_cuewords_pos_tagged.update(file_cuewords_pos_tagged)
+        gold[name] = file_gold
+
+    write_cuewords(all_cuewords, all_cuewords_pos_tagged, cuewords_path)
+
+    return gold
+
+
+def fuse_file(file, xml_output_file_path, stats_path=CUEWORDS_STATS_PATH, conll_path=CONLL_PATH):
+    """ This function runs all training stages on one gold file, parsing it once.
+
+        Args:
+            file (str): Path to a corpus gold file in xml format
+            xml_output_file_path (str): Path for the file without frame annotations
+            stats_path (str): Path for the statistics file, defaults to CUEWORDS_STATS_PATH
+            conll_path (str): Path for the CoNLL file, defaults to CONLL_PATH
+
+        Returns:
+            Tuple of (file name, cuewords, cuewords with POS tags, {ordinal: Sentence} of sentences with frames)
+
+        Example:
+            >>> fuse_file('../../res/xml/train/baskerville_ch4.jr.xml', '../../res/xml/train/output/')
+    """
+
+    name = os.path.split(file)[-1]
+
+    stats_output = open(stats_path+name+'_stats.txt', 'w', encoding='utf8')
+    conll_output = open(conll_path+name+'.conll', 'w', encoding='utf8')
+
+    cuewords = set()
+    cuewords_pos_tagged = set()
+    gold = {}
+    last_focus = [None, None]
+
+    # Console log
+    print('Reading: ' + file + ' to: ' + xml_output_file_path+name + ', ' + stats_output.name + ', ' + conll_output.name)
+
+    def read_sentences(sentences):
+        """ Hands each sentence to the stages before its frames are removed """
+        for position, element in enumerate(sentences):
+            sentence = read_sentence(element)
+
+            add_cuewords(sentence, cuewords, cuewords_pos_tagged)
+            write_statistics(sentence, stats_output, last_focus)
+            write_conll(sentence, conll_output)
+
+            if sentence.frames:
+                gold[position] = sentence
+
+            yield element
+
+    rewrite_sentences(file, xml_output_file_path+name, lambda sentences: strip_sentences(read_sentences(sentences)))
+
+    stats_output.close()
+    conll_output.close()
+
+    return name, cuewords, cuewords_pos_tagged, gold
+
+
+if __name__ == "__main__":
+    fused_train(XML_TRAIN_FILES_PATH, XML_TRAIN_FILES_OUTPUT_PATH)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+negation_frames
+
+Short description:
+This module holds the splitwords and Negation frames that the detection
+creates for a sentence, as plain objects from corpusModel.py, and writes
+them out once the sentence is done. Serializers write them as SALSA XML
+into the sentence, as JSON or inline in the format of res/xml/simplified/.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+from html import escape
+
+from lxml import etree
+
+from corpusModel import Frame, FrameElement, Part, Splitword
+
+TARGET_NAME = 'target'
+
+# Tags of the inline format, in the order they are opened
+INLINE_ROLES = ['scope', 'focus', 'negation']
+
+# Tags of the inline format and the frame elements they mark, a terminal
+# in several frames is marked with the id of the first frame in this order
+INLINE_FRAME_ELEMENTS = [('negation', TARGET_NAME), ('scope', 'scope'), ('focus', 'focus')]
+
+
+class SentenceFrames:
+    """ The splitwords and frames created for a sentence, with a frame counter,
+        so new frames and their parts are found without searching the xml tree.
+
+        Args:
+            sentence (Sentence): The sentence before detection, see corpusModel.py
+            frame_name (str): Name of the frames counted for new frame ids
+
+        Example:
+            >>> frames = SentenceFrames(sentence, 'Negation')
+            >>> frames.add_frame('Negation').id
+            's12_f1'
+    """
+
+    __slots__ = ('id', 'splitwords', 'frames', 'count', 'blocks', 'first_splitwords', 'part_ids')
+
+    def __init__(self, sentence, frame_name):
+        self.id = sentence.id
+        self.splitwords = []
+        self.frames = []
+
+        # Frames of the sentence with the same name, new frames are numbered after them
+        self.count = sum(1 for frame in sentence.frames if frame.name == frame_name)
+
+        # <splitwords> and <frames> in the order they are first used
+        self.blocks = []
+
+        # Terminal id -> first splitword of the terminal, including splitwords of the input
+        self.first_splitwords = {}
+        for splitword in sentence.splitwords:
+            self.first_splitwords.setdefault(splitword.idref, splitword)
+
+        # Ids of new parts, their fenodes are marked with is_split
+        self.part_ids = set()
+
+    def __bool__(self):
+        return bool(self.splitwords or self.frames)
+
+    def add_splitword(self, idref, wordpart_1, wordpart_2):
+        """ Creates a splitword of a terminal with two parts """
+        parts = [Part(idref+'_s0', wordpart_1), Part(idref+'_s1', wordpart_2)]
+        splitword = Splitword(idref, parts)
+
+        if 'splitwords' not in self.blocks:
+            self.blocks.append('splitwords')
+        self.splitwords.append(splitword)
+        self.first_splitwords.setdefault(idref, splitword)
+        self.part_ids.update(part.id for part in parts)
+
+        return splitword
+
+    def part_id(self, idref, word):
+        """ Returns the id of the first part with the given word of the first splitword of a terminal """
+        for part in self.first_splitwords[idref].parts:
+            if part.word == word:
+                return part.id
+        raise KeyError(idref + ' has no part ' + word)
+
+    def add_frame(self, name):
+        """ Creates a frame with the next frame id of the sentence """
+        if 'frames' not in self.blocks:
+            self.blocks.append('frames')
+
+        self.count += 1
+        frame = Frame(self.id+'_f'+str(self.count), name, None, [])
+        self.frames.append(frame)
+
+        return frame
+
+
+def add_fe(frame, name, number):
+    """ Adds an empty frame element with the id FRAME-ID_eNUMBER to a frame and returns it """
+    frame_element = FrameElement(frame.id+'_e'+str(number), name, [])
+    frame.fes.append(frame_element)
+    return frame_element
+
+
+def set_target(frame, idref):
+    """ Sets the target of a frame to one fenode and returns it """
+    frame.target = FrameElement(None, TARGET_NAME, [idref])
+    return frame.target
+
+
+def write_salsa(element, sentence, frames):
+    """ This function writes new splitwords and frames as SALSA XML into an <s> element.
+        A <sem> element is created if the sentence has none.
+
+        Args:
+            element (lxml.etree._Element): <s> element of the sentence
+            sentence (Sentence): The sentence, see corpusModel.py
+            frames (SentenceFrames): New splitwords and frames of the sentence
+
+        Returns:
+            The element
+
+        Example:
+            >>> write_salsa(element, sentence, frames)
+    """
+
+    if not frames:
+        return element
+
+    # Fragments without semantics get an empty <sem> as in corpus files, after <graph>
+    semantics = element.find('sem')
+    if semantics is None:
+        semantics = etree.SubElement(element, 'sem')
+        etree.SubElement(semantics, 'globals')
+
+    for block in frames.blocks:
+
+        if block == 'splitwords':
+            # Create new <splitwords> tag after <globals>
+            splitwords = semantics.find('.//splitwords')
+            if splitwords is None:
+                splitwords = etree.Element('splitwords')
+                semantics.insert(1, splitwords)
+
+            for splitword in frames.splitwords:
+                splitword_tag = etree.SubElement(splitwords, 'splitword', idref=splitword.idref)
+                for part in splitword.parts:
+                    etree.SubElement(splitword_tag, 'part', word=part.word, id=part.id)
+
+        else:
+            # Create <frames> after <globals> and <splitwords>
+            frames_tag = semantics.find('.//frames')
+            if frames_tag is None:
+                frames_tag = etree.Element('frames')
+                if semantics.find('splitwords') is not None:
+                    semantics.insert(2, frames_tag)
+                else:
+                    semantics.insert(1, frames_tag)
+
+            for frame in frames.frames:
+                frame_tag = etree.SubElement(frames_tag, 'frame')
+                frame_tag.set('name', frame.name)
+                frame_tag.set('id', frame.id)
+
+                if frame.target is not None:
+                    write_fenodes(etree.SubElement(frame_tag, 'target'), frame.target, frames.part_ids)
+                for frame_element in frame.fes:
+                    write_fenodes(etree.SubElement(frame_tag, 'fe', name=frame_element.name, id=frame_element.id),
+                                  frame_element, frames.part_ids)
+
+    return element
+
+
+def write_fenodes(parent, frame_element, part_ids):
+    """ Writes a <fenode> below parent for each fenode of a frame element """
+    for idref in frame_element.fenodes:
+        if idref in part_ids:
+            etree.SubElement(parent, 'fenode', idref=idref, is_split='yes')
+        else:
+            etree.SubElement(parent, 'fenode', idref=idref)
+
+
+def frames_to_json(element, sentence, frames):
+    """ This function returns new splitwords and frames of a sentence as a JSON object.
+
+        Args:
+            element (lxml.etree._Element): <s> element of the sentence, it is not used
+            sentence (Sentence): The sentence, it is not used
+            frames (SentenceFrames): New splitwords and frames of the sentence
+
+        Returns:
+            Dict for json.dumps()
+
+        Example:
+            >>> json.dumps(frames_to_json(element, sentence, frames))
+            '{"id": "s12", "splitwords": [], "frames": [{"id": "s12_f1", "name": "Negation", ...}]}'
+    """
+
+    return {
+        'id': frames.id,
+        'splitwords': [{'idref': splitword.idref,
+                        'parts': [{'id': part.id, 'word': part.word} for part in splitword.parts]}
+                       for splitword in frames.splitwords],
+        'frames': [{'id': frame.id,
+                    'name': frame.name,
+                    'target': list(frame.target.fenodes) if frame.target is not None else [],
+                    'fes': [{'id': frame_element.id, 'name': frame_element.name,
+                             'fenodes': list(frame_element.fenodes)} for frame_element in frame.fes]}
+                   for frame in frames.frames],
+    }
+
+
+def frames_to_inline(element, sentence, frames):
+    """ This function writes a sentence with its Negation frames inline, as in res/xml/simplified/.
+        Targets are marked with <negation>, focus with <focus> and scope with <scope> tags,
+        each with the id of the frame. Splitword parts are not marked.
+
+        Args:
+            element (lxml.etree._Element): <s> element of the sentence, it is not changed
+            sentence (Sentence): The sentence, see corpusModel.py
+            frames (SentenceFrames): New splitwords and frames of the sentence
+
+        Returns:
+            The sentence as a string, or None if it has no Negation frame
+
+        Example:
+            >>> frames_to_inline(element, sentence, frames)
+            'Er ist <negation frame="s32_f1">nicht</negation> <scope frame="s32_f1">da</scope>.'
+    """
+
+    negation_frames = [frame for frame in sentence.frames + frames.frames if 'negation' in frame.name.lower()]
+    if not negation_frames:
+        return None
+
+    # Role -> terminal ids, and terminal id -> id of the first frame that marks it
+    members = {}
+    frame_ids = {}
+    for role, fe_name in INLINE_FRAME_ELEMENTS:
+        members[role] = set()
+        for frame in negation_frames:
+            for frame_element in [frame.target] + frame.fes:
+                if frame_element is not None and fe_name in frame_element.name.lower():
+                    for idref in frame_element.fenodes:
+                        if idref in sentence.index:
+                            members[role].add(idref)
+                            frame_ids.setdefault(idref, frame.id)
+
+    text = ''
+    open_roles = set()
+    for terminal in sentence.terminals:
+
+        # Close tags of roles the terminal is not in, innermost first
+        for role in reversed(INLINE_ROLES):
+            if role in open_roles and terminal.id not in members[role]:
+                text += '</' + role + '>'
+                open_roles.remove(role)
+
+        # Punctuation is attached to the previous word
+        if not (terminal.pos or '').startswith('$'):
+            text += ' '
+
+        for role in INLINE_ROLES:
+            if role not in open_roles and terminal.id in members[role]:
+                text += '<' + role + ' frame="' + escape(frame_ids[terminal.id]) + '">'
+                open_roles.add(role)
+
+        text += escape(terminal.word or '', quote=False)
+
+    for role in reversed(INLINE_ROLES):
+        if role in open_roles:
+            text += '</' + role + '>'
+
+    return text.strip()
+
+
+# Serializers by name, each one takes (element, sentence, frames)
+SERIALIZERS = {
+    'salsa': write_salsa,
+    'json': frames_to_json,
+    'inline': frames_to_inline,
+}
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+negdetect
+
+Short description:
+This module runs the negation detection as a filter from stdin to stdout,
+so it can be used in Unix pipelines. It reads tokenized sentences as JSON lines
+TIGER-XML <s> fragments or CoNLL-2009 blocks, and writes one JSON line per sentence as soon as
+the sentence has been read. Only the current sentence is held in memory.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import argparse
+import json
+import os
+import sys
+from itertools import chain
+
+from lxml import etree
+
+from corpusIO import READ_SIZE
+from corpusModel import check_token, read_conll, sentence_from_tokens
+from detectNegation import load_detector, serialize_sentences
+from negationFrames import SERIALIZERS
+from streamCorpus import SENTENCE_PARSER, SENTENCE_START, split_chunks
+
+# Input formats, auto decides on the first byte of the input that is not whitespace
+INPUT_FORMATS = ['auto', 'jsonl', 'xml', 'conll']
+
+
+def read_stdin(stream, size=READ_SIZE):
+    """ This function reads a binary stream in chunks of at most size bytes.
+        Unlike read(), read1() returns what a pipe holds so far, so sentences
+        are detected while the writer of the pipe is still running.
+
+        Args:
+            stream (io.BufferedReader): Binary stream, for example sys.stdin.buffer
+            size (int): Largest chunk in bytes, defaults to READ_SIZE
+
+        Returns:
+            Generator of byte strings
+    """
+
+    read = getattr(stream, 'read1', stream.read)
+    for chunk in iter(lambda: read(size), b''):
+        yield chunk
+
+
+def split_lines(chunks):
+    """ Returns a generator of the lines of a stream of byte strings, without line endings """
+    buffer = b''
+
+    for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split(b'\n')
+        buffer = lines.pop()
+        for line in lines:
+            yield line
+
+    if buffer:
+        yield buffer
+
+
+def guess_format(chunks):
+    """ This function looks at the first line of the input that is not whitespace.
+        CoNLL-2009 lines are told apart from other text by their tab separated columns.
+
+        Args:
+            chunks (iterator): Byte strings of the input
+
+        Returns:
+            Tuple of ('xml', 'jsonl' or 'conll', chunks), chunks holds all input, including the bytes looked at
+
+        Example:
+            >>> guess_format(iter([b'1-s1_1\tnicht\t_\tnicht\n']))[0]
+            'conll'
+    """
+
+    seen = []
+    for chunk in chain(chunks, [None]):
+        if chunk is not None:
+            seen.append(chunk)
+        start = b''.join(seen).lstrip()
+        if not start:
+            continue
+
+        if start.startswith(b'<'):
+            return 'xml', chain(seen, chunks)
+        if start.startswith((b'[', b'{')):
+            return 'jsonl', chain(seen, chunks)
+
+        # Wait for the whole first line
+        if b'\n' not in start and chunk is not None:
+            continue
+        if b'\t' in start.split(b'\n', 1)[0]:
+            return 'conll', chain(seen, chunks)
+        raise ValueError('Input is neither JSON lines, TIGER-XML nor CoNLL-2009, see --input')
+
+    return 'jsonl', iter(seen)
+
+
+def parse_line(line):
+    """ This function reads one sentence from a JSON line.
+
+        Args:
+            line (bytes): [[id, word, lemma, pos], ...] or {"id": "s1", "tokens": [[id, word, lemma, pos], ...]}
+
+        Returns:
+            Tuple of (sentence id or None, list of token tuples)
+
+        Example:
+            >>> parse_line(b'[["s1_1", "nicht", "nicht", "PTKNEG"]]')
+            (None, [('s1_1', 'nicht', 'nicht', 'PTKNEG')])
+    """
+
+    sentence = json.loads(line.decode('utf-8'))
+
+    s_id = None
+    if isinstance(sentence, dict):
+        s_id = sentence.get('id')
+        sentence = sentence.get('tokens')
+    if not isinstance(sentence, list):
+        raise ValueError('A sentence must be a list of tokens or an object with "tokens"')
+
+    if s_id is not None and not isinstance(s_id, str):
+        raise ValueError('A sentence id must be a string, got: ' + json.dumps(s_id, ensure_ascii=False))
+
+    return s_id, [check_token(token) for token in sentence]
+
+
+def read_token_sentences(chunks):
+    """ This function reads JSON lines into Sentence objects, empty lines are skipped.
+        Sentences without an id are numbered by their line.
+
+        Args:
+            chunks (iterable): Byte strings of the input
+
+        Returns:
+            Generator of Sentence objects, see corpusModel.py
+    """
+
+    for number, line in enumerate(split_lines(chunks), 1):
+        if not line.strip():
+            continue
+        try:
+            s_id, tokens = parse_line(line)
+        except ValueError as error:
+            raise ValueError('line ' + str(number) + ': ' + str(error))
+
+        sentence = sentence_from_tokens(tokens, s_id)
+        if sentence.id is None:
+            sentence.id = 's' + str(number)
+        yield sentence
+
+
+def read_xml_sentences(chunks):
+    """ This function reads concatenated TIGER-XML <s> elements. Everything between
+        the sentences is skipped, so whole corpus files can be piped in as well.
+
+        Args:
+            chunks (iterable): Byte strings of the input
+
+        Returns:
+            Generator of lxml <s> elements, a ValueError is raised for broken or unfinished sentences
+    """
+
+    for number, (gap, data) in enumerate(split_chunks(chunks), 1):
+        if data is None:
+            # The rest may close a whole corpus file, but must not open another sentence
+            if SENTENCE_START.search(gap):
+                raise ValueError('sentence ' + str(number) + ': input ends before </s>')
+            break
+        try:
+            yield etree.fromstring(data, SENTENCE_PARSER)
+        except etree.XMLSyntaxError as error:
+            raise ValueError('sentence ' + str(number) + ': ' + str(error))
+
+
+def detect_stream(chunks, detector, input_format='auto', serializer='json'):
+    """ This function detects negation in a stream of sentences.
+
+        Args:
+            chunks (iterable): Byte strings of the input, for example read_stdin(sys.stdin.buffer)
+            detector (NegationDetector): See detectNegation.load_detector()
+            input_format (str): One of INPUT_FORMATS
+            serializer (str): Key of negationFrames.SERIALIZERS, salsa needs xml input
+
+        Returns:
+            Generator of serialized sentences, one per input sentence and in input order
+
+        Example:
+            >>> for result in detect_stream([b'[["s1_1", "nicht", "nicht", "PTKNEG"]]\\n'], load_detector()):
+            ...     print(result['frames'][0]['target'])
+            ['s1_1']
+    """
+
+    serialize = SERIALIZERS[serializer]
+    chunks = iter(chunks)
+
+    if input_format == 'auto':
+        input_format, chunks = guess_format(chunks)
+
+    if input_format in ('jsonl', 'conll'):
+        if serializer == 'salsa':
+            raise ValueError('Format salsa needs xml input')
+        if input_format == 'jsonl':
+            sentences = read_token_sentences(chunks)
+        else:
+            sentences = read_conll((line.decode('utf-8') for line in split_lines(chunks)), '<stdin>')
+        for sentence, frames in detector.detect_sentences(sentences):
+            yield serialize(None, sentence, frames)
+
+    else:
+        for result in serialize_sentences(read_xml_sentences(chunks), detector, serializer):
+            if serializer == 'salsa':
+                result = etree.tostring(result, encoding='unicode', with_tail=False)
+            yield result
+
+
+def main(arguments=None):
+    """ Runs the detection from stdin to stdout, see --help """
+
+    parser = argparse.ArgumentParser(prog='negdetect', description='Detect negation in sentences from stdin, '
+                                     'write one JSON line per sentence to stdout.')
+    parser.add_argument('--input', choices=INPUT_FORMATS, default='auto',
+                        help='jsonl: one sentence per line, [[id, word, lemma, pos], ...] or '
+                             '{"id": ..., "tokens": [...]}; xml: TIGER-XML <s> elements; '
+                             'conll: CoNLL-2009 lines, sentences separated by blank lines')
+    parser.add_argument('--format', choices=sorted(SERIALIZERS), default='json', help='Output of each sentence')
+    parser.add_argument('--cuewords', default=None, help='Cuewords file, defaults to the lexicon of the project')
+    options = parser.parse_args(arguments)
+
+    # Every line is handed on as soon as it is written
+    output = sys.stdout
+    output.reconfigure(encoding='utf-8', line_buffering=True)
+
+    try:
+        detector = load_detector(options.cuewords)
+        for result in detect_stream(read_stdin(sys.stdin.buffer), detector, options.input, options.format):
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    except BrokenPipeError:
+        # The reader is gone, for example head, stop without a traceback when stdout is flushed at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+
+    except (ValueError, OSError) as error:
+        # Broken input or a missing cuewords file
+        output.flush()
+        print('negdetect: ' + str(error), file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+pos_tags
+
+Short description:
+This module interns the STTS part-of-speech tagset to small integers
+and compiles lists of POS tags into bitmasks, so a rule test
+is a single integer AND instead of a list lookup.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+# STTS tagset as used in the TIGER corpus, followed by the corpus specific tags
+STTS_TAGS = [
+    'ADJA', 'ADJD', 'ADV', 'APPR', 'APPRART', 'APPO', 'APZR', 'ART', 'CARD', 'FM', 'ITJ',
+    'KOUI', 'KOUS', 'KON', 'KOKOM', 'NN', 'NE', 'PDS', 'PDAT', 'PIS', 'PIAT', 'PIDAT',
+    'PPER', 'PPOSS', 'PPOSAT', 'PRELS', 'PRELAT', 'PRF', 'PWS', 'PWAT', 'PWAV', 'PROAV',
+    'PTKZU', 'PTKNEG', 'PTKVZ', 'PTKANT', 'PTKA', 'TRUNC', 'VVFIN', 'VVIMP', 'VVINF',
+    'VVIZU', 'VVPP', 'VAFIN', 'VAIMP', 'VAINF', 'VAPP', 'VMFIN', 'VMINF', 'VMPP', 'XY',
+    '$,', '$.', '$(', '$*LRB*', '*T1*',
+]
+
+# POS tag -> code, tags missing from STTS_TAGS get the next free code when first seen
+POS_CODES = {tag: code for code, tag in enumerate(STTS_TAGS)}
+
+
+def pos_code(tag):
+    """ This function returns the integer code of a POS tag.
+
+        Args:
+            tag (str): POS tag, for example 'NN'
+
+        Returns:
+            Code of the tag, or None if tag is None
+
+        Example:
+            >>> pos_code('NN')
+            15
+    """
+
+    if tag is None:
+        return None
+
+    code = POS_CODES.get(tag)
+    if code is None:
+        code = POS_CODES[tag] = len(POS_CODES)
+    return code
+
+
+def pos_bit(tag):
+    """ This function returns the bit of a POS tag, for testing it against masks from pos_mask().
+
+        Args:
+            tag (str): POS tag, for example 'NN'
+
+        Returns:
+            The bit of the tag, or 0 if tag is None
+
+        Example:
+            >>> pos_bit('NN') & pos_mask(['NN', 'NE'])
+            32768
+    """
+
+    if tag is None:
+        return 0
+
+    return 1 << pos_code(tag)
+
+
+def pos_mask(tags):
+    """ This function compiles a list of POS tags into a bitmask.
+
+        Args:
+            tags (list): POS tags, for example NICHT_RULES
+
+        Returns:
+            Bitmask with the bits of all tags
+
+        Example:
+            >>> pos_mask(['VMFIN', 'VVFIN', 'VVPP'])
+    """
+
+    mask = 0
+    for tag in tags:
+        mask |= pos_bit(tag)
+    return mask
+
+
+def substring_mask(text):
+    """ This function compiles the test 'pos in text' for a string into a bitmask,
+        it matches every POS tag that is a substring of text.
+
+        Args:
+            text (str): For example '$,'
+
+        Returns:
+            Bitmask with the bits of all substrings of text
+
+        Example:
+            >>> substring_mask('$,') == pos_mask(['', '$', ',', '$,'])
+            True
+    """
+
+    return pos_mask({text[start:end] for start in range(len(text) + 1) for end in range(start, len(text) + 1)})
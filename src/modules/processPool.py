@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+process_pool
+
+Short description:
+This module runs the per-file work of a stage in a pool of processes.
+Results and console output come back in the same order as
+a sequential run, no matter which process finishes first.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import contextlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from corpusIO import is_xml_file
+
+
+def list_xml_files(xml_file_path):
+    """ This function lists the corpus files in a directory, in os.listdir() order.
+
+        Args:
+            xml_file_path (str): Path to corpus files in xml format
+
+        Returns:
+            List of paths to xml files, plain or compressed, subdirectories are ignored
+
+        Example:
+            >>> list_xml_files('../../res/xml/train/')
+    """
+
+    files = []
+
+    for file in os.listdir(xml_file_path):
+
+        # Set path to file
+        file = xml_file_path+file
+
+        # Files only, ignore subdirectories
+        if os.path.isfile(file) and is_xml_file(file):
+            files.append(file)
+
+    return files
+
+
+def run_captured(function, args):
+    """ Runs function(*args) in a worker and returns its console output and result """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = function(*args)
+    return output.getvalue(), result
+
+
+def map_files(function, jobs, workers=1):
+    """ This function calls a function once per job, in a process pool if workers > 1.
+        Console output of each job is printed and results are yielded
+        in job order, so the output matches a sequential run.
+
+        Args:
+            function (function): Module level function, it must be importable by the workers
+            jobs (list): Argument tuples, one per call
+            workers (int): Number of processes, 1 runs everything in this process
+
+        Returns:
+            Generator of results, in job order
+
+        Example:
+            >>> for result in map_files(convert_file, [(file, '../../res/conll/') for file in files], workers=4):
+            ...     pass
+    """
+
+    if workers is None or workers <= 1 or len(jobs) <= 1:
+        for args in jobs:
+            yield function(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = [executor.submit(run_captured, function, args) for args in jobs]
+        for future in futures:
+            output, result = future.result()
+            print(output, end='')
+            yield result
@@ -20,20 +20,23 @@ Version: 1.0
 # import dependencies
 import os, sys
 import codecs
-from bs4 import BeautifulSoup
-import lxml
+
+from artifactCache import cached_call
+from processPool import list_xml_files, map_files
+from streamCorpus import rewrite_sentences
 
 XML_TRAIN_FILES_PATH = '../../res/xml/train/'
 XML_TRAIN_FILES_OUTPUT_PATH = '../../res/xml/train/output/'
 
 NEGATION_FRAME_NAME = 'Negation' #CaseSensitive
 
-def remove_frames(xml_file_path, xml_output_file_path):
+def remove_frames(xml_file_path, xml_output_file_path, workers=1):
     """ This function removes Negation frames from corpus files in Tiger xml format.
 
         Args:
             xml_file_path (str): Path to corpus files in xml format
             xml_output_file_path (str): Path for output
+            workers (int): Number of processes, files are written in parallel if > 1
 
         Returns:
             The written files without frame annotations
@@ -42,49 +45,67 @@ def remove_frames(xml_file_path, xml_output_file_path):
             >>> remove_frames('../res/xml/train', '../res/xml/train/output')
     """
 
-    if not os.path.exists(xml_file_path):
-        self.create_directories(xml_file_path)
-
     if not os.path.exists(xml_output_file_path):
-        self.create_directories(xml_output_file_path)
+        os.makedirs(xml_output_file_path)
 
     # Go through all files in xml_file_path directory
-    for file in os.listdir(xml_file_path):
+    jobs = [('strip', remove_file_frames, (file, xml_output_file_path), [file],
+             [xml_output_file_path+os.path.split(file)[-1]]) for file in list_xml_files(xml_file_path)]
+    for chapter_output in map_files(cached_call, jobs, workers):
+        pass
 
-        # Set path to file
-        file = xml_file_path+file
+    print('Done!')
 
-        # Open files only, ignore subdirectories
-        if os.path.isfile(file) and file.lower().endswith('.xml'):
+def remove_file_frames(file, xml_output_file_path):
+    """ This function removes Negation frames from one corpus file in Tiger xml format.
 
-            # Open Files
-            chapter_input = open(file, 'r', encoding='utf8')
+        Args:
+            file (str): Path to a corpus file in xml format
+            xml_output_file_path (str): Path for output
 
-            # Create Same Filename in Output Folder
-            chapter_output = open(xml_output_file_path+os.path.split(file)[-1], 'w', encoding='utf8')
+        Returns:
+            Path to the written file
 
-            # Console log
-            print('Removing Negation frames and splitwords from: ' + chapter_input.name + ' to: ' + chapter_output.name)
+        Example:
+            >>> remove_file_frames('../res/xml/train/baskerville_ch4.jr.xml', '../res/xml/train/output/')
+    """
 
-            # Parse with BeautifulSoup
-            chapter_input = BeautifulSoup(chapter_input, 'xml')
+    # Create Same Filename in Output Folder
+    chapter_output = xml_output_file_path+os.path.split(file)[-1]
 
-            # Remove splitwords and frames from semantics
-            for sem in chapter_input.find_all('sem'):
-                for splitword in sem.find_all('splitwords'):
-                    splitword.decompose()
+    # Console log
+    print('Removing Negation frames and splitwords from: ' + file + ' to: ' + chapter_output)
 
-                for frame in sem.find_all('frames'):
-                    for f_r in frame.find_all('frame', {'name' : NEGATION_FRAME_NAME}):
-                        f_r.decompose()
+    # Copy the file, sentences without negation stay untouched
+    rewrite_sentences(file, chapter_output, strip_sentences)
 
-            # Write output
-            chapter_output.write(chapter_input.prettify())
+    return chapter_output
 
-            # Close file
-            chapter_output.close()
+def strip_sentences(sentences):
+    """ This function removes splitwords and Negation frames from a stream of sentences.
 
-    print('Done!')
+        Args:
+            sentences (iterable): lxml <s> elements, for example from iter_sentences()
+
+        Returns:
+            Generator of the <s> elements without splitwords and Negation frames
+
+        Example:
+            >>> strip_sentences(iter_sentences('../../res/xml/train/baskerville_ch4.jr.xml'))
+    """
+
+    for sentence in sentences:
+
+        # Remove splitwords and frames from semantics
+        for sem in sentence.iter('sem'):
+            for splitword in list(sem.iter('splitwords')):
+                splitword.getparent().remove(splitword)
+
+            for frame in sem.iter('frames'):
+                for f_r in [f_r for f_r in frame.iter('frame') if f_r.get('name') == NEGATION_FRAME_NAME]:
+                    f_r.getparent().remove(f_r)
+
+        yield sentence
 
 if __name__ == "__main__":
 
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+sentence_index
+
+Short description:
+This module keeps a sidecar .idx file next to each corpus file in TIGER-XML format.
+It maps sentence ids and ordinals to byte offsets and lengths, and holds
+the number of tokens and flags for frames and splitwords of every sentence.
+The index is built in one byte scan without parsing, so stages can jump
+to single sentences, split files into shards and skip sentences
+without annotations.
+
+Offsets of compressed files (.xml.gz, .xml.bz2, .xml.xz) are offsets into
+the decompressed stream, and the index is checked against the size and time
+of the compressed file. Compressed streams can only be read forward, so
+every read() of a single sentence decompresses the file from its start.
+Use iter_sentences() with keys in file order, which reads such a file in one pass.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import os
+import re
+import struct
+import sys
+from array import array
+
+from lxml import etree
+
+from corpusIO import atomic_write, is_xml_file, open_corpus
+from corpusModel import read_sentence
+from streamCorpus import SENTENCE_PARSER, split_sentences
+
+XML_TRAIN_FILES_PATH = '../../res/xml/train/'
+
+# Index files are written next to their corpus file, as file.xml.idx
+INDEX_EXTENSION = '.idx'
+
+INDEX_MAGIC = b'TGRI'
+INDEX_VERSION = 1
+
+# magic, version, byte order, source size, source mtime, number of sentences, length of the id table
+INDEX_HEADER = struct.Struct('<4sIcxxxQQII')
+
+# Flags of a sentence
+NEGATION_FLAG = 1
+FRAMES_FLAG = 2
+SPLITWORDS_FLAG = 4
+
+SENTENCE_ID = re.compile(rb'<s\s[^>]*?\bid="([^"]*)"')
+TOKEN_TAG = re.compile(rb'<t\s')
+NEGATION_FRAME_TAG = re.compile(rb'<frame\s[^>]*?\bname="Negation"')
+FRAME_TAG = re.compile(rb'<frame[\s/>]')
+SPLITWORD_TAG = re.compile(rb'<splitword[\s/>]')
+
+
+class SentenceIndex:
+    """ Byte offsets, lengths, token counts and flags of the sentences of a corpus file.
+        Sentences are addressed by their ordinal or by their id.
+
+        Example:
+            >>> index = load_index('../../res/xml/train/baskerville_ch4.jr.xml')
+            >>> index.sentence('s1').terminals[2].word
+            'Kapitel'
+    """
+
+    __slots__ = ('xml_file', 'ids', 'offsets', 'lengths', 'tokens', 'flags', 'positions')
+
+    def __init__(self, xml_file, ids, offsets, lengths, tokens, flags):
+        self.xml_file = xml_file
+        self.ids = ids
+        self.offsets = offsets
+        self.lengths = lengths
+        self.tokens = tokens
+        self.flags = flags
+        self.positions = {s_id: position for position, s_id in reversed(list(enumerate(ids)))}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def position(self, key):
+        """ Returns the ordinal of a sentence, key is an ordinal or a sentence id """
+        if isinstance(key, str):
+            return self.positions[key]
+        return key + len(self) if key < 0 else key
+
+    def span(self, key):
+        """ Returns the (start, end) byte offsets of a sentence """
+        position = self.position(key)
+        return self.offsets[position], self.offsets[position] + self.lengths[position]
+
+    def end(self):
+        """ Returns the byte offset after the last sentence """
+        return self.span(-1)[1] if len(self) else 0
+
+    def select(self, flags):
+        """ Returns the ordinals of all sentences with any of the given flags """
+        return [position for position, sentence_flags in enumerate(self.flags) if sentence_flags & flags]
+
+    def read(self, key):
+        """ Returns the bytes of a sentence, compressed files are decompressed up to the sentence """
+        start, end = self.span(key)
+        with open_corpus(self.xml_file, 'rb') as xml_input:
+            xml_input.seek(start)
+            return xml_input.read(end - start)
+
+    def element(self, key):
+        """ Parses a sentence into an lxml <s> element """
+        return etree.fromstring(self.read(key), SENTENCE_PARSER)
+
+    def sentence(self, key):
+        """ Reads a sentence into a Sentence, see corpusModel.py """
+        return read_sentence(self.element(key))
+
+    def iter_sentences(self, keys):
+        """ This function reads the given sentences, without reading the rest of the file.
+
+            Args:
+                keys (iterable): Ordinals or ids of sentences
+
+            Returns:
+                Generator of (ordinal, Sentence) tuples, in the order of keys,
+                compressed files are read in one pass if the keys are in file order
+
+            Example:
+                >>> for position, sentence in index.iter_sentences(index.select(NEGATION_FLAG)):
+                ...     print(position, sentence.id)
+        """
+
+        with open_corpus(self.xml_file, 'rb') as xml_input:
+            for key in keys:
+                position = self.position(key)
+                xml_input.seek(self.offsets[position])
+                data = xml_input.read(self.lengths[position])
+                yield position, read_sentence(etree.fromstring(data, SENTENCE_PARSER))
+
+
+def index_path(xml_file):
+    """ Returns the path of the index file for an xml file """
+    return xml_file + INDEX_EXTENSION
+
+
+def scan_sentences(xml_file):
+    """ This function scans a corpus file in TIGER-XML format for sentences, without parsing it.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+
+        Returns:
+            SentenceIndex
+
+        Example:
+            >>> len(scan_sentences('../../res/xml/train/baskerville_ch4.jr.xml'))
+    """
+
+    ids = []
+    offsets = array('Q')
+    lengths = array('I')
+    tokens = array('I')
+    flags = array('B')
+
+    position = 0
+    for gap, data in split_sentences(xml_file):
+        position += len(gap)
+        if data is None:
+            break
+
+        match = SENTENCE_ID.match(data)
+        ids.append(match.group(1).decode('utf-8') if match else None)
+        offsets.append(position)
+        lengths.append(len(data))
+        tokens.append(len(TOKEN_TAG.findall(data)))
+
+        sentence_flags = 0
+        if FRAME_TAG.search(data):
+            sentence_flags |= FRAMES_FLAG
+            if NEGATION_FRAME_TAG.search(data):
+                sentence_flags |= NEGATION_FLAG
+        if SPLITWORD_TAG.search(data):
+            sentence_flags |= SPLITWORDS_FLAG
+        flags.append(sentence_flags)
+
+        position += len(data)
+
+    return SentenceIndex(xml_file, ids, offsets, lengths, tokens, flags)
+
+
+def build_index(xml_file, index_file=None):
+    """ This function scans a corpus file in TIGER-XML format and writes its index file.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            index_file (str): Path for the index, defaults to index_path()
+
+        Returns:
+            SentenceIndex, it is returned even if the index file can not be written
+
+        Example:
+            >>> build_index('../../res/xml/train/baskerville_ch4.jr.xml')
+    """
+
+    if index_file is None:
+        index_file = index_path(xml_file)
+
+    stat = os.stat(xml_file)
+    index = scan_sentences(xml_file)
+
+    # Sentences without an id are stored as empty strings
+    blob = '\0'.join(s_id or '' for s_id in index.ids).encode('utf-8')
+
+    try:
+        with atomic_write(index_file) as temporary_file:
+            with open(temporary_file, 'wb') as index_output:
+                index_output.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, sys.byteorder[0].encode('ascii'),
+                                                     stat.st_size, stat.st_mtime_ns, len(index), len(blob)))
+                index.offsets.tofile(index_output)
+                index.lengths.tofile(index_output)
+                index.tokens.tofile(index_output)
+                index.flags.tofile(index_output)
+                index_output.write(blob)
+
+    # Read only directories keep the index in memory
+    except OSError:
+        pass
+
+    return index
+
+
+def read_index(xml_file, index_file):
+    """ This function reads an index file if it belongs to the current xml file.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            index_file (str): Path to its index file
+
+        Returns:
+            SentenceIndex, or None if the index is missing or out of date
+    """
+
+    try:
+        with open(index_file, 'rb') as index_input:
+            magic, version, byteorder, size, mtime, count, blob_length = INDEX_HEADER.unpack(
+                index_input.read(INDEX_HEADER.size))
+
+            if magic != INDEX_MAGIC or version != INDEX_VERSION or byteorder != sys.byteorder[0].encode('ascii'):
+                return None
+
+            stat = os.stat(xml_file)
+            if stat.st_size != size or stat.st_mtime_ns != mtime:
+                return None
+
+            columns = [array(typecode) for typecode in 'QIIB']
+            for column in columns:
+                column.fromfile(index_input, count)
+            blob = index_input.read(blob_length)
+
+    except (OSError, EOFError, struct.error):
+        return None
+
+    ids = [s_id or None for s_id in blob.decode('utf-8').split('\0')] if count else []
+
+    return SentenceIndex(xml_file, ids, *columns)
+
+
+def load_index(xml_file):
+    """ This function reads the index of a corpus file in TIGER-XML format
+        and builds it first if it is missing or out of date.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+
+        Returns:
+            SentenceIndex
+
+        Example:
+            >>> index = load_index('../../res/xml/train/baskerville_ch4.jr.xml')
+            >>> index.tokens[index.position('s1')]
+    """
+
+    index = read_index(xml_file, index_path(xml_file))
+
+    if index is None:
+        index = build_index(xml_file)
+
+    return index
+
+
+if __name__ == "__main__":
+
+    # Index all training files
+    for file in os.listdir(XML_TRAIN_FILES_PATH):
+        file = XML_TRAIN_FILES_PATH+file
+        if os.path.isfile(file) and is_xml_file(file):
+            index = build_index(file)
+            print('Indexed', len(index), 'sentences of', file)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+stage_graph
+
+Short description:
+This module runs the stages of the project as a dependency graph.
+Each stage names the data it reads and writes, a stage starts
+as soon as every stage writing its inputs is done, so independent
+stages can run at the same time in separate processes.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from processPool import run_captured
+
+
+class Stage:
+    """ A stage of the pipeline, a call of function(*args) with named inputs and outputs.
+        Inputs that no stage writes are files that already exist, for example the gold files.
+
+        Args:
+            name (str): Name of the stage, for example 'evaluate:test'
+            function (function): Function that runs the stage, it must be picklable to run in a process
+            args (tuple): Arguments for function
+            inputs (list): Names of the data the stage reads
+            outputs (list): Names of the data the stage writes
+
+        Example:
+            >>> Stage('strip:test', remove_frames, ('../res/xml/test/', '../res/xml/test/output/'),
+            ...       inputs=['gold:test'], outputs=['stripped:test'])
+    """
+
+    __slots__ = ('name', 'function', 'args', 'inputs', 'outputs')
+
+    def __init__(self, name, function, args=(), inputs=(), outputs=()):
+        self.name = name
+        self.function = function
+        self.args = tuple(args)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+
+
+def stage_dependencies(stages):
+    """ This function finds the stages each stage has to wait for.
+
+        Args:
+            stages (list): Stage objects
+
+        Returns:
+            Dict of stage name -> list of names of the stages that write its inputs
+
+        Example:
+            >>> stage_dependencies(stages)['detect:test']
+            ['cuewords:train', 'strip:test']
+    """
+
+    names = set()
+    writers = {}
+    for stage in stages:
+        if stage.name in names:
+            raise ValueError('Stage name used twice: ' + stage.name)
+        names.add(stage.name)
+        for output in stage.outputs:
+            if output in writers:
+                raise ValueError('Output ' + output + ' is written by ' + writers[output] + ' and ' + stage.name)
+            writers[output] = stage.name
+
+    dependencies = {}
+    for stage in stages:
+        dependencies[stage.name] = []
+        for name in stage.inputs:
+            writer = writers.get(name)
+            if writer is not None and writer != stage.name and writer not in dependencies[stage.name]:
+                dependencies[stage.name].append(writer)
+
+    return dependencies
+
+
+def order_stages(stages, until=None):
+    """ This function sorts stages so that every stage comes after the stages it depends on.
+        Independent stages keep the order they were declared in.
+
+        Args:
+            stages (list): Stage objects
+            until (list): Names of the stages to run, with everything they depend on, None runs all stages
+
+        Returns:
+            List of Stage objects
+
+        Example:
+            >>> [stage.name for stage in order_stages(stages, until=['strip:test'])]
+            ['strip:test']
+    """
+
+    dependencies = stage_dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+
+    # Stages needed for the targets
+    if until is None:
+        needed = set(by_name)
+    else:
+        needed = set()
+        pending = list(until)
+        while pending:
+            name = pending.pop()
+            if name not in by_name:
+                raise ValueError('Unknown stage: ' + name + ', stages are: ' + ', '.join(by_name))
+            if name not in needed:
+                needed.add(name)
+                pending.extend(dependencies[name])
+
+    ordered = []
+    done = set()
+    remaining = [stage for stage in stages if stage.name in needed]
+
+    while remaining:
+        ready = [stage for stage in remaining if all(name in done for name in dependencies[stage.name])]
+        if not ready:
+            raise ValueError('Stages depend on each other: ' + ', '.join(stage.name for stage in remaining))
+        # One stage at a time keeps the declaration order of independent stages
+        ordered.append(ready[0])
+        done.add(ready[0].name)
+        remaining.remove(ready[0])
+
+    return ordered
+
+
+def run_stages(stages, until=None, workers=1):
+    """ This function runs stages as soon as the stages they depend on are done.
+        With more than one worker, independent stages run at the same time in separate
+        processes, so the time of a run is bounded by its longest chain of dependent stages.
+        Console output of a stage is printed when the stage is done.
+
+        Args:
+            stages (list): Stage objects
+            until (list): Names of the stages to run, with everything they depend on, None runs all stages
+            workers (int): Number of stages that run at the same time, 1 runs them one by one in this process
+
+        Returns:
+            Dict of stage name -> return value of its function
+
+        Example:
+            >>> run_stages(stages, until=['evaluate:test'], workers=3)
+    """
+
+    ordered = order_stages(stages, until)
+    dependencies = stage_dependencies(ordered)
+    results = {}
+
+    if workers is None or workers <= 1:
+        for stage in ordered:
+            results[stage.name] = stage.function(*stage.args)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        remaining = list(ordered)
+
+        while remaining or running:
+
+            # Start every stage whose inputs are written
+            for stage in [stage for stage in remaining
+                          if all(name in results for name in dependencies[stage.name])]:
+                running[executor.submit(run_captured, stage.function, stage.args)] = stage
+                remaining.remove(stage)
+
+            finished, pending = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                output, results[stage.name] = future.result()
+                print(output, end='')
+
+    return results
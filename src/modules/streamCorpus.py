@@ -0,0 +1,559 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+
+Author: Darmin Spahic <Spahic@stud.uni-heidelberg.de>
+Project: Negation Detection
+
+Module name:
+stream_corpus
+
+Short description:
+This module reads and writes corpus files in TIGER-XML format
+one sentence at a time, so memory use stays flat no matter
+how big the corpus file is. Sentences without new annotations
+are copied byte for byte.
+
+License: MIT License
+Version: 1.0
+
+"""
+
+import mmap
+import os
+import re
+from collections import deque
+
+from lxml import etree
+
+from corpusIO import READ_SIZE, is_compressed, open_corpus, read_ahead, read_chunks
+from processPool import map_files
+
+# Read input ahead and write output behind on threads, so reading,
+# the stage and writing of a file overlap, set to False to run them one after another
+OVERLAP_IO = True
+
+# Shards per worker when a file is split for parallel processing, more shards even out bad estimates
+SHARDS_PER_WORKER = 4
+
+SENTENCE_START = re.compile(rb'<s[\s>]')
+SENTENCE_END = b'</s>'
+
+# Opening tag with attributes, group 1 is set for self closing tags
+OPEN_TAG = rb'<%s(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|\'[^\']*\'))*\s*(/?)>'
+
+# Tags within <sem> that stages may add or remove, and their children
+BLOCK_TAGS = [('splitwords', 'splitword'), ('frames', 'frame')]
+
+SENTENCE_PARSER = etree.XMLParser(huge_tree=True)
+
+
+def iter_sentences(xml_file):
+    """ This function streams the <s> elements of a corpus file in TIGER-XML format.
+        Each sentence is freed as soon as the next one is requested,
+        so callers must not keep references to already yielded sentences.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+
+        Returns:
+            Generator of lxml <s> elements, in document order
+
+        Example:
+            >>> for sentence in iter_sentences('../../res/xml/train/baskerville_ch4.jr.xml'):
+            ...     print(sentence.get('id'))
+    """
+
+    with open_corpus(xml_file, 'rb') as xml_input:
+        context = etree.iterparse(xml_input, events=('end',), tag='s', huge_tree=True)
+
+        for event, sentence in context:
+
+            yield sentence
+
+            # Free the sentence and all sentences before it
+            sentence.clear()
+            while sentence.getprevious() is not None:
+                del sentence.getparent()[0]
+
+        del context
+
+
+def rewrite_sentences(xml_file, xml_out, stage, *args):
+    """ This function copies a corpus file in TIGER-XML format and passes
+        each sentence through a stage, for example tag_sentences().
+        Sentences the stage leaves alone are copied byte for byte from the input.
+        For changed sentences only the added or removed <splitword>, <frame>,
+        <splitwords> and <frames> tags are serialized and spliced into the input bytes,
+        so the time spent writing depends on the number of annotations, not on the corpus size.
+        With OVERLAP_IO, input is read ahead and output is written behind on threads
+        with bounded queues, so the stage runs while the disk is busy.
+
+        Stages must yield every sentence they receive, in the same order,
+        and may only add or remove whole <splitword> and <frame> tags
+        or whole <splitwords> and <frames> tags within <sem>.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            xml_out (str): Path to an empty file with .xml extension
+            stage (function): Takes an iterable of lxml <s> elements and yields them back
+            *args: Further arguments for the stage
+
+        Returns:
+            The written corpus file
+
+        Example:
+            >>> rewrite_sentences('../../res/xml/train/output/baskerville_ch4.jr.xml',
+            '../../res/xml/train/output/tagged/baskerville_ch4.jr.xml',
+            tag_sentences, cueword_list)
+    """
+
+    with open_corpus(xml_out, 'wb', background=OVERLAP_IO) as xml_output:
+        for part in rewrite_chunks(split_sentences(xml_file, OVERLAP_IO), stage, *args):
+            xml_output.write(part)
+
+
+def rewrite_sentences_sharded(xml_file, xml_out, cost, workers, stage, *args):
+    """ This function works like rewrite_sentences(), but splits the file at sentence
+        boundaries into shards that are passed through the stage in parallel processes.
+        Shards hold neighbouring sentences and are balanced by the estimated cost
+        of their sentences, not by the number of sentences. The shards are joined
+        in file order, so the output is the same as with rewrite_sentences().
+        Sentence boundaries come from the sentence index of the file, see sentenceIndex.py,
+        and each process reads only the bytes of its own shard.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            xml_out (str): Path to an empty file with .xml extension
+            cost (function): Takes the bytes of a sentence and returns its estimated cost
+            workers (int): Number of processes
+            stage (function): Module level function, takes an iterable of lxml <s> elements and yields them back
+            *args: Further arguments for the stage, they must be picklable
+
+        Returns:
+            The written corpus file
+
+        Example:
+            >>> rewrite_sentences_sharded('../../res/xml/train/output/baskerville_ch4.jr.xml',
+            '../../res/xml/train/output/tagged/baskerville_ch4.jr.xml',
+            len, 4, tag_sentences, cueword_list)
+    """
+
+    # Imported here because the index module builds on this one
+    from sentenceIndex import load_index
+
+    index = load_index(xml_file)
+
+    decompressed = None
+    if is_compressed(xml_file):
+        # Compressed files can not be mapped, they are decompressed once
+        # and the shards are handed their bytes from the buffer
+        with open_corpus(xml_file, 'rb') as xml_input:
+            decompressed = xml_input.read()
+        costs = [cost(decompressed[offset:offset + length])
+                 for offset, length in zip(index.offsets, index.lengths)]
+        rest = decompressed[index.end():]
+
+    else:
+        with open(xml_file, 'rb') as xml_input:
+            if not os.fstat(xml_input.fileno()).st_size:
+                return rewrite_sentences(xml_file, xml_out, stage, *args)
+
+            # Costs are estimated from a memory map, the file is never read as a whole
+            with mmap.mmap(xml_input.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                costs = [cost(buffer[offset:offset + length]) for offset, length in zip(index.offsets, index.lengths)]
+                rest = buffer[index.end():]
+
+    # (gap start, sentence start, sentence end) byte offsets, the gap holds the bytes before the sentence
+    spans = []
+    gap_start = 0
+    for offset, length in zip(index.offsets, index.lengths):
+        spans.append((gap_start, offset, offset + length))
+        gap_start = offset + length
+
+    shards = balance_shards(spans, costs, workers * SHARDS_PER_WORKER)
+
+    # Seeking into a compressed file decompresses it from the start, once per shard
+    if decompressed is not None:
+        jobs = [(decompressed[shard[0][0]:shard[-1][2]], shard, stage) + args for shard in shards]
+        del decompressed
+        rewrite = rewrite_shard_data
+    else:
+        jobs = [(xml_file, shard, stage) + args for shard in shards]
+        rewrite = rewrite_shard
+
+    # The pool forks its workers before the first part comes back, so waiting for it
+    # keeps the fork ahead of the writer thread, a forked child inherits no threads
+    # but every lock they held
+    parts = map_files(rewrite, jobs, workers)
+    first = next(parts, b'')
+
+    with open_corpus(xml_out, 'wb', background=OVERLAP_IO) as xml_output:
+        xml_output.write(first)
+        for part in parts:
+            xml_output.write(part)
+        xml_output.write(rest)
+
+
+def balance_shards(items, costs, count):
+    """ This function splits a list into at most count neighbouring shards of about equal cost.
+
+        Args:
+            items (list): Items in file order
+            costs (list): Estimated cost of each item
+            count (int): Number of shards
+
+        Returns:
+            List of shards, each one a list of items
+
+        Example:
+            >>> balance_shards(['a', 'b', 'c', 'd'], [3, 1, 1, 1], 2)
+            [['a'], ['b', 'c', 'd']]
+    """
+
+    total = sum(costs)
+    shards = []
+    shard = []
+    done = 0
+
+    for item, item_cost in zip(items, costs):
+        shard.append(item)
+        done += item_cost
+
+        # Close the shard once it reaches its share of the total cost
+        if len(shards) < count - 1 and done >= total * (len(shards) + 1) / count:
+            shards.append(shard)
+            shard = []
+
+    if shard:
+        shards.append(shard)
+
+    return shards
+
+
+def rewrite_shard(xml_file, spans, stage, *args):
+    """ This function passes a shard of neighbouring sentences through a stage.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            spans (list): (gap start, sentence start, sentence end) byte offsets of the sentences
+            stage (function): Takes an iterable of lxml <s> elements and yields them back
+            *args: Further arguments for the stage
+
+        Returns:
+            The rewritten shard as bytes
+    """
+
+    # Read the bytes of the shard only
+    shard_start = spans[0][0]
+    with open_corpus(xml_file, 'rb') as xml_input:
+        xml_input.seek(shard_start)
+        data = xml_input.read(spans[-1][2] - shard_start)
+
+    return rewrite_shard_data(data, spans, stage, *args)
+
+
+def rewrite_shard_data(data, spans, stage, *args):
+    """ This function passes the bytes of a shard through a stage, see rewrite_shard().
+
+        Args:
+            data (bytes): The shard, from the gap start of its first sentence to the end of its last sentence
+            spans (list): (gap start, sentence start, sentence end) byte offsets of the sentences in the file
+            stage (function): Takes an iterable of lxml <s> elements and yields them back
+            *args: Further arguments for the stage
+
+        Returns:
+            The rewritten shard as bytes
+    """
+
+    shard_start = spans[0][0]
+    chunks = [(data[gap_start - shard_start:start - shard_start], data[start - shard_start:end - shard_start])
+              for gap_start, start, end in spans]
+
+    return b''.join(rewrite_chunks(chunks, stage, *args))
+
+
+def rewrite_chunks(chunks, stage, *args):
+    """ This function passes (gap, sentence) chunks from split_sentences() through a stage.
+
+        Args:
+            chunks (iterable): (gap, sentence) byte strings from split_sentences()
+            stage (function): Takes an iterable of lxml <s> elements and yields them back
+            *args: Further arguments for the stage
+
+        Returns:
+            Generator of output bytes, in input order
+    """
+
+    # Input bytes and block snapshots of the sentences the stage is working on
+    pending = deque()
+
+    def read_sentences(chunks):
+        """ Parses each sentence and keeps its bytes until the stage yields it """
+        for gap, data in chunks:
+            if data is None:
+                pending.append((gap, None, None))
+                continue
+            sentence = etree.fromstring(data, SENTENCE_PARSER)
+            pending.append((gap, data, snapshot_blocks(sentence)))
+            yield sentence
+
+    for sentence in stage(read_sentences(chunks), *args):
+        gap, data, blocks = pending.popleft()
+        yield gap
+        yield splice_sentence(data, sentence, blocks)
+
+    # Everything after the last sentence
+    while pending:
+        gap, data, blocks = pending.popleft()
+        yield gap
+
+
+def split_sentences(xml_file, overlap=False):
+    """ This function splits a corpus file in TIGER-XML format into sentences
+        without parsing it. The file is read in chunks of READ_SIZE bytes.
+
+        Args:
+            xml_file (str): Path to a corpus file in xml format
+            overlap (bool): Read the next chunks on a background thread, see corpusIO.read_ahead()
+
+        Returns:
+            Generator of (gap, sentence) byte strings, where gap holds the bytes
+            before the sentence. The last item holds the rest of the file and None.
+
+        Example:
+            >>> for gap, sentence in split_sentences('../../res/xml/train/baskerville_ch4.jr.xml'):
+            ...     print(len(gap), sentence[:12])
+    """
+
+    chunks = read_chunks(xml_file, READ_SIZE)
+    if overlap:
+        chunks = read_ahead(chunks)
+
+    return split_chunks(chunks)
+
+
+def split_chunks(chunks):
+    """ This function splits a stream of TIGER-XML bytes into sentences, see split_sentences().
+        Sentences are yielded as soon as their closing tag has been read.
+
+        Args:
+            chunks (iterable): Byte strings, for example from read_chunks() or a pipe
+
+        Returns:
+            Generator of (gap, sentence) byte strings, the last item holds the rest and None,
+            a ValueError is raised for a </s> without <s>
+    """
+
+    buffer = b''
+
+    # Bytes before the buffer, for error messages
+    consumed = 0
+
+    for chunk in chunks:
+        buffer += chunk
+        position = 0
+
+        while True:
+            end = buffer.find(SENTENCE_END, position)
+            if end == -1:
+                break
+            start = SENTENCE_START.search(buffer, position, end)
+            if start is None:
+                raise ValueError('</s> without <s> at byte ' + str(consumed + end))
+            end += len(SENTENCE_END)
+            yield buffer[position:start.start()], buffer[start.start():end]
+            position = end
+
+        consumed += position
+        buffer = buffer[position:]
+
+    yield buffer, None
+
+
+def snapshot_blocks(sentence):
+    """ This function remembers the <splitwords> and <frames> tags of a sentence
+        and their children, before a stage changes them.
+
+        Args:
+            sentence (lxml.etree._Element): <s> element
+
+        Returns:
+            List of (tag, child tag, block, children) tuples, block and children are None if missing
+    """
+
+    semantics = sentence.find('sem')
+    blocks = []
+
+    for tag, child_tag in BLOCK_TAGS:
+        block = semantics.find(tag) if semantics is not None else None
+        blocks.append((tag, child_tag, block, list(block) if block is not None else None))
+
+    return blocks
+
+
+def splice_sentence(data, sentence, blocks):
+    """ This function writes a sentence after a stage has changed it.
+        Unchanged bytes are taken from the input, only added tags are serialized.
+
+        Args:
+            data (bytes): The sentence from the input file
+            sentence (lxml.etree._Element): The same sentence after the stage
+            blocks (list): Snapshot from snapshot_blocks()
+
+        Returns:
+            The sentence as bytes
+    """
+
+    if data is None:
+        return b''
+
+    semantics = sentence.find('sem')
+    if semantics is None:
+        return data
+
+    # Only sentences with added or removed tags are spliced
+    changed = False
+    for tag, child_tag, block, children in blocks:
+        new_block = semantics.find(tag)
+        if new_block is not block or (block is not None and list(block) != children):
+            changed = True
+            break
+
+    if not changed:
+        return data
+
+    # Sentences that had no <sem> got one from the stage, they are written again as a whole
+    sem_spans = element_spans(data, 'sem', 0, len(data))
+    if not sem_spans:
+        return etree.tostring(sentence, encoding='utf-8', with_tail=False)
+    sem_span = sem_spans[0]
+    space = indentation_unit(data, sem_span[0])
+
+    # (start, end, bytes) replacements in the input bytes
+    edits = []
+    created = []
+
+    for tag, child_tag, block, children in blocks:
+        new_block = semantics.find(tag)
+
+        if block is not None:
+            block_span = element_spans(data, tag, sem_span[1], sem_span[2])[0]
+            child_spans = element_spans(data, child_tag, block_span[1], block_span[2])
+
+        if new_block is block:
+            if block is None or list(block) == children:
+                continue
+
+            # Self closing blocks and blocks with unexpected content are written again
+            if block_span[1] == block_span[3] or len(child_spans) != len(children):
+                edits.append((whitespace_start(data, block_span[0]), block_span[3], b''))
+                block = None
+
+            else:
+                # Remove whole children
+                for child, span in zip(children, child_spans):
+                    if child.getparent() is not new_block:
+                        edits.append((whitespace_start(data, span[0]), span[3], b''))
+
+                # Add new children after the previous old child
+                anchor = block_span[1]
+                for child in new_block:
+                    if child in children:
+                        anchor = child_spans[children.index(child)][3]
+                    else:
+                        edits.append((anchor, anchor, serialize_tag(child, space, 5)))
+                continue
+
+        elif block is not None:
+            edits.append((whitespace_start(data, block_span[0]), block_span[3], b''))
+
+        if new_block is None:
+            continue
+
+        # Add the new block after the previous tag from the input
+        anchor = sem_span[1]
+        previous = new_block.getprevious()
+        while previous is not None and (previous in created or not isinstance(previous.tag, str)):
+            previous = previous.getprevious()
+        if previous is not None:
+            anchor = element_spans(data, previous.tag, sem_span[1], sem_span[2])[0][3]
+
+        edits.append((anchor, anchor, serialize_tag(new_block, space, 4)))
+        created.append(new_block)
+
+    # Apply the replacements in order, insertions before removals at the same position
+    spliced = []
+    position = 0
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        spliced.append(data[position:start] if start > position else b'')
+        spliced.append(replacement)
+        position = max(position, end)
+    spliced.append(data[position:])
+
+    return b''.join(spliced)
+
+
+def element_spans(data, tag, start, end):
+    """ This function finds tags in xml bytes without parsing them.
+        Tags with the same name must not be nested.
+
+        Args:
+            data (bytes): Xml bytes
+            tag (str): Tag name
+            start (int): Where to start looking
+            end (int): Where to stop looking
+
+        Returns:
+            List of (start, content start, content end, end) offsets, one for each tag
+    """
+
+    pattern = re.compile(OPEN_TAG % re.escape(tag.encode('utf-8')))
+    close_tag = b'</' + tag.encode('utf-8') + b'>'
+    spans = []
+
+    match = pattern.search(data, start, end)
+    while match is not None:
+        if match.group(1):
+            # Self closing tag
+            spans.append((match.start(), match.end(), match.end(), match.end()))
+        else:
+            content_end = data.index(close_tag, match.end(), end)
+            spans.append((match.start(), match.end(), content_end, content_end + len(close_tag)))
+        match = pattern.search(data, spans[-1][3], end)
+
+    return spans
+
+
+def whitespace_start(data, position):
+    """ Returns where the whitespace before position starts, so that removed tags leave no empty lines """
+    while position > 0 and data[position - 1:position].isspace():
+        position -= 1
+    return position
+
+
+def indentation_unit(data, sem_start):
+    """ Returns the indentation unit of a sentence, <sem> is on the fourth level (corpus, body, s, sem) """
+    line_start = data.rfind(b'\n', 0, sem_start) + 1
+    indentation = data[line_start:sem_start].decode('utf-8')
+    if line_start == 0 or indentation.strip():
+        return '\t'
+    return indentation[:len(indentation) // 3] or '\t'
+
+
+def serialize_tag(element, space, level):
+    """ This function serializes a new tag on its own, indented line.
+
+        Args:
+            element (lxml.etree._Element): The new tag
+            space (str): Indentation unit
+            level (int): Indentation level of the tag
+
+        Returns:
+            The tag as bytes, starting with a line break
+    """
+
+    etree.indent(element, space=space, level=level)
+    return ('\n' + space * level).encode('utf-8') + etree.tostring(element, encoding='utf-8',
+                                                                   xml_declaration=False, with_tail=False)
@@ -21,8 +21,9 @@ Version: 1.0
 # import dependencies
 import os, sys
 import codecs
-from bs4 import BeautifulSoup
-import lxml
+from artifactCache import cached_call
+from corpusModel import iter_corpus
+from processPool import list_xml_files, map_files
 
 XML_TRAIN_FILES_PATH = '../../res/xml/train/'
 CONLL_PATH = '../../res/conll/'
@@ -31,12 +32,14 @@ CONLL_PATH = '../../res/conll/'
 # Columns overview
 # ID FORM LEMMA PLEMMA POS PPOS FEAT PFEAT HEAD PHEAD DEPREL PDEPREL FILLPRED PRED APRED1 APRED2 APRED3 APRED4 APRED5 APRED6
 
-def xml_to_conll(xml_file_path):
+def xml_to_conll(xml_file_path, conll_path=CONLL_PATH, workers=1):
         """ This function transforms corpus xml files into the CoNLL-2009 format
             which is needed for dependency parsing.
 
             Args:
                 xml (str): Path to corpus files in tiger xml format
+                conll_path (str): Path for output, defaults to CONLL_PATH
+                workers (int): Number of processes, files are converted in parallel if > 1
 
             Returns:
                 The written files with .conll extension
@@ -45,37 +48,62 @@ def xml_to_conll(xml_file_path):
                 >>> xml_to_conll('../res/xml/train/')
         """
 
-        for file in os.listdir(xml_file_path):
+        jobs = [('conll', convert_file, (file, conll_path), [file], [conll_path+os.path.split(file)[-1]+'.conll'])
+                for file in list_xml_files(xml_file_path)]
+        for chapter_output in map_files(cached_call, jobs, workers):
+            pass
 
-            # Set path to file
-            file = xml_file_path+file
+        print("Done!")
 
-            # Open files only, ignore subdirectories
-            if os.path.isfile(file) and file.lower().endswith('.xml'):
+def convert_file(file, conll_path=CONLL_PATH):
+        """ This function transforms one corpus xml file into the CoNLL-2009 format.
 
-                # Open Files
-                chapter_input = open(file, 'r', encoding='utf8')
+            Args:
+                file (str): Path to a corpus file in tiger xml format
+                conll_path (str): Path for output, defaults to CONLL_PATH
 
-                # Create Same Filename in Output Folder
-                chapter_output = open(CONLL_PATH+os.path.split(file)[-1]+'.conll', 'w', encoding='utf8')
+            Returns:
+                Path to the written file with .conll extension
 
-                print('Converting: ' + chapter_input.name + ' to Conll09 file: ' + chapter_output.name)
+            Example:
+                >>> convert_file('../res/xml/train/baskerville_ch4.jr.xml')
+        """
 
-                chapter_input = BeautifulSoup(chapter_input, 'xml')
-                for sentence in chapter_input.find_all('s'):
-                    line_id = 0
-                    for terminal in sentence.find_all('t'):
-                        line_id, terminal_id, form, lemma, plemma = line_id+1, terminal.get('id'), terminal.get('word'), terminal.get('lemma'), terminal.get('lemma')
-                        pos, ppos = terminal.get('pos'), terminal.get('pos')
-                        feat, pfeat, head, phead, deprel, pdeprel, fillpred, pred, apred1 = "_" * 9 # <3 Python!
-                        chapter_output.write("%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t"
-                                             "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\n"
-                                             % (str(line_id)+"-"+terminal_id, form, lemma, plemma, pos, ppos, feat, pfeat, head, phead, deprel, pdeprel, fillpred, pred, apred1))
-                    chapter_output.write("\n")
+        # Create Same Filename in Output Folder
+        chapter_output = open(conll_path+os.path.split(file)[-1]+'.conll', 'w', encoding='utf8')
 
-                chapter_output.close()
+        print('Converting: ' + file + ' to Conll09 file: ' + chapter_output.name)
 
-        print("Done!")
+        for sentence in iter_corpus(file):
+            write_conll(sentence, chapter_output)
+
+        chapter_output.close()
+
+        return chapter_output.name
+
+def write_conll(sentence, chapter_output):
+        """ This function writes one sentence in the CoNLL-2009 format, one line per terminal.
+
+            Args:
+                sentence (Sentence): Sentence from corpusModel.py
+                chapter_output (file): Open .conll file for output
+
+            Returns:
+                Nothing, the sentence is written to chapter_output
+
+            Example:
+                >>> write_conll(sentence, chapter_output)
+        """
+
+        line_id = 0
+        for terminal in sentence.terminals:
+            line_id, terminal_id, form, lemma, plemma = line_id+1, terminal.id, terminal.word, terminal.lemma, terminal.lemma
+            pos, ppos = terminal.pos, terminal.pos
+            feat, pfeat, head, phead, deprel, pdeprel, fillpred, pred, apred1 = "_" * 9 # <3 Python!
+            chapter_output.write("%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t"
+                                 "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\t" "%s" "\n"
+                                 % (str(line_id)+"-"+terminal_id, form, lemma, plemma, pos, ppos, feat, pfeat, head, phead, deprel, pdeprel, fillpred, pred, apred1))
+        chapter_output.write("\n")
 
 if __name__ == "__main__":
 